@@ -0,0 +1,42 @@
+# ============================================================================
+# File Path: backend/accounts/admin.py
+# Description: Admin interface configuration for API tokens
+# ============================================================================
+
+from django.contrib import admin
+from .models import ApiToken
+
+
+@admin.register(ApiToken)
+class ApiTokenAdmin(admin.ModelAdmin):
+    list_display = (
+        'name',
+        'user',
+        'prefix',
+        'scopes',
+        'created_at',
+        'expires_at',
+        'last_used_at',
+        'revoked_at',
+    )
+    list_filter = ('scopes',)
+    list_select_related = ('user',)
+    search_fields = ('name', 'prefix', 'user__username')
+    readonly_fields = (
+        'user',
+        'prefix',
+        'created_at',
+        'last_used_at',
+        'revoked_at',
+    )
+    actions = ['revoke_tokens']
+
+    def has_add_permission(self, request):
+        # Keys are shown once at issue time; use the API or issue_api_token
+        return False
+
+    @admin.action(description='Revoke selected tokens')
+    def revoke_tokens(self, request, queryset):
+        # Saved one by one so each cached lookup is dropped
+        for token in queryset.filter(revoked_at__isnull=True):
+            token.revoke()
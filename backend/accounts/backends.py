@@ -0,0 +1,32 @@
+# ============================================================================
+# File Path: backend/accounts/backends.py
+# Description: Authentication backend that caches the logged-in user
+# ============================================================================
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+def user_cache_key(user_id):
+    return 'auth-user:%s' % user_id
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ``ModelBackend`` whose per-request ``get_user`` is served from the cache.
+
+    ``AuthenticationMiddleware`` resolves the session's user on every page;
+    with this backend that is a cache read rather than a query. Entries are
+    dropped whenever the user is saved or deleted, and otherwise expire
+    after ``AUTH_USER_CACHE_SECONDS``.
+    """
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.AUTH_USER_CACHE_SECONDS)
+        return user
@@ -0,0 +1,39 @@
+# ============================================================================
+# File Path: backend/accounts/management/commands/issue_api_token.py
+# Description: Issue an API token for a user
+# ============================================================================
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import ApiToken, SCOPES
+
+
+class Command(BaseCommand):
+    help = 'Issue an API token for an existing user and print its key once.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--name', default='integration',
+                            help='Label shown in the admin.')
+        parser.add_argument('--scope', action='append', choices=SCOPES,
+                            help='Scope to grant; repeat for several. Defaults to all.')
+        parser.add_argument('--expires-in-days', type=int,
+                            default=settings.API_TOKEN_DEFAULT_DAYS,
+                            help='Lifetime in days; 0 for no expiry.')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'No user named {options["username"]!r}')
+        token, key = ApiToken.issue(
+            user,
+            options['name'],
+            scopes=options['scope'] or SCOPES,
+            expires_in_days=options['expires_in_days'] or None,
+        )
+        expiry = token.expires_at.isoformat() if token.expires_at else 'never'
+        self.stderr.write(f'Issued {token.name!r} for {user} (expires {expiry})')
+        self.stdout.write(key)
@@ -0,0 +1,98 @@
+# ============================================================================
+# File Path: backend/accounts/models.py
+# Description: API tokens for scripted integrations
+# ============================================================================
+
+import hashlib
+import secrets
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import models
+from django.utils import timezone
+
+KEY_PREFIX = 'cal_'
+SCOPES = ('read', 'write')
+
+
+def hash_key(key):
+    """
+    Digest stored in place of the key.
+
+    Keys are 256 random bits, so a single SHA-256 is enough; the slow,
+    salted password hashers exist to protect guessable secrets.
+    """
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class ApiToken(models.Model):
+    """
+    A named, scoped credential for API clients.
+
+    Only the digest of the key is stored; the key itself is shown once
+    when the token is issued.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='api_tokens'
+    )
+    name = models.CharField(max_length=100)
+    prefix = models.CharField(max_length=12, editable=False)
+    key_hash = models.CharField(max_length=64, unique=True, editable=False)
+    scopes = models.CharField(
+        max_length=100,
+        default='read write',
+        help_text='Space separated: read, write'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    last_used_at = models.DateTimeField(null=True, blank=True)
+    revoked_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.name} ({self.prefix}…) for {self.user}"
+
+    @classmethod
+    def issue(cls, user, name, scopes=SCOPES, expires_in_days=None, not_after=None):
+        """
+        Create a token and return it together with its plain key. It
+        expires no later than ``not_after``, when given.
+        """
+        key = KEY_PREFIX + secrets.token_urlsafe(32)
+        expires_at = None
+        if expires_in_days:
+            expires_at = timezone.now() + timedelta(days=expires_in_days)
+        if not_after is not None and (expires_at is None or expires_at > not_after):
+            expires_at = not_after
+        token = cls.objects.create(
+            user=user,
+            name=name,
+            prefix=key[:12],
+            key_hash=hash_key(key),
+            scopes=' '.join(scopes),
+            expires_at=expires_at,
+        )
+        return token, key
+
+    @property
+    def scope_set(self):
+        return frozenset(self.scopes.split())
+
+    def has_scope(self, scope):
+        return scope in self.scope_set
+
+    def is_valid(self, now=None):
+        if self.revoked_at is not None:
+            return False
+        if self.expires_at is None:
+            return True
+        return self.expires_at > (now or timezone.now())
+
+    def revoke(self):
+        self.revoked_at = timezone.now()
+        self.save(update_fields=['revoked_at'])
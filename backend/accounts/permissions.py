@@ -0,0 +1,28 @@
+# ============================================================================
+# File Path: backend/accounts/permissions.py
+# Description: Scope checks for requests authenticated with an API token
+# ============================================================================
+
+from rest_framework import permissions
+
+from .models import ApiToken
+
+
+def token_allows(auth, method):
+    """
+    Whether the credential behind ``request.auth`` may use ``method``.
+
+    Sessions and Basic credentials are unscoped; tokens need ``read`` for
+    safe methods and ``write`` for everything else.
+    """
+    if not isinstance(auth, ApiToken):
+        return True
+    scope = 'read' if method in permissions.SAFE_METHODS else 'write'
+    return auth.has_scope(scope)
+
+
+class TokenHasScope(permissions.BasePermission):
+    message = 'This API token does not have the required scope.'
+
+    def has_permission(self, request, view):
+        return token_allows(request.auth, request.method)
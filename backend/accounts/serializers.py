@@ -0,0 +1,84 @@
+# ============================================================================
+# File Path: backend/accounts/serializers.py
+# Description: Serializers for API tokens
+# ============================================================================
+
+from django.conf import settings
+from rest_framework import serializers
+
+from .models import ApiToken, SCOPES
+
+
+class ApiTokenSerializer(serializers.ModelSerializer):
+    """
+    Token metadata. ``key`` is only present in the response that issues
+    the token.
+    """
+
+    scopes = serializers.MultipleChoiceField(choices=SCOPES, required=False)
+    expires_in_days = serializers.IntegerField(
+        min_value=1, required=False, allow_null=True, write_only=True
+    )
+    key = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = ApiToken
+        fields = (
+            'id',
+            'name',
+            'prefix',
+            'scopes',
+            'expires_in_days',
+            'key',
+            'created_at',
+            'expires_at',
+            'last_used_at',
+            'revoked_at',
+        )
+        read_only_fields = (
+            'prefix',
+            'created_at',
+            'expires_at',
+            'last_used_at',
+            'revoked_at',
+        )
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['scopes'] = sorted(instance.scope_set)
+        return data
+
+    def validate(self, attrs):
+        """
+        Only staff may ask for a token that never expires. A token issued
+        by another token gets no scope and no lifetime the caller lacks.
+        """
+        request = self.context['request']
+        if 'expires_in_days' in attrs and attrs['expires_in_days'] is None \
+                and not request.user.is_staff:
+            raise serializers.ValidationError(
+                {'expires_in_days': 'Only staff can issue tokens that never expire.'}
+            )
+        if isinstance(request.auth, ApiToken):
+            scopes = set(attrs.get('scopes') or request.auth.scope_set)
+            if not scopes <= request.auth.scope_set:
+                raise serializers.ValidationError(
+                    {'scopes': 'A token cannot issue scopes it does not have.'}
+                )
+            attrs['scopes'] = scopes
+        return attrs
+
+    def create(self, validated_data):
+        request = self.context['request']
+        expires_in_days = validated_data.get(
+            'expires_in_days', settings.API_TOKEN_DEFAULT_DAYS
+        )
+        token, key = ApiToken.issue(
+            user=request.user,
+            name=validated_data['name'],
+            scopes=sorted(validated_data.get('scopes') or SCOPES),
+            expires_in_days=expires_in_days,
+            not_after=request.auth.expires_at if isinstance(request.auth, ApiToken) else None,
+        )
+        token.key = key
+        return token
@@ -0,0 +1,34 @@
+# ============================================================================
+# File Path: backend/accounts/signals.py
+# Description: Keep cached users and API token lookups in step with the database
+# ============================================================================
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate
+from .backends import user_cache_key
+from .models import ApiToken
+
+
+@receiver(post_save, sender=ApiToken)
+@receiver(post_delete, sender=ApiToken)
+def token_changed(sender, instance, **kwargs):
+    invalidate([instance.key_hash])
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, update_fields=None, **kwargs):
+    # Cached tokens carry a copy of the user (is_active, permissions);
+    # logging in only touches last_login
+    if created or update_fields == frozenset(['last_login']):
+        return
+    invalidate(instance.api_tokens.values_list('key_hash', flat=True))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_cached_user(sender, instance, **kwargs):
+    cache.delete(user_cache_key(instance.pk))
@@ -0,0 +1,17 @@
+# ============================================================================
+# File Path: backend/accounts/urls.py
+# Description: URL configuration for accounts app
+# ============================================================================
+
+from django.urls import path, include
+from rest_framework.routers import SimpleRouter
+from . import views
+
+app_name = 'accounts'
+
+router = SimpleRouter()
+router.register(r'tokens', views.ApiTokenViewSet, basename='token')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,36 @@
+# ============================================================================
+# File Path: backend/accounts/views.py
+# Description: Views for managing API tokens
+# ============================================================================
+
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.response import Response
+
+from .models import ApiToken
+from .permissions import TokenHasScope
+from .serializers import ApiTokenSerializer
+
+
+class ApiTokenViewSet(mixins.ListModelMixin,
+                      mixins.RetrieveModelMixin,
+                      mixins.CreateModelMixin,
+                      viewsets.GenericViewSet):
+    """
+    The current user's API tokens.
+
+    Integrations still on HTTP Basic migrate by POSTing here once with
+    their existing credentials and sending the returned key as
+    ``Authorization: Token <key>`` from then on. DELETE revokes a token.
+    """
+
+    serializer_class = ApiTokenSerializer
+    permission_classes = [permissions.IsAuthenticated, TokenHasScope]
+
+    def get_queryset(self):
+        return ApiToken.objects.filter(user=self.request.user)
+
+    def destroy(self, request, *args, **kwargs):
+        token = self.get_object()
+        if token.revoked_at is None:
+            token.revoke()
+        return Response(status=status.HTTP_204_NO_CONTENT)
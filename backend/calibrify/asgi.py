@@ -3,6 +3,20 @@ ASGI config for calibrify project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+This is the entry point for the async endpoints (``/api/dashboard/summary/``,
+``/api/dashboard/activity/``, ``/api/calendar/events/``) and for the
+``/api/dashboard/live/`` event stream, which only works here. The endpoints'
+queries still run through ``sync_to_async`` in a thread pool, each holding
+a thread while it runs; with ``ASYNC_QUERY_CONCURRENCY`` independent queries
+run side by side on their own connections. Only the event stream waits
+without holding a thread. Serve it with uvicorn workers, e.g.::
+
+    gunicorn calibrify.asgi:application -k uvicorn.workers.UvicornWorker \
+        --workers 4 --bind 0.0.0.0:8000
+
+or, without gunicorn, ``uvicorn calibrify.asgi:application --workers 4``.
+Synchronous views still work under ASGI; Django runs them in a thread pool.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
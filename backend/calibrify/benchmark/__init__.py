@@ -0,0 +1,4 @@
+# ============================================================================
+# File Path: backend/calibrify/benchmark/__init__.py
+# Description: Package initialization for the benchmark harness
+# ============================================================================
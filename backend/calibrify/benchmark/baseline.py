@@ -0,0 +1,60 @@
+# ============================================================================
+# File Path: backend/calibrify/benchmark/baseline.py
+# Description: Storing benchmark baselines and detecting regressions
+# ============================================================================
+
+import json
+import platform
+from pathlib import Path
+
+from django.db import connection
+from django.utils import timezone
+
+
+def environment():
+    """Describe where a result was produced; baselines only compare like with like."""
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'database': connection.vendor,
+        'recorded_at': timezone.now().isoformat(),
+    }
+
+
+def load(path):
+    path = Path(path)
+    if not path.exists():
+        return None
+    with path.open() as handle:
+        return json.load(handle)
+
+
+def save(path, mode, results):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = load(path) or {}
+    data[mode] = {'environment': environment(), 'results': results}
+    with path.open('w') as handle:
+        json.dump(data, handle, indent=2, sort_keys=True)
+
+
+def compare(baseline, results, tolerance=0.20):
+    """
+    Return regressions as ``(scenario, metric, baseline, current)`` tuples.
+
+    Latency (p50/p95) may grow by ``tolerance`` before it is flagged; query
+    counts are deterministic and any increase is a regression.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric in ('p50_ms', 'p95_ms'):
+            if metric in previous and current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append((name, metric, previous[metric], current[metric]))
+        if 'queries' in previous and current.get('queries', 0) > previous['queries']:
+            regressions.append((name, 'queries', previous['queries'], current['queries']))
+        if current.get('errors') and not previous.get('errors'):
+            regressions.append((name, 'errors', previous.get('errors', 0), current['errors']))
+    return regressions
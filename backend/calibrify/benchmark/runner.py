@@ -0,0 +1,240 @@
+# ============================================================================
+# File Path: backend/calibrify/benchmark/runner.py
+# Description: In-process and HTTP benchmark runners
+# ============================================================================
+
+import gc
+import resource
+import time
+import tracemalloc
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, connections, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, max(0, int(round(fraction * len(samples))) - 1))
+    return samples[index]
+
+
+def summarize(latencies, errors=0, elapsed=None):
+    """Reduce raw latencies (seconds) to the figures stored in a baseline."""
+    ordered = sorted(latencies)
+    count = len(ordered)
+    summary = {
+        'requests': count,
+        'errors': errors,
+        'mean_ms': (sum(ordered) / count * 1000) if count else 0.0,
+        'p50_ms': percentile(ordered, 0.50) * 1000,
+        'p90_ms': percentile(ordered, 0.90) * 1000,
+        'p95_ms': percentile(ordered, 0.95) * 1000,
+        'p99_ms': percentile(ordered, 0.99) * 1000,
+        'max_ms': (ordered[-1] * 1000) if count else 0.0,
+    }
+    if elapsed:
+        summary['throughput_rps'] = count / elapsed
+    return summary
+
+
+def _max_rss_kb():
+    # ru_maxrss is kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class InProcessRunner:
+    """
+    Drive endpoints through ``django.test.Client`` in the current process.
+
+    Measures latency, query count per request and peak Python allocation;
+    network and server overhead are deliberately excluded. Requests use a
+    session unless an ``Authorization`` header value is given.
+    """
+
+    def __init__(self, user, iterations=50, warmup=5, authorization=None):
+        self.iterations = iterations
+        self.warmup = warmup
+        hosts = [host for host in settings.ALLOWED_HOSTS if host and host != '*']
+        defaults = {'HTTP_HOST': hosts[0] if hosts else 'localhost'}
+        if authorization:
+            defaults['HTTP_AUTHORIZATION'] = authorization
+        self.client = Client(**defaults)
+        if not authorization:
+            self.client.force_login(user)
+
+    def _request(self, scenario):
+        method = getattr(self.client, scenario.method.lower())
+        if scenario.data is None:
+            return method(scenario.path)
+        return method(scenario.path, scenario.data, content_type='application/json')
+
+    def run(self, scenario):
+        for _ in range(self.warmup):
+            self._request(scenario)
+
+        latencies, errors = [], 0
+        for _ in range(self.iterations):
+            started = time.perf_counter()
+            response = self._request(scenario)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+        with CaptureQueriesContext(connection) as queries:
+            self._request(scenario)
+        query_count = len(queries)
+        reset_queries()
+
+        # Separate pass: tracemalloc distorts timings too much to share
+        gc.collect()
+        tracemalloc.start()
+        try:
+            self._request(scenario)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        result = summarize(latencies, errors)
+        result.update({
+            'queries': query_count,
+            'peak_alloc_kb': peak / 1024,
+            'max_rss_kb': _max_rss_kb(),
+        })
+        return result
+
+
+class HTTPRunner:
+    """
+    Replay endpoints against a running server with concurrent clients.
+
+    Authentication reuses a session created directly in the session store
+    (or the given ``Authorization`` header), so the runner must share the
+    server's database.
+    """
+
+    def __init__(self, base_url, user, requests=200, concurrency=10, timeout=30,
+                 think_time=0.0, authorization=None):
+        self.base_url = base_url.rstrip('/')
+        self.requests = requests
+        self.concurrency = concurrency
+        self.timeout = timeout
+        # Pause after each response, simulating clients that poll
+        self.think_time = think_time
+        if authorization:
+            self.headers = {'Authorization': authorization}
+        else:
+            client = Client()
+            client.force_login(user)
+            self.headers = {'Cookie': '; '.join(
+                f'{name}={morsel.value}' for name, morsel in client.cookies.items()
+            )}
+        self.headers['Accept'] = 'application/json'
+
+    def _fetch(self, scenario):
+        request = urllib.request.Request(
+            self.base_url + scenario.path,
+            method=scenario.method,
+            headers=self.headers,
+        )
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+                ok = response.status < 400
+        except (urllib.error.URLError, OSError):
+            ok = False
+        latency = time.perf_counter() - started
+        if self.think_time:
+            time.sleep(self.think_time)
+        return latency, ok
+
+    def run(self, scenario):
+        self._fetch(scenario)  # warm connection pools and caches
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            results = list(pool.map(
+                lambda _: self._fetch(scenario), range(self.requests)
+            ))
+        elapsed = time.perf_counter() - started
+        latencies = [latency for latency, ok in results if ok]
+        errors = sum(1 for _, ok in results if not ok)
+        result = summarize(latencies, errors, elapsed)
+        result['concurrency'] = self.concurrency
+        return result
+
+
+def rows_per_second(render, repeat=3):
+    """
+    Rows per second of ``render()``, which returns the rows it produced;
+    the best of ``repeat`` runs, after one to warm up.
+    """
+    render()
+    best, count = None, 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        count = len(render())
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return count / best if best else 0.0
+
+
+def connection_overhead(alias='default', iterations=50):
+    """
+    Time ``SELECT 1`` three ways: over a brand-new connection (what every
+    request paid with ``CONN_MAX_AGE = 0``), after handing the connection
+    back to Django (a pool checkout with the pooled backend) and on an
+    already open connection.
+    """
+    wrapper = connections[alias]
+    params = wrapper.get_connection_params()
+
+    def run(prepare):
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            prepare()
+            samples.append(time.perf_counter() - started)
+        return samples
+
+    def fresh():
+        raw = wrapper.Database.connect(**params)
+        try:
+            cursor = raw.cursor()
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        finally:
+            raw.close()
+
+    def reconnect():
+        wrapper.close()
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+    def reuse():
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+    results = {
+        'new_connection': summarize(run(fresh)),
+        'django_reconnect': summarize(run(reconnect)),
+        'open_connection': summarize(run(reuse)),
+    }
+    # What a request actually pays under the configured settings: persistent
+    # connections stay open; otherwise Django reconnects (or checks out of
+    # the pool) once per request.
+    if wrapper.settings_dict.get('CONN_MAX_AGE'):
+        results['per_request_path'] = 'open_connection'
+    else:
+        results['per_request_path'] = 'django_reconnect'
+    results['saved_ms_per_request'] = (
+        results['new_connection']['mean_ms']
+        - results[results['per_request_path']]['mean_ms']
+    )
+    return results
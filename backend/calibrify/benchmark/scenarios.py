@@ -0,0 +1,64 @@
+# ============================================================================
+# File Path: backend/calibrify/benchmark/scenarios.py
+# Description: Endpoints exercised by the benchmark harness
+# ============================================================================
+
+
+class Scenario:
+    """A single request replayed by the benchmark runners."""
+
+    def __init__(self, name, path, method='GET', data=None, description=''):
+        self.name = name
+        self.path = path
+        self.method = method
+        self.data = data
+        self.description = description
+
+    def __repr__(self):
+        return f'<Scenario {self.name}: {self.method} {self.path}>'
+
+
+SCENARIOS = {}
+
+
+def register(scenario):
+    SCENARIOS[scenario.name] = scenario
+    return scenario
+
+
+register(Scenario(
+    'equipment_list', '/api/equipment/',
+    description='First page of the equipment API with nested history',
+))
+register(Scenario(
+    'equipment_search', '/api/equipment/?search=Gauge',
+    description='Equipment API full-text style search',
+))
+register(Scenario(
+    'dashboard_summary', '/api/equipment/dashboard_summary/',
+    description='Dashboard counters served to the JavaScript frontend',
+))
+register(Scenario(
+    'calibration_list', '/api/calibrations/',
+    description='First page of calibration history',
+))
+register(Scenario(
+    'maintenance_list', '/api/maintenance/',
+    description='First page of maintenance history',
+))
+register(Scenario(
+    'frontend_dashboard', '/',
+    description='Server-rendered dashboard page (frontend.views.dashboard)',
+))
+register(Scenario(
+    'async_dashboard_summary', '/api/dashboard/summary/',
+    description='Async dashboard counters with concurrent queries',
+))
+register(Scenario(
+    'async_activity', '/api/dashboard/activity/',
+    description='Async recent activity feed',
+))
+register(Scenario(
+    'async_calendar', '/api/calendar/events/',
+    description='Async calendar feed for the current month',
+))
@@ -0,0 +1,4 @@
+# ============================================================================
+# File Path: backend/calibrify/db/__init__.py
+# Description: Package initialization for database infrastructure
+# ============================================================================
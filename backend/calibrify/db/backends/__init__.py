@@ -0,0 +1,4 @@
+# ============================================================================
+# File Path: backend/calibrify/db/backends/__init__.py
+# Description: Package initialization for custom database backends
+# ============================================================================
@@ -0,0 +1,4 @@
+# ============================================================================
+# File Path: backend/calibrify/db/backends/postgresql_pool/__init__.py
+# Description: PostgreSQL backend that checks connections out of a pool
+# ============================================================================
@@ -0,0 +1,105 @@
+# ============================================================================
+# File Path: backend/calibrify/db/backends/postgresql_pool/base.py
+# Description: PostgreSQL (psycopg2) backend that checks connections out of
+#              a per-process pool instead of opening one per request
+# ============================================================================
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.extras
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from calibrify.db.pool import ConnectionPool, get_pool
+
+POOL_DEFAULTS = {
+    'MIN_SIZE': 1,
+    'MAX_SIZE': 10,
+    'TIMEOUT': 10.0,
+    'MAX_IDLE': 300.0,
+    'CHECK_AFTER': 30.0,
+}
+
+
+def _reset(connection):
+    """Roll back leftovers before a connection goes back to the pool."""
+    if connection.closed:
+        return False
+    status = connection.info.transaction_status
+    if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+    if status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+        try:
+            connection.rollback()
+        except psycopg2.Error:
+            return False
+    return True
+
+
+def _is_usable(connection):
+    """Probe ``connection``, leaving it idle rather than in a transaction."""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        if not connection.autocommit:
+            connection.rollback()
+    except psycopg2.Error:
+        return False
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Drop-in replacement for ``django.db.backends.postgresql``.
+
+    Pool sizing comes from the ``POOL`` key of the database settings
+    (``MIN_SIZE``, ``MAX_SIZE``, ``TIMEOUT``, ``MAX_IDLE``, ``CHECK_AFTER``).
+    Use it with ``CONN_MAX_AGE = 0``: Django then "closes" the connection at
+    the end of every request, which hands it back to the pool.
+    """
+
+    def _pool(self, conn_params):
+        options = {**POOL_DEFAULTS, **self.settings_dict.get('POOL', {})}
+
+        def factory():
+            return ConnectionPool(
+                connect=lambda: self.Database.connect(**conn_params),
+                reset=_reset,
+                is_usable=_is_usable,
+                min_size=int(options['MIN_SIZE']),
+                max_size=int(options['MAX_SIZE']),
+                timeout=float(options['TIMEOUT']),
+                max_idle=float(options['MAX_IDLE']),
+                check_after=float(options['CHECK_AFTER']),
+            )
+
+        # Connections to the maintenance database during test setup use
+        # different parameters, so they get a pool of their own.
+        key = self.alias
+        if conn_params.get('dbname') != self.settings_dict['NAME']:
+            key = '%s:%s' % (self.alias, conn_params.get('dbname'))
+        return get_pool(key, factory)
+
+    def get_new_connection(self, conn_params):
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        self.isolation_level = (
+            IsolationLevel(isolation_level)
+            if isolation_level is not None
+            else IsolationLevel.READ_COMMITTED
+        )
+        pool = self._pool(conn_params)
+        with self.wrap_database_errors:
+            connection = pool.getconn()
+        self._connection_pool = pool
+        if isolation_level is not None:
+            connection.isolation_level = self.isolation_level
+        psycopg2.extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        with self.wrap_database_errors:
+            self._connection_pool.putconn(self.connection)
@@ -0,0 +1,112 @@
+# ============================================================================
+# File Path: backend/calibrify/db/compression.py
+# Description: Text field stored zlib-compressed with a preset dictionary
+# ============================================================================
+
+import base64
+import zlib
+
+from django.conf import settings
+from django.db import models
+
+# Starts every compressed value, followed by the dictionary id and ':'.
+# Plain values that happen to start with it are always compressed, so a
+# stored value is compressed exactly when it starts with the marker.
+MARKER = '\x1bz'
+
+# Preset dictionaries by id. zlib looks back into the dictionary for
+# matches, so even a short value compresses when it reads like the text
+# below; the most common strings come last. Ids are stored with each
+# value: never change a dictionary in place, add one under a new id and
+# point COMPRESSED_TEXT_DICTIONARY at it.
+DICTIONARIES = {
+    '1': (
+        'Calibration certificate Certificate No. Serial Number Model Number '
+        'Manufacturer Asset Tag Location Procedure Calibration Date Due Date '
+        'Technician Reviewed by Reference standard Traceable to NIST UKAS '
+        'Ambient temperature Relative humidity Barometric pressure '
+        'Instrument range Resolution Accuracy Span Zero Full scale '
+        'Test point Nominal Applied Indicated Reading Measured Deviation '
+        'Error % of span % of reading Tolerance Limit Uncertainty (k=2) '
+        'Result Within tolerance Out of tolerance Adjusted Not adjusted '
+        'Limited calibration Remarks Comments Replaced Cleaned Inspected '
+        'Leak test Seal Gasket Battery Firmware Visual inspection OK '
+        'Returned to service Preventive maintenance Corrective maintenance '
+        'mA V DC V AC mV Ohm kOhm Hz kHz psi psig bar mbar kPa MPa inH2O '
+        'degC degF °C °F K g kg mg N Nm lbf %RH pH uS/cm ppm '
+        'rpm m/s L/min m3/h '
+        '0.000 0.00 0.0 0% 25% 50% 75% 100% 0.01 0.02 0.05 0.1 0.2 0.5 '
+        'As Found As Left As Found As Left PASS FAIL Pass Fail PASS PASS '
+    ).encode(),
+}
+
+# Raw deflate: no zlib header or checksum, the dictionary id says enough
+WBITS = -15
+
+
+def _dictionary(dictionary_id):
+    try:
+        return DICTIONARIES[dictionary_id]
+    except KeyError:
+        raise ValueError('Unknown compression dictionary %r.' % dictionary_id)
+
+
+def compress(value, dictionary_id=None, min_bytes=None):
+    """
+    The stored form of ``value``: compressed when it is at least
+    ``COMPRESSED_TEXT_MIN_BYTES`` long and compression saves space,
+    otherwise unchanged.
+    """
+    if not isinstance(value, str):
+        return value
+    min_bytes = settings.COMPRESSED_TEXT_MIN_BYTES if min_bytes is None else min_bytes
+    data = value.encode()
+    must = value.startswith(MARKER)
+    if len(data) < min_bytes and not must:
+        return value
+    dictionary_id = dictionary_id or settings.COMPRESSED_TEXT_DICTIONARY
+    compressor = zlib.compressobj(9, zlib.DEFLATED, WBITS, zdict=_dictionary(dictionary_id))
+    packed = compressor.compress(data) + compressor.flush()
+    stored = '%s%s:%s' % (MARKER, dictionary_id, base64.b85encode(packed).decode('ascii'))
+    return stored if must or len(stored) < len(data) else value
+
+
+def decompress(value):
+    """The text of a stored value, compressed or not."""
+    if not isinstance(value, str) or not value.startswith(MARKER):
+        return value
+    dictionary_id, _, packed = value[len(MARKER):].partition(':')
+    decompressor = zlib.decompressobj(WBITS, zdict=_dictionary(dictionary_id))
+    data = decompressor.decompress(base64.b85decode(packed)) + decompressor.flush()
+    return data.decode()
+
+
+def is_compressed(value):
+    return isinstance(value, str) and value.startswith(MARKER)
+
+
+class CompressedTextField(models.TextField):
+    """
+    A ``TextField`` whose long values are stored compressed, in the same
+    ``text`` column: values read back as the text that was saved, and rows
+    written before the field are read as they are. Lookups compare with
+    the stored form, so substring searches only see values short enough
+    to be kept as plain text.
+    """
+
+    def from_db_value(self, value, expression, connection):
+        return decompress(value)
+
+    def to_python(self, value):
+        return decompress(super().to_python(value))
+
+    def get_db_prep_save(self, value, connection):
+        return compress(super().get_db_prep_save(value, connection))
+
+
+def compressed_fields(model):
+    """Names of ``model``'s compressed text fields."""
+    return [
+        field.name for field in model._meta.concrete_fields
+        if isinstance(field, CompressedTextField)
+    ]
@@ -0,0 +1,52 @@
+# ============================================================================
+# File Path: backend/calibrify/db/concurrency.py
+# Description: Run independent ORM queries concurrently from async views
+# ============================================================================
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+
+def _concurrent():
+    configured = getattr(settings, 'ASYNC_QUERY_CONCURRENCY', None)
+    if configured is not None:
+        return configured
+    # SQLite serializes access anyway, and the in-memory test database is
+    # not visible to the extra connections.
+    return connection.vendor != 'sqlite'
+
+
+def _on_own_connection(query):
+    def run():
+        close_old_connections()
+        try:
+            return query()
+        finally:
+            # Honours CONN_MAX_AGE; with the pooled backend this hands the
+            # connection straight back to the pool.
+            close_old_connections()
+    return run
+
+
+async def run_queries(*queries):
+    """
+    Evaluate zero-argument query callables and return their results in order.
+
+    Django's async ORM methods (``acount()`` and friends) all execute on the
+    single thread-sensitive executor, so awaiting several of them with
+    ``asyncio.gather`` still runs them one after another. Here each query
+    runs on a worker thread with its own database connection, so the
+    database works on them in parallel. Falls back to the thread-sensitive
+    executor on SQLite or when ``ASYNC_QUERY_CONCURRENCY`` is False.
+    """
+    if not _concurrent():
+        return await asyncio.gather(*(
+            sync_to_async(query, thread_sensitive=True)() for query in queries
+        ))
+    return await asyncio.gather(*(
+        sync_to_async(_on_own_connection(query), thread_sensitive=False)()
+        for query in queries
+    ))
@@ -0,0 +1,71 @@
+# ============================================================================
+# File Path: backend/calibrify/db/pagination.py
+# Description: Paginator that reads large row counts from planner statistics
+# ============================================================================
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+
+def estimate_count(queryset):
+    """
+    Row count of ``queryset`` as PostgreSQL's planner estimates it, or
+    ``None`` where no estimate is available.
+
+    An unfiltered table is read from ``pg_class.reltuples`` (kept up to date
+    by autovacuum/ANALYZE), summed over the partitions of a partitioned
+    table, whose own entry holds no rows; a filtered query from the row
+    estimate of its ``EXPLAIN`` plan. Neither touches the table itself.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    query = queryset.order_by().query
+    try:
+        with connection.cursor() as cursor:
+            if not query.where and not query.distinct and not query.combinator:
+                # Partitions never analyzed (-1), such as ones created
+                # ahead for coming years, count as empty
+                cursor.execute(
+                    """
+                    SELECT coalesce((
+                        SELECT sum(greatest(c.reltuples, 0))
+                        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+                        WHERE i.inhparent = p.oid AND p.relkind = 'p'
+                        HAVING max(c.reltuples) >= 0
+                    ), p.reltuples)
+                    FROM pg_class p WHERE p.oid = %s::regclass
+                    """,
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+                estimate = row[0] if row else -1
+            else:
+                sql, params = query.get_compiler(queryset.db).as_sql()
+                cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+                plan = cursor.fetchone()[0]
+                estimate = plan[0]['Plan']['Plan Rows']
+    except DatabaseError:
+        return None
+    # reltuples is -1 for a table never vacuumed or analyzed
+    return int(estimate) if estimate >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    ``Paginator`` whose ``count`` is the planner's estimate once that is at
+    least ``ESTIMATED_COUNT_THRESHOLD`` rows.
+
+    An exact ``COUNT(*)`` reads every matching row; on tables with millions
+    of history rows that dominates the page. Below the threshold, or on
+    databases without statistics, the exact count is used as before.
+    """
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is None or estimate < settings.ESTIMATED_COUNT_THRESHOLD:
+            return super().count
+        return estimate
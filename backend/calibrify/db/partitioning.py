@@ -0,0 +1,194 @@
+# ============================================================================
+# File Path: backend/calibrify/db/partitioning.py
+# Description: Yearly range partitioning of PostgreSQL history tables
+# ============================================================================
+
+import re
+from datetime import datetime, timezone
+
+ARCHIVED = 'archived'
+
+
+def supported(connection):
+    return connection.vendor == 'postgresql'
+
+
+def year_bounds(year):
+    """The ``[start, end)`` range of timestamps stored in ``year``'s partition."""
+    return (
+        datetime(year, 1, 1, tzinfo=timezone.utc),
+        datetime(year + 1, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+def partition_name(table, year):
+    return f'{table}_{year}'
+
+
+def is_partitioned(connection, table):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)', [table])
+        row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def partitions(connection, table):
+    """``{year: archived}`` for the yearly partitions of ``table``."""
+    pattern = re.compile(r'^%s_(\d{4})$' % re.escape(table))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname, obj_description(c.oid, 'pg_class')
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass
+            """,
+            [table],
+        )
+        rows = cursor.fetchall()
+    found = {}
+    for name, comment in rows:
+        match = pattern.match(name)
+        if match:
+            found[int(match.group(1))] = comment == ARCHIVED
+    return found
+
+
+def ensure_partitions(connection, table, column, years):
+    """
+    Create the partitions missing for ``years``.
+
+    Rows that landed in the default partition because their year had no
+    partition yet (a mistyped date, say) are moved into the new one;
+    PostgreSQL refuses to attach it while the default still holds them.
+    Returns the years created.
+    """
+    qn = connection.ops.quote_name
+    existing = partitions(connection, table)
+    created = []
+    with connection.cursor() as cursor:
+        for year in sorted(set(years)):
+            if year in existing:
+                continue
+            start, end = year_bounds(year)
+            name = qn(partition_name(table, year))
+            cursor.execute(
+                f'CREATE TABLE {name} (LIKE {qn(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+            )
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM {qn(table + "_default")} '
+                f'WHERE {qn(column)} >= %s AND {qn(column)} < %s RETURNING *) '
+                f'INSERT INTO {name} SELECT * FROM moved',
+                [start, end],
+            )
+            cursor.execute(
+                f'ALTER TABLE {qn(table)} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)',
+                [start, end],
+            )
+            created.append(year)
+    return created
+
+
+def partition_by_year(connection, table, column, years):
+    """
+    Rebuild ``table`` as a table range-partitioned by the year of
+    ``column``, keeping its rows, id sequence, indexes and foreign keys
+    under their existing names.
+
+    The primary key becomes ``(id, column)``, since PostgreSQL requires the
+    partition key in every unique constraint; ids still come from a single
+    sequence and stay unique. Partitions are created for ``years`` and for
+    every year that has rows. Must run in a transaction.
+    """
+    qn = connection.ops.quote_name
+    legacy = f'{table}_unpartitioned'
+    with connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}')
+        cursor.execute(
+            """
+            SELECT i.relname, pg_get_indexdef(i.oid)
+            FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid
+            WHERE x.indrelid = %s::regclass AND NOT x.indisprimary
+            """,
+            [legacy],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            """
+            SELECT conname, contype, pg_get_constraintdef(oid)
+            FROM pg_constraint
+            WHERE conrelid = %s::regclass AND contype IN ('p', 'f')
+            """,
+            [legacy],
+        )
+        constraints = cursor.fetchall()
+        # Free the names for the new table
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX {qn(name)}')
+        for name, _, _ in constraints:
+            cursor.execute(f'ALTER TABLE {qn(legacy)} DROP CONSTRAINT {qn(name)}')
+
+        cursor.execute(
+            f'CREATE TABLE {qn(table)} (LIKE {qn(legacy)} INCLUDING DEFAULTS '
+            f'INCLUDING IDENTITY INCLUDING CONSTRAINTS INCLUDING STORAGE) '
+            f'PARTITION BY RANGE ({qn(column)})'
+        )
+        for name, kind, _ in constraints:
+            if kind == 'p':
+                cursor.execute(
+                    f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} '
+                    f'PRIMARY KEY (id, {qn(column)})'
+                )
+        cursor.execute(f'CREATE TABLE {qn(table + "_default")} PARTITION OF {qn(table)} DEFAULT')
+
+        cursor.execute(
+            f'SELECT DISTINCT EXTRACT(YEAR FROM {qn(column)} AT TIME ZONE %s) FROM {qn(legacy)}',
+            ['UTC'],
+        )
+        years = {int(year) for (year,) in cursor.fetchall()} | set(years)
+        ensure_partitions(connection, table, column, years)
+        cursor.execute(f'INSERT INTO {qn(table)} SELECT * FROM {qn(legacy)}')
+
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+        sequence = cursor.fetchone()[0]
+        if sequence:
+            # An identity column: the copy has its own sequence, restarted here
+            cursor.execute(
+                f'SELECT setval(%s, COALESCE(MAX(id), 0) + 1, false) FROM {qn(table)}',
+                [sequence],
+            )
+        else:
+            # A serial column: keep the old sequence alive past the DROP below
+            cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [legacy])
+            cursor.execute(f'ALTER SEQUENCE {cursor.fetchone()[0]} OWNED BY {qn(table)}.id')
+
+        # Built after the copy, which is much faster than maintaining them
+        for name, definition in indexes:
+            cursor.execute(re.sub(r' ON \S+ USING ', f' ON {qn(table)} USING ', definition, 1))
+        for name, kind, definition in constraints:
+            if kind == 'f':
+                cursor.execute(
+                    f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} {definition}'
+                )
+        cursor.execute(f'DROP TABLE {qn(legacy)}')
+
+
+def archive_partition(connection, table, year, tablespace=None):
+    """
+    Mark ``year``'s partition as cold: optionally move it (and its indexes)
+    to ``tablespace``, then freeze it so vacuum never has to rewrite it.
+    It stays attached, so its rows are still readable.
+    """
+    qn = connection.ops.quote_name
+    name = partition_name(table, year)
+    with connection.cursor() as cursor:
+        if tablespace:
+            cursor.execute(f'ALTER TABLE {qn(name)} SET TABLESPACE {qn(tablespace)}')
+            cursor.execute(
+                'SELECT indexrelid::regclass::text FROM pg_index WHERE indrelid = %s::regclass',
+                [name],
+            )
+            for (index,) in cursor.fetchall():
+                cursor.execute(f'ALTER INDEX {index} SET TABLESPACE {qn(tablespace)}')
+        cursor.execute(f'COMMENT ON TABLE {qn(name)} IS %s', [ARCHIVED])
+        if connection.get_autocommit():
+            cursor.execute(f'VACUUM (FREEZE, ANALYZE) {qn(name)}')
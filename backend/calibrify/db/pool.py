@@ -0,0 +1,222 @@
+# ============================================================================
+# File Path: backend/calibrify/db/pool.py
+# Description: Thread-safe database connection pool with usage statistics
+# ============================================================================
+
+import threading
+import time
+from collections import deque
+
+from django.db.utils import OperationalError
+
+from calibrify.metrics.registry import REGISTRY
+
+
+class PoolTimeout(OperationalError):
+    """No connection became available within the pool timeout."""
+
+
+class ConnectionPool:
+    """
+    Bounded pool of DB-API connections shared by the threads of a process.
+
+    ``connect`` opens a new connection, ``reset`` returns a connection to a
+    clean state (returning False if it must be discarded) and ``is_usable``
+    is run on connections that sat idle longer than ``check_after`` seconds.
+    Idle connections above ``min_size`` are closed after ``max_idle`` seconds.
+    """
+
+    def __init__(self, connect, reset, is_usable, min_size=1, max_size=10,
+                 timeout=10.0, max_idle=300.0, check_after=30.0):
+        self._connect = connect
+        self._reset = reset
+        self._is_usable = is_usable
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.check_after = check_after
+        self._idle = deque()  # (connection, returned_at); newest on the right
+        self._size = 0
+        self._cond = threading.Condition()
+        self.closed = False
+        self.stats_checkouts = 0
+        self.stats_waits = 0
+        self.stats_timeouts = 0
+        self.stats_connects = 0
+        self.stats_discarded = 0
+        self.stats_wait_seconds = 0.0
+
+    def getconn(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+        while True:
+            connection, returned_at = None, None
+            with self._cond:
+                while True:
+                    if self.closed:
+                        raise OperationalError('connection pool is closed')
+                    if self._idle:
+                        # LIFO: reuse the warmest connection
+                        connection, returned_at = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats_timeouts += 1
+                        raise PoolTimeout(
+                            'no database connection available after %.1fs '
+                            '(pool max size %d)' % (self.timeout, self.max_size)
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+
+            if connection is None:
+                try:
+                    connection = self._connect()
+                except Exception:
+                    self._release_slot()
+                    raise
+                with self._cond:
+                    self.stats_connects += 1
+            elif (time.monotonic() - returned_at > self.check_after
+                    and not self._is_usable(connection)):
+                self._discard(connection)
+                continue
+
+            with self._cond:
+                self.stats_checkouts += 1
+                if waited:
+                    self.stats_waits += 1
+                    self.stats_wait_seconds += time.monotonic() - started
+            return connection
+
+    def putconn(self, connection, discard=False):
+        if discard or self.closed or not self._reset(connection):
+            self._discard(connection)
+            return
+        now = time.monotonic()
+        expired = []
+        with self._cond:
+            self._idle.append((connection, now))
+            # Trim connections that have been idle too long, oldest first
+            while (self._size - len(expired) > self.min_size and self._idle
+                    and now - self._idle[0][1] > self.max_idle):
+                expired.append(self._idle.popleft()[0])
+            self._size -= len(expired)
+            self.stats_discarded += len(expired)
+            self._cond.notify()
+        for stale in expired:
+            _quiet_close(stale)
+
+    def _discard(self, connection):
+        _quiet_close(connection)
+        with self._cond:
+            self.stats_discarded += 1
+        self._release_slot()
+
+    def _release_slot(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            self.closed = True
+            idle = [connection for connection, _ in self._idle]
+            self._size -= len(idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for connection in idle:
+            _quiet_close(connection)
+
+    def stats(self):
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                'size': self._size,
+                'idle': idle,
+                'in_use': self._size - idle,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'checkouts': self.stats_checkouts,
+                'waits': self.stats_waits,
+                'wait_seconds': round(self.stats_wait_seconds, 4),
+                'timeouts': self.stats_timeouts,
+                'connects': self.stats_connects,
+                'discarded': self.stats_discarded,
+            }
+
+
+def _quiet_close(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+# One pool per database alias and process
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, factory):
+    """Return the pool for ``alias``, creating it with ``factory()`` once."""
+    pool = _pools.get(alias)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(alias)
+            if pool is None:
+                pool = _pools[alias] = factory()
+    return pool
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.closeall()
+
+
+def pool_stats():
+    """Statistics for every pool in this process, keyed by alias."""
+    return {alias: pool.stats() for alias, pool in list(_pools.items())}
+
+
+POOL_CONNECTIONS = REGISTRY.gauge(
+    'calibrify_db_pool_connections',
+    'Pooled database connections by state.',
+    ('alias', 'state'),
+)
+POOL_MAX = REGISTRY.gauge(
+    'calibrify_db_pool_max_connections',
+    'Configured maximum pool size.',
+    ('alias',),
+)
+POOL_EVENTS = REGISTRY.gauge(
+    'calibrify_db_pool_events',
+    'Cumulative pool events (checkouts, waits, timeouts, connects, discards).',
+    ('alias', 'event'),
+)
+POOL_WAIT = REGISTRY.gauge(
+    'calibrify_db_pool_wait_seconds',
+    'Cumulative time spent waiting for a pooled connection.',
+    ('alias',),
+)
+
+
+def collect_pool_metrics():
+    for alias, stats in pool_stats().items():
+        POOL_CONNECTIONS.set(stats['idle'], alias=alias, state='idle')
+        POOL_CONNECTIONS.set(stats['in_use'], alias=alias, state='in_use')
+        POOL_MAX.set(stats['max_size'], alias=alias)
+        for event in ('checkouts', 'waits', 'timeouts', 'connects', 'discarded'):
+            POOL_EVENTS.set(stats[event], alias=alias, event=event)
+        POOL_WAIT.set(stats['wait_seconds'], alias=alias)
+
+
+REGISTRY.add_collector(collect_pool_metrics)
@@ -0,0 +1,66 @@
+# ============================================================================
+# File Path: backend/calibrify/db/routers.py
+# Description: Database router sending safe reads to a read replica
+# ============================================================================
+
+from contextvars import ContextVar
+
+from django.conf import settings
+
+REPLICA_ALIAS = 'replica'
+
+_routing = ContextVar('calibrify_replica_routing', default=None)
+
+
+class ReplicaRouting:
+    """Per-request routing decision, filled in by ``ReplicaRoutingMiddleware``."""
+
+    __slots__ = ('use_replica',)
+
+    def __init__(self):
+        self.use_replica = False
+
+
+def activate(routing):
+    return _routing.set(routing)
+
+
+def deactivate(token):
+    _routing.reset(token)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+class ReplicaRouter:
+    """
+    Route reads to the ``replica`` database while the current request has
+    been marked as a safe read; everything else, including all writes,
+    goes to ``default``.
+
+    Outside a request (management commands, Celery-style jobs, the shell)
+    nothing is routed to the replica.
+    """
+
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None and routing.use_replica and replica_configured():
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        databases = {'default', REPLICA_ALIAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # The replica follows the primary's schema through replication
+        if db == REPLICA_ALIAS:
+            return False
+        return None
@@ -0,0 +1,329 @@
+# ============================================================================
+# File Path: backend/calibrify/db/tests.py
+# Description: Tests for the connection pool, routing, pagination and partitions
+# ============================================================================
+
+import random
+import threading
+import time
+import unittest
+from datetime import date, datetime, timezone as dt_timezone
+
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import compression, pagination, partitioning, routers
+from .pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.usable = True
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**options):
+    created = []
+
+    def connect():
+        connection = FakeConnection()
+        created.append(connection)
+        return connection
+
+    pool = ConnectionPool(
+        connect=connect,
+        reset=lambda connection: not connection.closed,
+        is_usable=lambda connection: connection.usable,
+        **options
+    )
+    return pool, created
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def test_connections_are_reused(self):
+        pool, created = make_pool(max_size=2)
+        for _ in range(5):
+            pool.putconn(pool.getconn())
+        self.assertEqual(len(created), 1)
+        stats = pool.stats()
+        self.assertEqual((stats['checkouts'], stats['connects']), (5, 1))
+        self.assertEqual((stats['idle'], stats['in_use']), (1, 0))
+
+    def test_exhausted_pool_times_out(self):
+        pool, _ = make_pool(max_size=1, timeout=0.05)
+        pool.getconn()
+        with self.assertRaises(PoolTimeout):
+            pool.getconn()
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+    def test_waiter_gets_returned_connection(self):
+        pool, created = make_pool(max_size=1, timeout=2)
+        held = pool.getconn()
+        threading.Timer(0.05, pool.putconn, args=(held,)).start()
+        self.assertIs(pool.getconn(), held)
+        self.assertEqual(len(created), 1)
+        self.assertEqual(pool.stats()['waits'], 1)
+
+    def test_broken_connections_are_discarded(self):
+        pool, created = make_pool(max_size=2, check_after=0)
+        connection = pool.getconn()
+        pool.putconn(connection)
+        connection.usable = False
+        time.sleep(0.001)
+        replacement = pool.getconn()
+        self.assertIsNot(replacement, connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_idle_connections_above_minimum_expire(self):
+        pool, _ = make_pool(min_size=1, max_size=3, max_idle=0)
+        first, second = pool.getconn(), pool.getconn()
+        pool.putconn(first)
+        time.sleep(0.001)
+        pool.putconn(second)
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.stats()['size'], 1)
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(routers, 'replica_configured', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.router = routers.ReplicaRouter()
+
+    def test_reads_follow_request_flag(self):
+        self.assertIsNone(self.router.db_for_read(User))
+        routing = routers.ReplicaRouting()
+        token = routers.activate(routing)
+        try:
+            self.assertIsNone(self.router.db_for_read(User))
+            routing.use_replica = True
+            self.assertEqual(self.router.db_for_read(User), routers.REPLICA_ALIAS)
+            self.assertEqual(self.router.db_for_write(User), 'default')
+        finally:
+            routers.deactivate(token)
+        self.assertIsNone(self.router.db_for_read(User))
+
+    def test_unconfigured_replica_is_ignored(self):
+        routing = routers.ReplicaRouting()
+        routing.use_replica = True
+        token = routers.activate(routing)
+        try:
+            with mock.patch.object(routers, 'replica_configured', return_value=False):
+                self.assertIsNone(self.router.db_for_read(User))
+        finally:
+            routers.deactivate(token)
+
+    def test_only_the_primary_is_migrated(self):
+        self.assertFalse(self.router.allow_migrate(routers.REPLICA_ALIAS, 'equipment'))
+        self.assertIsNone(self.router.allow_migrate('default', 'equipment'))
+
+
+@override_settings(REPLICA_READ_ROUTES=['equipment:equipment-list'])
+class ReplicaRoutingMiddlewareTests(TransactionTestCase):
+    # The test settings' replica mirrors the test database; it is another
+    # connection, so it only sees committed rows
+    databases = {'default', routers.REPLICA_ALIAS}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('replica-tech', password='secret')
+        self.client.force_login(self.user)
+
+    def get_equipment(self, **headers):
+        """The list response and the equipment queries on each connection."""
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[routers.REPLICA_ALIAS]) as replica:
+            response = self.client.get(reverse('equipment:equipment-list'), **headers)
+        self.assertEqual(response.status_code, 200)
+        return response, *(
+            [query['sql'] for query in queries if 'equipment_equipment' in query['sql']]
+            for queries in (primary, replica)
+        )
+
+    def test_safe_reads_on_listed_routes_use_replica(self):
+        response, primary, replica = self.get_equipment()
+        self.assertTrue(response.wsgi_request.replica_routing.use_replica)
+        self.assertNotIn('replica_pin', response.cookies)
+        self.assertEqual(primary, [])
+        self.assertTrue(replica)
+
+    def test_unlisted_routes_use_primary(self):
+        response = self.client.get(reverse('health:liveness'))
+        self.assertFalse(response.wsgi_request.replica_routing.use_replica)
+
+    def create_equipment(self, serial_number, **headers):
+        return self.client.post(
+            reverse('equipment:equipment-list'),
+            {
+                'name': 'Pinned meter',
+                'serial_number': serial_number,
+                'manufacturer': 'Fluke',
+                'model_number': '87V',
+                'location': 'Lab',
+                'category': 'Multimeter',
+                'purchase_date': '2024-01-01',
+                'calibration_interval_type': 'months',
+                'calibration_interval_value': 12,
+            },
+            **headers,
+        )
+
+    def test_write_pins_client_to_primary(self):
+        response = self.create_equipment('SN-PIN-1')
+        self.assertLess(response.status_code, 400, response.content)
+        self.assertIn('replica_pin', response.cookies)
+        self.assertEqual(response.json()['created_by']['username'], 'replica-tech')
+
+        response, primary, replica = self.get_equipment()
+        self.assertFalse(response.wsgi_request.replica_routing.use_replica)
+        self.assertEqual(replica, [])
+        self.assertTrue(primary)
+
+    def test_write_pins_token_client_without_cookies(self):
+        from accounts.models import ApiToken
+
+        _, key = ApiToken.issue(self.user, 'lab-bridge')
+        headers = {'HTTP_AUTHORIZATION': f'Token {key}'}
+        self.client.logout()
+        response = self.create_equipment('SN-PIN-2', **headers)
+        self.assertLess(response.status_code, 400, response.content)
+        self.client.cookies.pop('replica_pin')
+
+        response, primary, replica = self.get_equipment(**headers)
+        self.assertFalse(response.wsgi_request.replica_routing.use_replica)
+        self.assertEqual(replica, [])
+        # Other clients still read from the replica
+        _, other = ApiToken.issue(self.user, 'dashboard')
+        response, _, replica = self.get_equipment(HTTP_AUTHORIZATION=f'Token {other}')
+        self.assertTrue(replica)
+
+    def test_failed_write_does_not_pin(self):
+        response = self.client.post(reverse('equipment:equipment-list'), {})
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn('replica_pin', response.cookies)
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create(User(username=f'user-{n}') for n in range(5))
+
+    def test_no_estimate_on_sqlite(self):
+        self.assertIsNone(pagination.estimate_count(User.objects.all()))
+        paginator = pagination.EstimatedCountPaginator(User.objects.order_by('id'), 2)
+        self.assertEqual((paginator.count, paginator.num_pages), (5, 3))
+
+    @override_settings(ESTIMATED_COUNT_THRESHOLD=1000)
+    def test_large_estimates_replace_the_count(self):
+        queryset = User.objects.order_by('id')
+        with mock.patch.object(pagination, 'estimate_count', return_value=250000):
+            with self.assertNumQueries(0):
+                paginator = pagination.EstimatedCountPaginator(queryset, 100)
+                self.assertEqual(paginator.num_pages, 2500)
+        with mock.patch.object(pagination, 'estimate_count', return_value=40):
+            paginator = pagination.EstimatedCountPaginator(queryset, 100)
+            self.assertEqual(paginator.count, 5)
+
+
+# A pasted instrument dump, as stored in calibration results
+DUMP = '\n'.join(
+    f'Test point {point}: Nominal {point * 25}.000 psi  As Found {point * 25 + 0.012:.3f}  '
+    f'As Left {point * 25 + 0.004:.3f}  Error 0.01 % of span  Tolerance 0.25  PASS'
+    for point in range(40)
+)
+
+
+@override_settings(COMPRESSED_TEXT_MIN_BYTES=256, COMPRESSED_TEXT_DICTIONARY='1')
+class CompressionTests(SimpleTestCase):
+    def test_round_trip(self):
+        stored = compression.compress(DUMP)
+        self.assertTrue(compression.is_compressed(stored))
+        self.assertLess(len(stored), len(DUMP) / 4)
+        self.assertEqual(compression.decompress(stored), DUMP)
+        self.assertEqual(compression.decompress(compression.compress('é' * 400)), 'é' * 400)
+
+    def test_short_and_plain_values_are_kept(self):
+        self.assertEqual(compression.compress('PASS'), 'PASS')
+        self.assertEqual(compression.decompress('PASS'), 'PASS')
+        self.assertIsNone(compression.compress(None))
+        # Compressing would not save anything
+        chooser = random.Random(1)
+        noise = ''.join(chr(chooser.randint(33, 126)) for _ in range(300))
+        self.assertEqual(compression.compress(noise), noise)
+
+    def test_values_starting_with_the_marker_are_always_compressed(self):
+        tricky = compression.MARKER + '1:not compressed'
+        stored = compression.compress(tricky)
+        self.assertNotEqual(stored, tricky)
+        self.assertEqual(compression.decompress(stored), tricky)
+
+    def test_dictionary_helps_short_values(self):
+        line = DUMP.splitlines()[3] + '\n' + DUMP.splitlines()[4]
+        with_dictionary = compression.compress(line, min_bytes=0)
+        with mock.patch.dict(compression.DICTIONARIES, {'9': b''}):
+            without = compression.compress(line, dictionary_id='9', min_bytes=0)
+            self.assertEqual(compression.decompress(without), line)
+        self.assertLess(len(with_dictionary), len(without))
+
+    def test_unknown_dictionary(self):
+        with self.assertRaises(ValueError):
+            compression.decompress(compression.MARKER + '7:abc')
+
+
+@unittest.skipUnless(partitioning.supported(connection), 'PostgreSQL only')
+class PartitioningTests(TestCase):
+    table = 'equipment_calibration'
+
+    def test_history_is_partitioned_by_year(self):
+        self.assertTrue(partitioning.is_partitioned(connection, self.table))
+        self.assertIn(timezone.now().year + 1, partitioning.partitions(connection, self.table))
+
+    def test_new_partition_takes_rows_from_default(self):
+        from equipment.models import Calibration, Equipment
+
+        equipment = Equipment.objects.create(
+            name='Gauge', serial_number='PART-1', category='Pressure',
+            purchase_date=date(2020, 1, 1), model_number='M', manufacturer='F',
+            location='Lab', calibration_interval_type='years', calibration_interval_value=1,
+        )
+        calibration = Calibration.objects.create(
+            equipment=equipment, calibration_date=datetime(2099, 5, 1, tzinfo=dt_timezone.utc)
+        )
+        created = partitioning.ensure_partitions(
+            connection, self.table, 'calibration_date', [2099]
+        )
+        self.assertEqual(created, [2099])
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT id FROM equipment_calibration_2099')
+            self.assertEqual(cursor.fetchall(), [(calibration.id,)])
+
+        partitioning.archive_partition(connection, self.table, 2099)
+        self.assertTrue(partitioning.partitions(connection, self.table)[2099])
+
+    def test_row_estimate_sums_the_partitions(self):
+        from equipment.models import Calibration, Equipment
+
+        equipment = Equipment.objects.create(
+            name='Gauge', serial_number='PART-2', category='Pressure',
+            purchase_date=date(2020, 1, 1), model_number='M', manufacturer='F',
+            location='Lab', calibration_interval_type='years', calibration_interval_value=1,
+        )
+        for year in (2021, 2022, 2023):
+            Calibration.objects.create(
+                equipment=equipment, calibration_date=datetime(year, 5, 1, tzinfo=dt_timezone.utc)
+            )
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {self.table}')
+        self.assertEqual(pagination.estimate_count(Calibration.objects.all()), 3)
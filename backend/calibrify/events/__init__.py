@@ -0,0 +1,4 @@
+# ============================================================================
+# File Path: backend/calibrify/events/__init__.py
+# Description: Package initialization for live event streaming
+# ============================================================================
@@ -0,0 +1,203 @@
+# ============================================================================
+# File Path: backend/calibrify/events/broker.py
+# Description: Fan-out of server-sent events to connected clients
+# ============================================================================
+
+import asyncio
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from calibrify.metrics.registry import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBERS = REGISTRY.gauge(
+    'calibrify_live_subscribers',
+    'Event streams currently connected to this process',
+)
+PUBLISHED = REGISTRY.counter(
+    'calibrify_live_events_total',
+    'Events delivered to this process for fan-out, by event name',
+    ('event',),
+)
+DROPPED = REGISTRY.counter(
+    'calibrify_live_dropped_subscribers_total',
+    'Streams closed because the client fell too far behind',
+)
+
+
+def encode(event, data):
+    """
+    One SSE frame. Events are encoded once when published, so fanning out
+    to many streams only copies bytes.
+    """
+    payload = json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return ('event: %s\ndata: %s\n\n' % (event, payload)).encode()
+
+
+class Subscription:
+    """
+    A connected stream: a bounded queue read from one event loop.
+
+    A subscriber that falls ``maxsize`` frames behind is closed rather than
+    buffered without limit; the browser reconnects and starts over from a
+    fresh snapshot.
+    """
+
+    def __init__(self, loop, maxsize):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        self.closed = False
+
+    def deliver(self, message):
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.closed = True
+            DROPPED.inc()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self, timeout):
+        """The next frame, ``b''`` after ``timeout`` seconds, or ``None`` once closed."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return b''
+
+
+class InProcessBroker:
+    """
+    Deliver published frames to the streams served by this process.
+
+    ``publish`` may be called from any thread (signal handlers run in the
+    request's worker thread); delivery is scheduled once per event loop,
+    not once per subscriber.
+    """
+
+    def __init__(self, maxsize=100):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    @property
+    def active(self):
+        """Whether anything would receive a publish."""
+        return bool(self._subscribers)
+
+    def subscribe(self):
+        subscription = Subscription(asyncio.get_running_loop(), self.maxsize)
+        with self._lock:
+            self._subscribers.add(subscription)
+        SUBSCRIBERS.inc()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription not in self._subscribers:
+                return
+            self._subscribers.discard(subscription)
+        subscription.closed = True
+        SUBSCRIBERS.dec()
+
+    def publish(self, event, data):
+        self.fan_out(encode(event, data), event)
+
+    def fan_out(self, message, event):
+        PUBLISHED.inc(event=event)
+        with self._lock:
+            by_loop = {}
+            for subscription in self._subscribers:
+                by_loop.setdefault(subscription.loop, []).append(subscription)
+        for loop, subscriptions in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_deliver_all, subscriptions, message)
+            except RuntimeError:
+                # The loop has shut down; its streams are gone
+                for subscription in subscriptions:
+                    self.unsubscribe(subscription)
+
+
+def _deliver_all(subscriptions, message):
+    for subscription in subscriptions:
+        subscription.deliver(message)
+
+
+class RedisBroker(InProcessBroker):
+    """
+    Share events between processes through a Redis channel.
+
+    Every process publishes to the channel and runs one listener thread
+    that hands what arrives to its own streams, so writes made by any
+    worker reach screens connected to any other.
+    """
+
+    def __init__(self, url, channel='calibrify:live', maxsize=100):
+        import redis
+
+        super().__init__(maxsize)
+        self.channel = channel
+        self._client = redis.Redis.from_url(url)
+        self._listener = None
+
+    @property
+    def active(self):
+        # Subscribers may be connected to any process
+        return True
+
+    def subscribe(self):
+        self._ensure_listener()
+        return super().subscribe()
+
+    def publish(self, event, data):
+        self._client.publish(self.channel, b'%s\n%s' % (event.encode(), encode(event, data)))
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(
+                    target=self._listen, name='live-events', daemon=True
+                )
+                self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for item in pubsub.listen():
+                    event, message = item['data'].split(b'\n', 1)
+                    self.fan_out(message, event.decode())
+            except Exception:
+                logger.exception('Live event listener lost its Redis connection')
+                time.sleep(1)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """The process-wide broker selected by ``LIVE_EVENTS_BROKER``."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                if settings.LIVE_EVENTS_BROKER == 'redis':
+                    _broker = RedisBroker(settings.LIVE_EVENTS_REDIS_URL)
+                else:
+                    _broker = InProcessBroker()
+    return _broker
+
+
+def reset():
+    global _broker
+    _broker = None
@@ -0,0 +1,36 @@
+# ============================================================================
+# File Path: backend/calibrify/events/tests.py
+# Description: Tests for the live event broker
+# ============================================================================
+
+import asyncio
+import threading
+
+from django.test import SimpleTestCase
+
+from .broker import InProcessBroker, encode
+
+
+class InProcessBrokerTests(SimpleTestCase):
+    async def test_publish_from_thread_reaches_every_stream(self):
+        broker = InProcessBroker()
+        streams = [broker.subscribe() for _ in range(3)]
+        thread = threading.Thread(target=broker.publish, args=('summary', {'total': 3}))
+        thread.start()
+        thread.join()
+        for stream in streams:
+            self.assertEqual(await stream.get(1), encode('summary', {'total': 3}))
+        self.assertEqual(await streams[0].get(0.01), b'')
+
+        for stream in streams:
+            broker.unsubscribe(stream)
+        self.assertFalse(broker.active)
+
+    async def test_slow_stream_is_closed(self):
+        broker = InProcessBroker(maxsize=2)
+        stream = broker.subscribe()
+        for total in range(3):
+            broker.publish('summary', {'total': total})
+        await asyncio.sleep(0.01)
+        self.assertTrue(stream.closed)
+        self.assertIsNone(await stream.get(1))
@@ -0,0 +1,112 @@
+# ============================================================================
+# File Path: backend/calibrify/health/checks.py
+# Description: Dependency checks with timeouts and short-lived result caching
+# ============================================================================
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+UP = 'up'
+SLOW = 'slow'
+DOWN = 'down'
+
+# Checks run off the request thread so a hung dependency cannot hold a
+# worker for longer than the timeout.
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='health')
+_lock = threading.Lock()
+_results = {}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def check_database(alias='default'):
+    """Run a trivial query on ``alias`` from a checker thread."""
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    finally:
+        # The checker thread owns this connection; don't leave it idle
+        connection.close()
+
+
+def check_cache():
+    cache.set('health_check', 'ok', 5)
+    if cache.get('health_check') != 'ok':
+        raise RuntimeError('cache round trip returned unexpected value')
+
+
+CHECKS = {
+    'database': check_database,
+    'cache': check_cache,
+}
+
+
+def run_check(name, func):
+    """
+    Execute one check with a timeout and classify the outcome.
+
+    ``slow`` means the dependency answered but slower than
+    ``HEALTH_CHECK_SLOW_MS``; ``down`` means it failed or timed out.
+    """
+    timeout = _setting('HEALTH_CHECK_TIMEOUT', 2.0)
+    slow_ms = _setting('HEALTH_CHECK_SLOW_MS', 250)
+    started = time.perf_counter()
+    future = _executor.submit(func)
+    try:
+        future.result(timeout=timeout)
+    except TimeoutError:
+        return {
+            'status': DOWN,
+            'error': 'timed out after %.1fs' % timeout,
+            'latency_ms': round(timeout * 1000, 2),
+        }
+    except Exception as exc:
+        return {
+            'status': DOWN,
+            'error': '%s: %s' % (exc.__class__.__name__, exc),
+            'latency_ms': round((time.perf_counter() - started) * 1000, 2),
+        }
+    latency_ms = (time.perf_counter() - started) * 1000
+    return {
+        'status': SLOW if latency_ms > slow_ms else UP,
+        'latency_ms': round(latency_ms, 2),
+    }
+
+
+def dependency_status(force=False):
+    """
+    Return check results, re-running them at most once per
+    ``HEALTH_CHECK_CACHE_SECONDS`` per process.
+    """
+    ttl = _setting('HEALTH_CHECK_CACHE_SECONDS', 5)
+    now = time.monotonic()
+    with _lock:
+        cached = _results.get('checks')
+        if not force and cached and now - cached[0] < ttl:
+            return cached[1], now - cached[0]
+        results = {name: run_check(name, func) for name, func in CHECKS.items()}
+        _results['checks'] = (now, results)
+    return results, 0.0
+
+
+def reset():
+    with _lock:
+        _results.clear()
+
+
+def overall_status(results):
+    statuses = {result['status'] for result in results.values()}
+    if DOWN in statuses:
+        return 'unhealthy'
+    if SLOW in statuses:
+        return 'degraded'
+    return 'healthy'
@@ -0,0 +1,68 @@
+# ============================================================================
+# File Path: backend/calibrify/health/tests.py
+# Description: Tests for liveness, readiness and detailed health probes
+# ============================================================================
+
+import time
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from . import checks
+
+
+class HealthProbeTests(TestCase):
+    def setUp(self):
+        checks.reset()
+
+    def test_liveness_touches_no_dependencies(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/health/live/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 0)
+
+    def test_readiness_caches_results(self):
+        calls = []
+        with mock.patch.dict(checks.CHECKS, {'database': lambda: calls.append(1)}):
+            self.client.get('/health/ready/')
+            response = self.client.get('/health/ready/')
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(response.json()['status'], 'healthy')
+        self.assertEqual(response.json()['database'], 'up')
+
+    def test_legacy_endpoint_reports_readiness(self):
+        response = self.client.get('/health/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['database'], 'up')
+
+    def test_failing_dependency_is_down(self):
+        def broken():
+            raise RuntimeError('connection refused')
+
+        with mock.patch.dict(checks.CHECKS, {'cache': broken}):
+            response = self.client.get('/health/ready/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['cache'], 'down')
+
+    @override_settings(HEALTH_CHECK_SLOW_MS=10, HEALTH_CHECK_TIMEOUT=0.5)
+    def test_slow_and_timed_out_dependencies(self):
+        with mock.patch.dict(checks.CHECKS, {
+            'database': lambda: time.sleep(0.05),
+            'cache': lambda: time.sleep(1),
+        }):
+            response = self.client.get('/health/detail/')
+        body = response.json()
+        self.assertEqual(body['checks']['database']['status'], 'slow')
+        self.assertEqual(body['checks']['cache']['status'], 'down')
+        self.assertIn('timed out', body['checks']['cache']['error'])
+        self.assertEqual(response.status_code, 503)
+
+    @override_settings(HEALTH_WORKER_CAPACITY=4)
+    def test_detail_reports_workers_and_databases(self):
+        body = self.client.get('/health/detail/').json()
+        self.assertEqual(body['databases']['default']['vendor'], connection.vendor)
+        # This request is itself in flight
+        self.assertEqual(body['workers']['in_flight_requests'], 1)
+        self.assertEqual(body['workers']['saturation'], 0.25)
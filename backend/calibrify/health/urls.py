@@ -10,4 +10,7 @@ app_name = 'health'
 
 urlpatterns = [
     path('', views.health_check, name='health_check'),
-] 
\ No newline at end of file
+    path('live/', views.liveness, name='liveness'),
+    path('ready/', views.readiness, name='readiness'),
+    path('detail/', views.detail, name='detail'),
+]
@@ -3,40 +3,98 @@
 # Description: Health check views for Docker container monitoring
 # ============================================================================
 
-from django.http import JsonResponse
+import os
+import time
+
+from django.conf import settings
 from django.db import connections
-from django.db.utils import OperationalError
-from django.core.cache import cache
+from django.http import JsonResponse
+from django.utils.crypto import constant_time_compare
+
+from calibrify.db.pool import pool_stats
+from calibrify.metrics.middleware import IN_FLIGHT
+from . import checks
+
+_started = time.monotonic()
+
 
-def health_check(request):
+def liveness(request):
     """
-    Basic health check that verifies:
-    1. The application is running
-    2. Database connection is working
-    3. Cache connection is working
+    Report that the process can serve requests; touches no dependencies,
+    so a slow database never causes the container to be restarted.
     """
-    # Check database connection
-    db_healthy = True
-    try:
-        connections['default'].cursor()
-    except OperationalError:
-        db_healthy = False
-
-    # Check cache connection
-    cache_healthy = True
-    try:
-        cache.set('health_check', 'ok', 1)
-        cache_value = cache.get('health_check')
-        if cache_value != 'ok':
-            cache_healthy = False
-    except Exception:
-        cache_healthy = False
-
-    status = 200 if (db_healthy and cache_healthy) else 503
-    health_status = {
-        'status': 'healthy' if status == 200 else 'unhealthy',
-        'database': 'up' if db_healthy else 'down',
-        'cache': 'up' if cache_healthy else 'down',
+    return JsonResponse({'status': 'alive'})
+
+
+def readiness(request):
+    """
+    Report whether dependencies are usable. Results are cached for a few
+    seconds so frequent probes don't compete with real traffic.
+
+    Slow dependencies are reported as ``degraded`` but still return 200;
+    only failures and timeouts return 503.
+    """
+    results, age = checks.dependency_status()
+    status = checks.overall_status(results)
+    payload = {
+        'status': status,
+        'checked_seconds_ago': round(age, 1),
     }
+    payload.update({name: result['status'] for name, result in results.items()})
+    return JsonResponse(payload, status=503 if status == 'unhealthy' else 200)
+
+
+def _database_info():
+    info = {}
+    pools = pool_stats()
+    for alias in connections:
+        connection = connections[alias]
+        info[alias] = {
+            'vendor': connection.vendor,
+            'conn_max_age': connection.settings_dict.get('CONN_MAX_AGE'),
+            'conn_health_checks': connection.settings_dict.get('CONN_HEALTH_CHECKS'),
+        }
+        if alias in pools:
+            info[alias]['pool'] = pools[alias]
+    return info
+
+
+def _workers():
+    in_flight = IN_FLIGHT.value()
+    capacity = getattr(settings, 'HEALTH_WORKER_CAPACITY', None)
+    workers = {
+        'pid': os.getpid(),
+        'uptime_seconds': round(time.monotonic() - _started, 1),
+        'in_flight_requests': in_flight,
+    }
+    if capacity:
+        workers['capacity'] = capacity
+        workers['saturation'] = round(in_flight / capacity, 2)
+    return workers
+
+
+def detail(request):
+    """
+    Uncached dependency checks with latencies, database connection
+    settings, pool statistics and worker saturation for operators.
+
+    Protected by ``METRICS_AUTH_TOKEN`` when set.
+    """
+    token = getattr(settings, 'METRICS_AUTH_TOKEN', None)
+    if token:
+        supplied = request.headers.get('Authorization', '')
+        if not constant_time_compare(supplied, 'Bearer %s' % token):
+            return JsonResponse({'detail': 'Unauthorized'}, status=401)
+
+    results, _ = checks.dependency_status(force=True)
+    status = checks.overall_status(results)
+    return JsonResponse({
+        'status': status,
+        'checks': results,
+        'databases': _database_info(),
+        'workers': _workers(),
+    }, status=503 if status == 'unhealthy' else 200)
+
 
-    return JsonResponse(health_status, status=status) 
\ No newline at end of file
+# The original combined probe, kept for existing Docker health checks
+health_check = readiness
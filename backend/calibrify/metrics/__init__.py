@@ -0,0 +1,4 @@
+# ============================================================================
+# File Path: backend/calibrify/metrics/__init__.py
+# Description: Package initialization for performance metrics
+# ============================================================================
@@ -0,0 +1,62 @@
+# ============================================================================
+# File Path: backend/calibrify/metrics/budgets.py
+# Description: Per-endpoint query-count and latency budgets
+# ============================================================================
+
+import logging
+
+from django.conf import settings
+
+from .registry import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+BUDGET_EXCEEDED = REGISTRY.counter(
+    'calibrify_query_budget_exceeded_total',
+    'Requests that went over their route\'s QUERY_BUDGETS entry.',
+    ('route', 'budget'),
+)
+
+# QUERY_BUDGETS key applying to every route without its own entry
+DEFAULT = '*'
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A request went over its budget while ``QUERY_BUDGETS_STRICT`` is on."""
+
+
+def budget_for(route):
+    budgets = getattr(settings, 'QUERY_BUDGETS', None) or {}
+    return budgets.get(route, budgets.get(DEFAULT))
+
+
+def overruns(budget, queries, milliseconds):
+    """``(name, used, allowed)`` for each limit of ``budget`` exceeded."""
+    found = []
+    if budget.get('queries') is not None and queries > budget['queries']:
+        found.append(('queries', queries, budget['queries']))
+    if budget.get('ms') is not None and milliseconds > budget['ms']:
+        found.append(('ms', round(milliseconds, 1), budget['ms']))
+    return found
+
+
+def check(route, queries, seconds):
+    """
+    Compare one request against its route's budget. Overruns are counted
+    and logged; with ``QUERY_BUDGETS_STRICT`` (development and tests) they
+    raise, so an N+1 query fails the test that introduced it.
+    """
+    budget = budget_for(route)
+    if not budget:
+        return
+    found = overruns(budget, queries, seconds * 1000)
+    if not found:
+        return
+    for name, _, _ in found:
+        BUDGET_EXCEEDED.inc(route=route, budget=name)
+    message = '%s over budget: %s' % (
+        route, ', '.join('%s %s > %s' % (name, used, allowed) for name, used, allowed in found)
+    )
+    if getattr(settings, 'QUERY_BUDGETS_STRICT', False):
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
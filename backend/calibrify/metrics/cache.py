@@ -0,0 +1,35 @@
+# ============================================================================
+# File Path: backend/calibrify/metrics/cache.py
+# Description: Cache backends that report hits and misses per request
+# ============================================================================
+
+from django.core.cache.backends import locmem, redis
+
+from .timing import record_cache
+
+_MISSING = object()
+
+
+class InstrumentedCacheMixin:
+    """Count ``get`` hits and misses against the active request."""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version=version)
+        if value is _MISSING:
+            record_cache(misses=1)
+            return default
+        record_cache(hits=1)
+        return value
+
+
+class LocMemCache(InstrumentedCacheMixin, locmem.LocMemCache):
+    pass
+
+
+class RedisCache(InstrumentedCacheMixin, redis.RedisCache):
+    # BaseCache.get_many loops over get(); Redis issues one MGET instead.
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version=version)
+        record_cache(hits=len(found), misses=len(keys) - len(found))
+        return found
@@ -0,0 +1,175 @@
+# ============================================================================
+# File Path: backend/calibrify/metrics/middleware.py
+# Description: Middleware emitting Server-Timing headers and request metrics
+# ============================================================================
+
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+from . import budgets, slow_queries, timing
+from .registry import QUERY_COUNT_BUCKETS, REGISTRY
+
+REQUEST_DURATION = REGISTRY.histogram(
+    'calibrify_request_duration_seconds',
+    'Total time spent handling a request.',
+    ('route', 'method'),
+)
+VIEW_DURATION = REGISTRY.histogram(
+    'calibrify_view_duration_seconds',
+    'Time spent inside the view function.',
+    ('route',),
+)
+SERIALIZE_DURATION = REGISTRY.histogram(
+    'calibrify_serialize_duration_seconds',
+    'Time spent rendering the response body (DRF renderers and templates).',
+    ('route',),
+)
+DB_DURATION = REGISTRY.histogram(
+    'calibrify_db_duration_seconds',
+    'Database time per request.',
+    ('route',),
+)
+DB_QUERIES = REGISTRY.histogram(
+    'calibrify_db_queries_per_request',
+    'Number of database queries per request.',
+    ('route',),
+    buckets=QUERY_COUNT_BUCKETS,
+)
+CACHE_HITS = REGISTRY.counter(
+    'calibrify_cache_hits_total',
+    'Cache hits recorded while handling requests.',
+    ('route',),
+)
+CACHE_MISSES = REGISTRY.counter(
+    'calibrify_cache_misses_total',
+    'Cache misses recorded while handling requests.',
+    ('route',),
+)
+RESPONSES = REGISTRY.counter(
+    'calibrify_responses_total',
+    'Responses by route and status code.',
+    ('route', 'status'),
+)
+IN_FLIGHT = REGISTRY.gauge(
+    'calibrify_requests_in_flight',
+    'Requests currently being handled by this process.',
+)
+
+UNMATCHED_ROUTE = '<unmatched>'
+
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNMATCHED_ROUTE
+    return match.view_name or match.route or UNMATCHED_ROUTE
+
+
+def _ms(seconds):
+    return '%.2f' % (seconds * 1000)
+
+
+class PerformanceMiddleware:
+    """
+    Record per-request database, cache, view and render timings.
+
+    Results are emitted as a ``Server-Timing`` header and aggregated into
+    the process-local histograms served by ``calibrify.metrics.views``,
+    and checked against the route's ``QUERY_BUDGETS`` entry.
+    Place it first in ``MIDDLEWARE`` so ``total`` covers the whole stack.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'METRICS_SERVER_TIMING', True)
+        # Connections opened before the signal handler was registered
+        for connection in connections.all():
+            timing.install_query_timer(connection=connection)
+            slow_queries.install(connection=connection)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings, token = self._start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            timing.deactivate(token)
+            IN_FLIGHT.dec()
+        return self._finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings, token = self._start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            timing.deactivate(token)
+            IN_FLIGHT.dec()
+        return self._finish(request, response, timings)
+
+    def _start(self, request):
+        IN_FLIGHT.inc()
+        timings = timing.RequestTimings()
+        request.timings = timings
+        return timings, timing.activate(timings)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.timings.view_started = time.perf_counter()
+        request.timings.route = _route(request)
+
+    def process_template_response(self, request, response):
+        timings = request.timings
+        timings.view_finished = time.perf_counter()
+
+        def mark_rendered(response):
+            timings.render_finished = time.perf_counter()
+
+        response.add_post_render_callback(mark_rendered)
+        return response
+
+    def _finish(self, request, response, timings):
+        finished = time.perf_counter()
+        total = finished - timings.started
+        view_started = timings.view_started or timings.started
+        view_finished = timings.view_finished or finished
+        view = view_finished - view_started
+        serialize = (
+            timings.render_finished - view_finished
+            if timings.render_finished else 0.0
+        )
+
+        route = _route(request)
+        REQUEST_DURATION.observe(total, route=route, method=request.method)
+        VIEW_DURATION.observe(view, route=route)
+        SERIALIZE_DURATION.observe(serialize, route=route)
+        DB_DURATION.observe(timings.db_time, route=route)
+        DB_QUERIES.observe(timings.db_queries, route=route)
+        if timings.cache_hits:
+            CACHE_HITS.inc(timings.cache_hits, route=route)
+        if timings.cache_misses:
+            CACHE_MISSES.inc(timings.cache_misses, route=route)
+        RESPONSES.inc(route=route, status=response.status_code)
+
+        if self.server_timing:
+            entries = [
+                'db;dur=%s;desc="%d queries"' % (_ms(timings.db_time), timings.db_queries),
+                'cache;desc="%d hits, %d misses"' % (timings.cache_hits, timings.cache_misses),
+                'view;dur=%s' % _ms(view),
+                'serialize;dur=%s' % _ms(serialize),
+            ]
+            entries.extend(
+                '%s;dur=%s' % (name, _ms(duration))
+                for name, duration in timings.phases.items()
+            )
+            entries.append('total;dur=%s' % _ms(total))
+            response['Server-Timing'] = ', '.join(entries)
+        budgets.check(route, timings.db_queries, total)
+        return response
@@ -0,0 +1,197 @@
+# ============================================================================
+# File Path: backend/calibrify/metrics/registry.py
+# Description: In-process metric registry with Prometheus text exposition
+# ============================================================================
+
+import threading
+from bisect import bisect_left
+
+# Prometheus client defaults, in seconds
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25,
+    0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0,
+)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    body = ','.join(
+        '%s="%s"' % (name, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+        for name, value in pairs
+    )
+    return '{%s}' % body
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base class for labelled metrics."""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def _key(self, labels):
+        return tuple(labels.get(name, '') for name in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def collect(self):
+        """Yield exposition lines for this metric."""
+        yield '# HELP %s %s' % (self.name, self.documentation)
+        yield '# TYPE %s %s' % (self.name, self.kind)
+        with self._lock:
+            series = list(self._series.items())
+        for key, value in sorted(series):
+            yield from self._collect_series(key, value)
+
+    def _collect_series(self, key, value):
+        yield '%s%s %s' % (
+            self.name, _format_labels(self.labelnames, key), _format_value(value)
+        )
+
+
+class Counter(Metric):
+    """Monotonically increasing counter."""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._series.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._series[self._key(labels)] = value
+
+    def value(self, **labels):
+        return self._series.get(self._key(labels), 0)
+
+
+class Histogram(Metric):
+    """Cumulative histogram with fixed upper bounds."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (plus +Inf), running sum, total count
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self, **labels):
+        """Return ``(count, sum)`` for one label set."""
+        series = self._series.get(self._key(labels))
+        if series is None:
+            return 0, 0.0
+        return series[2], series[1]
+
+    def _collect_series(self, key, value):
+        counts, total, count = value[0][:], value[1], value[2]
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            yield '%s_bucket%s %d' % (
+                self.name,
+                _format_labels(self.labelnames, key, ('le', _format_value(float(bound)))),
+                cumulative,
+            )
+        labels = _format_labels(self.labelnames, key)
+        yield '%s_sum%s %s' % (self.name, labels, _format_value(total))
+        yield '%s_count%s %d' % (self.name, labels, count)
+
+
+class Registry:
+    """Collection of metrics rendered together at the metrics endpoint."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector):
+        """
+        Register a callable invoked before each scrape, used for values
+        that are sampled on demand rather than recorded per request.
+        """
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def clear(self):
+        for metric in self._metrics.values():
+            metric.clear()
+
+    def render(self):
+        """Render every metric in the Prometheus text format (0.0.4)."""
+        for collector in list(self._collectors):
+            collector()
+        lines = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].collect())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
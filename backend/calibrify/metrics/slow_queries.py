@@ -0,0 +1,193 @@
+# ============================================================================
+# File Path: backend/calibrify/metrics/slow_queries.py
+# Description: Opt-in capture of slow database queries with their view,
+#              stack and a sampled execution plan
+# ============================================================================
+
+import os
+import random
+import threading
+import time
+import traceback
+from collections import deque
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+
+from . import timing
+from .registry import REGISTRY
+
+SLOW_QUERIES = REGISTRY.counter(
+    'calibrify_slow_queries_total',
+    'Queries slower than SLOW_QUERY_MS, by route.',
+    ('route',),
+)
+
+# Frames kept per captured query, innermost last
+STACK_DEPTH = 12
+
+_METRICS_DIR = os.path.dirname(os.path.abspath(__file__))
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(_METRICS_DIR))
+
+
+class SlowQuery:
+    __slots__ = ('captured_at', 'route', 'alias', 'sql', 'params', 'duration', 'stack', 'plan')
+
+    def __init__(self, route, alias, sql, params, duration, stack, plan=None):
+        self.captured_at = timezone.now()
+        self.route = route
+        self.alias = alias
+        self.sql = sql
+        self.params = params
+        self.duration = duration
+        self.stack = stack
+        self.plan = plan
+
+    @property
+    def duration_ms(self):
+        return self.duration * 1000
+
+
+class SlowQueryLog:
+    """
+    Ring buffer of the most recent slow queries in this process. Old
+    entries fall off the end, so memory stays bounded however slow the
+    database gets.
+    """
+
+    def __init__(self, size):
+        self._entries = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, entry):
+        with self._lock:
+            self._entries.append(entry)
+
+    def entries(self):
+        """Captured queries, newest first."""
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+LOG = SlowQueryLog(getattr(settings, 'SLOW_QUERY_BUFFER', 200))
+
+
+def enabled():
+    return getattr(settings, 'SLOW_QUERY_MS', None) is not None
+
+
+def _internal(filename):
+    return filename.startswith(_METRICS_DIR) or '%sdjango%sdb%s' % ((os.sep,) * 3) in filename
+
+
+def _where(frame):
+    filename = frame.filename
+    if filename.startswith(_PROJECT_ROOT) and 'site-packages' not in filename:
+        filename = os.path.relpath(filename, _PROJECT_ROOT)
+    elif 'site-packages' in filename:
+        filename = filename.split('site-packages' + os.sep, 1)[1]
+    return '%s:%d in %s' % (filename, frame.lineno, frame.name)
+
+
+def _stack():
+    """
+    The project's own frames leading to the query, followed by the frame
+    that issued it when that is library code (a paginator, a serializer).
+    """
+    frames = [frame for frame in traceback.extract_stack() if not _internal(frame.filename)]
+    own = [
+        frame for frame in frames
+        if frame.filename.startswith(_PROJECT_ROOT) and 'site-packages' not in frame.filename
+    ]
+    if frames and (not own or frames[-1] is not own[-1]):
+        own.append(frames[-1])
+    return [_where(frame) for frame in own[-STACK_DEPTH:]]
+
+
+def _explain_prefix(connection):
+    if connection.vendor == 'postgresql':
+        return 'EXPLAIN (ANALYZE, BUFFERS) '
+    if connection.vendor == 'sqlite':
+        return 'EXPLAIN QUERY PLAN '
+    return 'EXPLAIN '
+
+
+def explain(connection, sql, params):
+    """
+    The execution plan of ``sql``. On PostgreSQL this runs the query again
+    under ``EXPLAIN (ANALYZE, BUFFERS)``, hence sampling and the restriction
+    to ``SELECT``; inside a transaction it runs in a savepoint so a failed
+    EXPLAIN cannot abort the caller's work. The backend's own cursor is
+    used, so the EXPLAIN bypasses the execute wrappers: it is neither
+    captured itself nor counted against the request.
+    """
+    savepoint = connection.in_atomic_block and connection.features.uses_savepoints
+    name = 'slow_query_explain'
+    cursor = connection.create_cursor()
+    try:
+        if savepoint:
+            cursor.execute(connection.ops.savepoint_create_sql(name))
+        try:
+            cursor.execute(_explain_prefix(connection) + sql, params)
+            rows = cursor.fetchall()
+        except connection.Database.Error as exc:
+            if savepoint:
+                cursor.execute(connection.ops.savepoint_rollback_sql(name))
+            return 'EXPLAIN failed: %s' % exc
+        if savepoint:
+            cursor.execute(connection.ops.savepoint_commit_sql(name))
+    finally:
+        cursor.close()
+    if connection.vendor in ('postgresql', 'sqlite'):
+        # One text column, or SQLite's (id, parent, notused, detail)
+        return '\n'.join(str(row[-1]) for row in rows)
+    return '\n'.join(' | '.join(str(value) for value in row) for row in rows)
+
+
+def _explainable(sql, many):
+    return not many and sql.lstrip()[:6].upper() == 'SELECT'
+
+
+def capture(execute, sql, params, many, context):
+    """Database execute wrapper recording queries slower than ``SLOW_QUERY_MS``."""
+    threshold = getattr(settings, 'SLOW_QUERY_MS', None)
+    if threshold is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration = time.perf_counter() - started
+    if duration * 1000 < threshold:
+        return result
+
+    timings = timing.current()
+    route = (timings.route if timings else None) or ''
+    connection = context['connection']
+    entry = SlowQuery(
+        route, connection.alias, sql, None if many else params, duration, _stack(),
+    )
+    sample = getattr(settings, 'SLOW_QUERY_EXPLAIN_SAMPLE', 0.0)
+    if sample and _explainable(sql, many) and random.random() < sample:
+        entry.plan = explain(connection, sql, params)
+    LOG.add(entry)
+    SLOW_QUERIES.inc(route=route or '<none>')
+    return result
+
+
+def install(sender=None, connection=None, **kwargs):
+    """
+    Attach ``capture`` to a connection when ``SLOW_QUERY_MS`` is set. Left
+    unset, no wrapper is installed and queries pay nothing for it.
+    """
+    if enabled() and capture not in connection.execute_wrappers:
+        connection.execute_wrappers.append(capture)
+
+
+connection_created.connect(install, dispatch_uid='calibrify.metrics.slow_queries')
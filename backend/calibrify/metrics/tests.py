@@ -0,0 +1,169 @@
+# ============================================================================
+# File Path: backend/calibrify/metrics/tests.py
+# Description: Tests for request instrumentation and the metrics endpoint
+# ============================================================================
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from . import slow_queries, timing
+from .budgets import BUDGET_EXCEEDED, QueryBudgetExceeded
+from .middleware import DB_QUERIES, REQUEST_DURATION
+from .registry import Histogram, REGISTRY
+
+
+class HistogramTests(TestCase):
+    def test_buckets_are_cumulative(self):
+        histogram = Histogram('test_seconds', 'Test.', ('route',), buckets=(0.1, 1.0))
+        histogram.observe(0.05, route='a')
+        histogram.observe(0.5, route='a')
+        histogram.observe(5, route='a')
+        lines = list(histogram.collect())
+        self.assertIn('test_seconds_bucket{route="a",le="0.1"} 1', lines)
+        self.assertIn('test_seconds_bucket{route="a",le="1"} 2', lines)
+        self.assertIn('test_seconds_bucket{route="a",le="+Inf"} 3', lines)
+        self.assertIn('test_seconds_count{route="a"} 3', lines)
+
+
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        REGISTRY.clear()
+        cache.clear()
+        self.user = User.objects.create_user('tech', password='secret')
+        self.client.force_login(self.user)
+
+    def test_server_timing_header(self):
+        response = self.client.get('/api/equipment/')
+        self.assertEqual(response.status_code, 200)
+        header = response['Server-Timing']
+        for name in ('db;', 'cache;', 'view;', 'serialize;', 'total;'):
+            self.assertIn(name, header)
+        self.assertNotIn('desc="0 queries"', header)
+
+    def test_histograms_are_labelled_by_route(self):
+        self.client.get('/api/equipment/')
+        count, _ = REQUEST_DURATION.snapshot(route='equipment:equipment-list', method='GET')
+        self.assertEqual(count, 1)
+        count, queries = DB_QUERIES.snapshot(route='equipment:equipment-list')
+        self.assertEqual(count, 1)
+        self.assertGreater(queries, 0)
+
+    def test_cache_hits_and_misses(self):
+        cache.set('present', 1)
+        timings = timing.RequestTimings()
+        token = timing.activate(timings)
+        try:
+            cache.get('present')
+            cache.get('absent')
+            cache.get_many(['present', 'absent'])
+        finally:
+            timing.deactivate(token)
+        self.assertEqual((timings.cache_hits, timings.cache_misses), (2, 2))
+
+    def test_metrics_endpoint(self):
+        self.client.get('/api/equipment/')
+        response = self.client.get('/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'calibrify_request_duration_seconds_count'
+            '{route="equipment:equipment-list",method="GET"} 1',
+            response.content.decode(),
+        )
+
+    @override_settings(METRICS_AUTH_TOKEN='scrape-token')
+    def test_metrics_endpoint_token(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 401)
+        response = self.client.get(
+            '/metrics/', HTTP_AUTHORIZATION='Bearer scrape-token'
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(SLOW_QUERY_MS=0, SLOW_QUERY_EXPLAIN_SAMPLE=1.0)
+class SlowQueryTests(TestCase):
+    def setUp(self):
+        slow_queries.LOG.clear()
+        self.addCleanup(slow_queries.LOG.clear)
+        connection.ensure_connection()
+        slow_queries.install(connection=connection)
+        self.addCleanup(connection.execute_wrappers.remove, slow_queries.capture)
+        self.user = User.objects.create_superuser('admin', password='secret')
+        self.client.force_login(self.user)
+
+    def test_captures_route_stack_and_plan(self):
+        self.client.get('/api/equipment/')
+        entries = [
+            entry for entry in slow_queries.LOG.entries()
+            if entry.route == 'equipment:equipment-list' and 'equipment_equipment' in entry.sql
+        ]
+        self.assertTrue(entries)
+        entry = entries[-1]
+        self.assertTrue(any(frame.startswith('calibrify/') for frame in entry.stack))
+        self.assertFalse(any(frame.startswith('django/db/') for frame in entry.stack))
+        self.assertTrue(entry.plan)
+        self.assertNotIn('EXPLAIN failed', entry.plan)
+
+    def test_only_selects_are_explained(self):
+        User.objects.create_user('tech', password='secret')
+        insert = next(
+            entry for entry in slow_queries.LOG.entries() if entry.sql.startswith('INSERT')
+        )
+        self.assertIsNone(insert.plan)
+        self.assertEqual(insert.route, '')
+
+    @override_settings(SLOW_QUERY_MS=10000)
+    def test_fast_queries_are_ignored(self):
+        slow_queries.LOG.clear()
+        self.client.get('/api/equipment/')
+        self.assertEqual(len(slow_queries.LOG), 0)
+
+    def test_buffer_is_bounded(self):
+        log = slow_queries.SlowQueryLog(2)
+        for number in range(3):
+            log.add(number)
+        self.assertEqual(log.entries(), [2, 1])
+
+    def test_admin_page(self):
+        self.client.get('/api/equipment/')
+        response = self.client.get('/admin/slow-queries/')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'equipment:equipment-list')
+        self.client.post('/admin/slow-queries/')
+        self.assertFalse(any(
+            entry.route == 'equipment:equipment-list' for entry in slow_queries.LOG.entries()
+        ))
+
+    def test_admin_page_requires_superuser(self):
+        staff = User.objects.create_user('staff', password='secret', is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get('/admin/slow-queries/').status_code, 403)
+
+
+class QueryBudgetTests(TestCase):
+    def setUp(self):
+        REGISTRY.clear()
+        self.user = User.objects.create_user('tech', password='secret')
+        self.client.force_login(self.user)
+
+    @override_settings(QUERY_BUDGETS={'equipment:equipment-list': {'queries': 1}})
+    def test_strict_budget_fails_the_request(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'equipment:equipment-list over budget'):
+            self.client.get('/api/equipment/')
+
+    @override_settings(QUERY_BUDGETS={'*': {'queries': 1}}, QUERY_BUDGETS_STRICT=False)
+    def test_default_budget_is_counted_and_logged(self):
+        with self.assertLogs('calibrify.metrics.budgets', 'WARNING'):
+            response = self.client.get('/api/equipment/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            BUDGET_EXCEEDED.value(route='equipment:equipment-list', budget='queries'), 1
+        )
+
+    @override_settings(QUERY_BUDGETS={'equipment:equipment-list': {'queries': 100, 'ms': 60000}})
+    def test_within_budget(self):
+        self.assertEqual(self.client.get('/api/equipment/').status_code, 200)
+        self.assertEqual(
+            BUDGET_EXCEEDED.value(route='equipment:equipment-list', budget='queries'), 0
+        )
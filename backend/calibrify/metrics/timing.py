@@ -0,0 +1,110 @@
+# ============================================================================
+# File Path: backend/calibrify/metrics/timing.py
+# Description: Per-request timing state shared by the middleware, database
+#              execute wrapper and instrumented cache backends
+# ============================================================================
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.backends.signals import connection_created
+
+_current = ContextVar('calibrify_request_timings', default=None)
+
+
+class RequestTimings:
+    """Mutable accumulator for one request; shared across threads via context."""
+
+    __slots__ = (
+        'started',
+        'view_started',
+        'view_finished',
+        'render_finished',
+        'db_queries',
+        'db_time',
+        'cache_hits',
+        'cache_misses',
+        'phases',
+        'route',
+    )
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.view_finished = None
+        self.render_finished = None
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.phases = {}
+        self.route = None
+
+    def add_phase(self, name, duration):
+        self.phases[name] = self.phases.get(name, 0.0) + duration
+
+
+def current():
+    """Return the timings of the request being handled, if any."""
+    return _current.get()
+
+
+def activate(timings):
+    return _current.set(timings)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+@contextmanager
+def phase(name):
+    """
+    Time a block of code and report it as its own ``Server-Timing`` entry.
+
+    Outside a request this is a no-op apart from two clock reads.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = _current.get()
+        if timings is not None:
+            timings.add_phase(name, time.perf_counter() - started)
+
+
+def record_cache(hits=0, misses=0):
+    timings = _current.get()
+    if timings is not None:
+        timings.cache_hits += hits
+        timings.cache_misses += misses
+
+
+def query_timer(execute, sql, params, many, context):
+    """Database execute wrapper counting queries for the active request."""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db_queries += 1
+        timings.db_time += time.perf_counter() - started
+
+
+def install_query_timer(sender=None, connection=None, **kwargs):
+    """
+    Attach ``query_timer`` to a database connection.
+
+    Wrappers live on the connection wrapper, so installing at connection
+    time covers every thread (including the ones async views hop to) without
+    per-request setup. Persistent connections reconnect through the same
+    wrapper, hence the membership check.
+    """
+    if query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_timer)
+
+
+connection_created.connect(install_query_timer, dispatch_uid='calibrify.metrics.query_timer')
@@ -0,0 +1,13 @@
+# ============================================================================
+# File Path: backend/calibrify/metrics/urls.py
+# Description: URL configuration for the metrics endpoint
+# ============================================================================
+
+from django.urls import path
+from . import views
+
+app_name = 'metrics'
+
+urlpatterns = [
+    path('', views.metrics, name='metrics'),
+]
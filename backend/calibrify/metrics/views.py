@@ -0,0 +1,52 @@
+# ============================================================================
+# File Path: backend/calibrify/metrics/views.py
+# Description: Prometheus scrape endpoint and the admin slow query log
+# ============================================================================
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.shortcuts import redirect, render
+from django.utils.crypto import constant_time_compare
+
+from . import slow_queries as slow_query_log
+from .registry import REGISTRY
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def metrics(request):
+    """
+    Expose this process's metrics in the Prometheus text format.
+
+    When ``METRICS_AUTH_TOKEN`` is set, scrapers must send it as a
+    bearer token.
+    """
+    token = getattr(settings, 'METRICS_AUTH_TOKEN', None)
+    if token:
+        supplied = request.headers.get('Authorization', '')
+        if not constant_time_compare(supplied, 'Bearer %s' % token):
+            return HttpResponse(status=401)
+    return HttpResponse(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+
+def slow_queries(request):
+    """
+    Admin page listing this process's captured slow queries. Parameters
+    can hold personal data, so it is limited to superusers.
+    """
+    if not request.user.is_superuser:
+        raise PermissionDenied
+    if request.method == 'POST':
+        slow_query_log.LOG.clear()
+        return redirect(request.path)
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Slow queries',
+        'enabled': slow_query_log.enabled(),
+        'threshold': getattr(settings, 'SLOW_QUERY_MS', None),
+        'sample': getattr(settings, 'SLOW_QUERY_EXPLAIN_SAMPLE', 0.0),
+        'entries': slow_query_log.LOG.entries(),
+    }
+    return render(request, 'admin/slow_queries.html', context)
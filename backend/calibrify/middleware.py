@@ -0,0 +1,139 @@
+# ============================================================================
+# File Path: backend/calibrify/middleware.py
+# Description: Project middleware
+# ============================================================================
+
+import hashlib
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from whitenoise import middleware as whitenoise
+
+from calibrify.db import routers
+
+
+class WhiteNoiseMiddleware(whitenoise.WhiteNoiseMiddleware):
+    """
+    WhiteNoise that can run in async mode.
+
+    The upstream middleware is sync-only, which forces Django to hold a
+    thread for the whole of every ASGI request just to pass through it.
+    Here the static lookup is a dict access, and only serving a matched
+    file hops to a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Mark safe reads on ``REPLICA_READ_ROUTES`` for the read replica.
+
+    After a successful write the client gets a short-lived pin cookie, and
+    while it is valid all of that client's reads go to the primary so users
+    see their own changes despite replication lag. API clients usually drop
+    cookies, so the pin is also kept in the cache for the same time, keyed
+    on the credentials the write was sent with.
+    """
+
+    sync_capable = True
+    async_capable = True
+    cookie_name = 'replica_pin'
+    cache_prefix = 'replica-pin:'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.routes = frozenset(getattr(settings, 'REPLICA_READ_ROUTES', ()))
+        self.pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.replica_routing = routers.ReplicaRouting()
+        token = routers.activate(request.replica_routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.deactivate(token)
+        return self._pin(request, response)
+
+    async def __acall__(self, request):
+        request.replica_routing = routers.ReplicaRouting()
+        token = routers.activate(request.replica_routing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routers.deactivate(token)
+        return self._pin(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method in SAFE_METHODS
+            and request.resolver_match.view_name in self.routes
+            and not self._pinned(request)
+        ):
+            request.replica_routing.use_replica = True
+
+    def _principal(self, request):
+        """
+        Who sent the request, before the view authenticates it: the
+        ``Authorization`` header, hashed, else the session user.
+        """
+        header = request.META.get('HTTP_AUTHORIZATION')
+        if header:
+            return 'auth:' + hashlib.sha256(header.encode()).hexdigest()
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return 'user:%s' % user.pk
+        return None
+
+    def _pinned(self, request):
+        try:
+            if float(request.COOKIES.get(self.cookie_name, 0)) > time.time():
+                return True
+        except ValueError:
+            pass
+        principal = self._principal(request)
+        return principal is not None and cache.get(self.cache_prefix + principal) is not None
+
+    def _pin(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            principal = self._principal(request)
+            if principal is not None:
+                cache.set(self.cache_prefix + principal, True, self.pin_seconds)
+            response.set_cookie(
+                self.cookie_name,
+                str(int(time.time() + self.pin_seconds)),
+                max_age=self.pin_seconds,
+                httponly=True,
+                samesite='Lax',
+                secure=request.is_secure(),
+            )
+        return response
@@ -22,13 +22,16 @@ INSTALLED_APPS = [
     'corsheaders',
     'django_filters',
     # Local apps
+    'accounts',
     'equipment',
     'frontend',  # Frontend app
 ]
 
 MIDDLEWARE = [
+    'calibrify.metrics.middleware.PerformanceMiddleware',
+    'calibrify.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'calibrify.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -90,19 +93,58 @@ STATICFILES_DIRS = [
 ]
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Cache
+CACHES = {
+    'default': {
+        'BACKEND': 'calibrify.metrics.cache.LocMemCache',
+    }
+}
+
+# Sessions: 'cached_db' reads through the cache and only falls back to
+# the database on a miss; 'signed_cookies' keeps no server-side state
+SESSION_STORE = os.environ.get('SESSION_STORE', 'cached_db')
+SESSION_ENGINE = 'django.contrib.sessions.backends.%s' % SESSION_STORE
+
 # Media files
 MEDIA_URL = 'media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Database routing: safe reads on these routes use the 'replica' database
+# when one is configured; writes pin the client to the primary briefly
+DATABASE_ROUTERS = ['calibrify.db.routers.ReplicaRouter']
+REPLICA_READ_ROUTES = [
+    'equipment:equipment-list',
+    'equipment:equipment-detail',
+    'equipment:calibration-list',
+    'equipment:calibration-detail',
+    'equipment:maintenance-list',
+    'equipment:maintenance-detail',
+    'equipment:equipment-dashboard-summary',
+    'equipment:dashboard-summary',
+    'equipment:dashboard-activity',
+    'equipment:calendar-events',
+    'frontend:dashboard',
+    'frontend:reports',
+    'frontend:calendar',
+]
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 10))
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# API tokens: cached lookups replace a password hash per request. Basic
+# auth stays available until integrations have moved to tokens.
+API_TOKEN_CACHE_SECONDS = int(os.environ.get('API_TOKEN_CACHE_SECONDS', 300))
+API_TOKEN_DEFAULT_DAYS = int(os.environ.get('API_TOKEN_DEFAULT_DAYS', 365)) or None
+API_BASIC_AUTH = os.environ.get('API_BASIC_AUTH', 'true').lower() in ('1', 'true', 'yes')
+
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        # First, so failed API calls get a 401 with a Token challenge
+        'accounts.authentication.TokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.BasicAuthentication',
-    ],
+    ] + (['accounts.authentication.BasicAuthentication'] if API_BASIC_AUTH else []),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
@@ -115,6 +157,10 @@ REST_FRAMEWORK = {
     ],
 }
 
+# List endpoints build their rows from values_list() in the serializers'
+# layout (equipment/projection.py); false goes through the serializers
+API_PROJECTED_LISTS = os.environ.get('API_PROJECTED_LISTS', 'true').lower() in ('1', 'true', 'yes')
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:80",
@@ -127,6 +173,105 @@ SECURE_CONTENT_TYPE_NOSNIFF = True
 X_FRAME_OPTIONS = 'DENY'
 
 # Authentication settings
+AUTHENTICATION_BACKENDS = ['accounts.backends.CachedModelBackend']
+AUTH_USER_CACHE_SECONDS = int(os.environ.get('AUTH_USER_CACHE_SECONDS', 300))
 LOGIN_URL = '/admin/login/'
 LOGIN_REDIRECT_URL = '/'
-LOGOUT_REDIRECT_URL = '/' 
\ No newline at end of file
+LOGOUT_REDIRECT_URL = '/'
+
+# Performance metrics
+METRICS_SERVER_TIMING = True
+METRICS_AUTH_TOKEN = os.environ.get('METRICS_AUTH_TOKEN')
+
+# Slow query capture, off unless a threshold is set: queries over it are
+# kept (newest SLOW_QUERY_BUFFER per process) with their route and stack,
+# and this fraction of slow SELECTs is re-run under EXPLAIN ANALYZE
+SLOW_QUERY_MS = (
+    float(os.environ['SLOW_QUERY_MS']) if os.environ.get('SLOW_QUERY_MS') else None
+)
+SLOW_QUERY_BUFFER = int(os.environ.get('SLOW_QUERY_BUFFER', 200))
+SLOW_QUERY_EXPLAIN_SAMPLE = float(os.environ.get('SLOW_QUERY_EXPLAIN_SAMPLE', 0.05))
+
+# Per-route limits ('queries' per request, total 'ms'), keyed by URL name;
+# '*' applies to routes without an entry. Overruns are counted and logged,
+# or raise when strict (development and tests).
+QUERY_BUDGETS = {
+    'equipment:dashboard-summary': {'queries': 8},
+    'equipment:dashboard-activity': {'queries': 6},
+    'equipment:calendar-events': {'queries': 8},
+    'equipment:equipment-changes': {'queries': 6},
+}
+if API_PROJECTED_LISTS:
+    # Serialized lists read nested history per instrument instead
+    QUERY_BUDGETS['equipment:equipment-list'] = {'queries': 6}
+QUERY_BUDGETS_STRICT = os.environ.get('QUERY_BUDGETS_STRICT', 'false').lower() in ('1', 'true', 'yes')
+
+# Health checks
+HEALTH_CHECK_CACHE_SECONDS = int(os.environ.get('HEALTH_CHECK_CACHE_SECONDS', 5))
+HEALTH_CHECK_TIMEOUT = float(os.environ.get('HEALTH_CHECK_TIMEOUT', 2.0))
+HEALTH_CHECK_SLOW_MS = int(os.environ.get('HEALTH_CHECK_SLOW_MS', 250))
+# Concurrent requests one process can serve (e.g. gunicorn --threads)
+HEALTH_WORKER_CAPACITY = int(os.environ.get('HEALTH_WORKER_CAPACITY', 0)) or None
+
+# Live dashboard events: 'memory' serves only streams in the process that
+# made the change; 'redis' shares them between processes
+LIVE_EVENTS_BROKER = os.environ.get('LIVE_EVENTS_BROKER', 'memory')
+LIVE_EVENTS_REDIS_URL = os.environ.get('LIVE_EVENTS_REDIS_URL', os.environ.get('REDIS_URL'))
+# Changes committed within this many seconds share one recomputation
+LIVE_EVENTS_DEBOUNCE = float(os.environ.get('LIVE_EVENTS_DEBOUNCE', 0.25))
+LIVE_EVENTS_HEARTBEAT_SECONDS = 15
+# Streams are recycled so ones whose client vanished are not kept forever
+LIVE_EVENTS_MAX_SECONDS = int(os.environ.get('LIVE_EVENTS_MAX_SECONDS', 300))
+
+# Change feed for offline clients: rows younger than the settle time wait
+# for the next sync so in-flight transactions are not skipped; cursors
+# older than the tombstone retention must resync from scratch
+CHANGE_FEED_SETTLE_SECONDS = int(os.environ.get('CHANGE_FEED_SETTLE_SECONDS', 5))
+CHANGE_FEED_TOMBSTONE_DAYS = int(os.environ.get('CHANGE_FEED_TOMBSTONE_DAYS', 90))
+
+# Largest operation list accepted by /api/batch/
+BATCH_MAX_OPERATIONS = int(os.environ.get('BATCH_MAX_OPERATIONS', 500))
+
+# Calibration and maintenance lists read only this many days of history
+# unless asked for more (0 reads everything); older yearly partitions are
+# archived by archive_history, optionally to a cheaper tablespace
+HISTORY_HOT_DAYS = int(os.environ.get('HISTORY_HOT_DAYS', 730))
+HISTORY_ARCHIVE_TABLESPACE = os.environ.get('HISTORY_ARCHIVE_TABLESPACE')
+
+# Compliance queues: instruments due within this many days count as due
+# soon; rollover_compliance moves the per-location counts on each day
+COMPLIANCE_DUE_SOON_DAYS = int(os.environ.get('COMPLIANCE_DUE_SOON_DAYS', 30))
+
+# Calibration scheduling: plan_calibrations assigns instruments due within
+# the horizon to technician shifts, improving the plan for at most this
+# many seconds
+SCHEDULE_HORIZON_DAYS = int(os.environ.get('SCHEDULE_HORIZON_DAYS', 28))
+SCHEDULE_TIME_LIMIT = float(os.environ.get('SCHEDULE_TIME_LIMIT', 5))
+
+# Duplicate detection: pairs scoring at least the threshold (0-1) become
+# merge candidates; blocking keys shared by more instruments than
+# DEDUP_MAX_BLOCK are too generic to compare on
+DEDUP_THRESHOLD = float(os.environ.get('DEDUP_THRESHOLD', 0.85))
+DEDUP_MAX_BLOCK = int(os.environ.get('DEDUP_MAX_BLOCK', 200))
+
+# Compressed text (calibration results, maintenance descriptions, notes):
+# values of at least this many bytes are stored zlib-compressed with the
+# preset dictionary of this id (calibrify/db/compression.py)
+COMPRESSED_TEXT_MIN_BYTES = int(os.environ.get('COMPRESSED_TEXT_MIN_BYTES', 256))
+COMPRESSED_TEXT_DICTIONARY = os.environ.get('COMPRESSED_TEXT_DICTIONARY', '1')
+
+# Label sheets and certificate summaries: drawn by this many worker
+# processes (0 draws in the requesting process), at most this many records
+# per request, each page cached until its record changes or this expires
+DOCUMENTS_WORKERS = int(os.environ.get('DOCUMENTS_WORKERS', 2))
+DOCUMENTS_MAX_ITEMS = int(os.environ.get('DOCUMENTS_MAX_ITEMS', 10000))
+DOCUMENTS_CACHE_SECONDS = int(os.environ.get('DOCUMENTS_CACHE_SECONDS', 7 * 24 * 3600))
+
+# Admin changelists: counts above this many rows use planner estimates
+# (PostgreSQL only); filter choices are cached for this many seconds
+ESTIMATED_COUNT_THRESHOLD = int(os.environ.get('ESTIMATED_COUNT_THRESHOLD', 10000))
+ADMIN_FILTER_CACHE_SECONDS = int(os.environ.get('ADMIN_FILTER_CACHE_SECONDS', 300))
+
+# Run the independent queries of async views on separate connections;
+# None chooses automatically (disabled on SQLite)
+ASYNC_QUERY_CONCURRENCY = None
@@ -11,6 +11,9 @@ SECRET_KEY = 'django-insecure-development-key-change-in-production'
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
+# Fail requests that go over their QUERY_BUDGETS entry
+QUERY_BUDGETS_STRICT = True
+
 ALLOWED_HOSTS = ['localhost', '127.0.0.1', 'web', 'nginx']
 
 # CSRF and CORS settings
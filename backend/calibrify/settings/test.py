@@ -0,0 +1,45 @@
+# ============================================================================
+# File Path: backend/calibrify/settings/test.py
+# Description: Settings for the test suite and local benchmarks
+# ============================================================================
+
+import os
+from .development import *
+
+# SQLite by default so tests and benchmarks run without Docker; point the
+# DB_* variables at a local PostgreSQL to exercise the production engine.
+if os.environ.get('DB_ENGINE') == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'calibrify'),
+            'USER': os.environ.get('DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', 'postgres'),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+        }
+    }
+
+# A replica that is the test database under another alias, so routing
+# can be followed to the connection; reads only go there in the tests
+# that list routes and declare the alias
+DATABASES['replica'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+REPLICA_READ_ROUTES = []
+
+# Manifest storage needs collectstatic to have run
+STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+
+# Rolled-back test transactions reuse primary keys, which a cached user
+# would outlive; tests of the user cache enable it explicitly
+AUTH_USER_CACHE_SECONDS = 0
+ADMIN_FILTER_CACHE_SECONDS = 0
+
+# Tests draw documents in process; the worker pool has its own test
+DOCUMENTS_WORKERS = 0
@@ -19,11 +19,16 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from calibrify.metrics import views as metrics_views
+
 urlpatterns = [
+    path('admin/slow-queries/', admin.site.admin_view(metrics_views.slow_queries), name='slow-queries'),
     path('admin/', admin.site.urls),
     path('', include('frontend.urls')),  # Frontend URLs (dashboard, etc.)
+    path('api/auth/', include('accounts.urls')),  # API tokens
     path('api/', include('equipment.urls')),  # Equipment API endpoints
     path('health/', include('calibrify.health.urls')),
+    path('metrics/', include('calibrify.metrics.urls')),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
 # Serve static files in development
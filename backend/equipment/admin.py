@@ -3,12 +3,85 @@
 # Description: Admin interface configuration for equipment models
 # ============================================================================
 
-from django.contrib import admin
-from .models import Equipment, Calibration, Maintenance
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.core.cache import cache
+from django.template.response import TemplateResponse
+from django.utils import timezone
+
+from calibrify.db.pagination import EstimatedCountPaginator
+from . import bulk, dedup
+from .models import (
+    Equipment, Calibration, Maintenance, TechnicianShift, LabCapacity, ScheduledCalibration,
+    DuplicateCandidate,
+)
+
+
+def _filter_cache_key(model, field_path):
+    return 'admin-filter:%s:%s' % (model._meta.label_lower, field_path)
+
+
+class CachedValuesFilter(admin.AllValuesFieldListFilter):
+    """
+    ``AllValuesFieldListFilter`` whose choices come from the cache instead
+    of a ``SELECT DISTINCT`` over the whole table on every changelist.
+    """
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        # Still a lazy queryset here; only evaluated on a cache miss
+        choices = self.lookup_choices
+        self.lookup_choices = cache.get_or_set(
+            _filter_cache_key(model, field_path),
+            lambda: list(choices),
+            settings.ADMIN_FILTER_CACHE_SECONDS,
+        )
+
+
+class CachedRelatedFilter(admin.RelatedFieldListFilter):
+    """``RelatedFieldListFilter`` with its list of related objects cached."""
+
+    def field_choices(self, field, request, model_admin):
+        return cache.get_or_set(
+            _filter_cache_key(field.model, field.name),
+            lambda: super(CachedRelatedFilter, self).field_choices(field, request, model_admin),
+            settings.ADMIN_FILTER_CACHE_SECONDS,
+        )
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelists that stay fast at millions of rows: counts come from planner
+    estimates and the unfiltered total is not counted separately.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class RelocateForm(forms.Form):
+    location = forms.CharField(max_length=200)
+
+
+class IntervalForm(forms.Form):
+    calibration_interval_type = forms.ChoiceField(
+        choices=Equipment._meta.get_field('calibration_interval_type').choices
+    )
+    calibration_interval_value = forms.IntegerField(min_value=1)
+
+
+class CalibrationCampaignForm(forms.Form):
+    calibration_date = forms.DateTimeField(initial=timezone.now)
+    calibration_standard = forms.CharField(max_length=200)
+    measurement_point = forms.CharField(max_length=200)
+    results = forms.CharField(widget=forms.Textarea)
+    notes = forms.CharField(widget=forms.Textarea, required=False)
 
 
 @admin.register(Equipment)
-class EquipmentAdmin(admin.ModelAdmin):
+class EquipmentAdmin(LargeTableAdmin):
     list_display = (
         'name',
         'serial_number',
@@ -17,11 +90,12 @@ class EquipmentAdmin(admin.ModelAdmin):
         'location',
         'last_calibration_date',
         'next_calibration_date',
+        'open_maintenance_count',
         'is_active',
     )
     list_filter = (
-        'category',
-        'manufacturer',
+        ('category', CachedValuesFilter),
+        ('manufacturer', CachedValuesFilter),
         'is_active',
     )
     search_fields = (
@@ -30,11 +104,21 @@ class EquipmentAdmin(admin.ModelAdmin):
         'model_number',
         'manufacturer',
     )
+    autocomplete_fields = ('created_by',)
+    actions = (
+        'relocate',
+        'deactivate',
+        'change_interval',
+        'record_calibration',
+    )
     readonly_fields = (
         'created_at',
         'updated_at',
         'last_calibration_date',
         'next_calibration_date',
+        'calibration_count',
+        'open_maintenance_count',
+        'last_maintenance_date',
     )
     fieldsets = (
         ('Basic Information', {
@@ -56,6 +140,13 @@ class EquipmentAdmin(admin.ModelAdmin):
                 'next_calibration_date',
             )
         }),
+        ('History', {
+            'fields': (
+                'calibration_count',
+                'open_maintenance_count',
+                'last_maintenance_date',
+            )
+        }),
         ('Additional Information', {
             'fields': (
                 'notes',
@@ -72,9 +163,61 @@ class EquipmentAdmin(admin.ModelAdmin):
         }),
     )
 
+    def _with_form(self, request, queryset, form_class, title, apply):
+        """
+        Ask for the action's values on an intermediate page, then apply them
+        to the whole selection with one set-based write.
+        """
+        if 'apply' in request.POST:
+            form = form_class(request.POST)
+            if form.is_valid():
+                count = apply(queryset, **form.cleaned_data)
+                self.message_user(
+                    request, '%s: %d instrument(s) updated.' % (title, count), messages.SUCCESS
+                )
+                return None
+        else:
+            form = form_class()
+        return TemplateResponse(request, 'admin/equipment/bulk_action.html', {
+            **self.admin_site.each_context(request),
+            'title': title,
+            'opts': self.model._meta,
+            'form': form,
+            'media': self.media + form.media,
+            'count': queryset.count(),
+            'action': request.POST['action'],
+            'action_checkbox_name': ACTION_CHECKBOX_NAME,
+            'selected': request.POST.getlist(ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', '0'),
+        })
+
+    @admin.action(description='Relocate selected equipment')
+    def relocate(self, request, queryset):
+        return self._with_form(request, queryset, RelocateForm, 'Relocate', bulk.relocate)
+
+    @admin.action(description='Deactivate selected equipment')
+    def deactivate(self, request, queryset):
+        count = bulk.deactivate(queryset)
+        self.message_user(request, '%d instrument(s) deactivated.' % count, messages.SUCCESS)
+
+    @admin.action(description='Change calibration interval')
+    def change_interval(self, request, queryset):
+        return self._with_form(
+            request, queryset, IntervalForm, 'Change calibration interval', bulk.change_interval
+        )
+
+    @admin.action(description='Record a calibration for selected equipment')
+    def record_calibration(self, request, queryset):
+        return self._with_form(
+            request, queryset, CalibrationCampaignForm, 'Record calibration',
+            lambda queryset, **fields: len(
+                bulk.record_calibrations(queryset, request.user, **fields)
+            ),
+        )
+
 
 @admin.register(Calibration)
-class CalibrationAdmin(admin.ModelAdmin):
+class CalibrationAdmin(LargeTableAdmin):
     list_display = (
         'equipment',
         'calibration_date',
@@ -84,8 +227,10 @@ class CalibrationAdmin(admin.ModelAdmin):
     )
     list_filter = (
         'calibration_date',
-        'calibrated_by',
+        ('calibrated_by', CachedRelatedFilter),
     )
+    list_select_related = ('equipment', 'calibrated_by')
+    autocomplete_fields = ('equipment', 'calibrated_by')
     search_fields = (
         'equipment__name',
         'equipment__serial_number',
@@ -93,6 +238,7 @@ class CalibrationAdmin(admin.ModelAdmin):
         'measurement_point',
     )
     readonly_fields = (
+        'valid_until',
         'created_at',
         'updated_at',
     )
@@ -105,6 +251,7 @@ class CalibrationAdmin(admin.ModelAdmin):
                 'calibration_standard',
                 'measurement_point',
                 'results',
+                'valid_until',
             )
         }),
         ('Additional Information', {
@@ -124,7 +271,7 @@ class CalibrationAdmin(admin.ModelAdmin):
 
 
 @admin.register(Maintenance)
-class MaintenanceAdmin(admin.ModelAdmin):
+class MaintenanceAdmin(LargeTableAdmin):
     list_display = (
         'equipment',
         'maintenance_date',
@@ -134,9 +281,11 @@ class MaintenanceAdmin(admin.ModelAdmin):
     )
     list_filter = (
         'maintenance_date',
-        'performed_by',
+        ('performed_by', CachedRelatedFilter),
         'returned_to_production',
     )
+    list_select_related = ('equipment', 'performed_by')
+    autocomplete_fields = ('equipment', 'performed_by')
     search_fields = (
         'equipment__name',
         'equipment__serial_number',
@@ -172,3 +321,67 @@ class MaintenanceAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(TechnicianShift)
+class TechnicianShiftAdmin(admin.ModelAdmin):
+    list_display = ('day', 'technician', 'max_jobs')
+    list_filter = ('day', 'technician')
+    list_select_related = ('technician',)
+    date_hierarchy = 'day'
+
+
+@admin.register(LabCapacity)
+class LabCapacityAdmin(admin.ModelAdmin):
+    list_display = ('location', 'daily_capacity')
+    search_fields = ('location',)
+
+
+@admin.register(ScheduledCalibration)
+class ScheduledCalibrationAdmin(LargeTableAdmin):
+    list_display = ('day', 'technician', 'sequence', 'equipment', 'due_date')
+    list_filter = ('day', ('technician', CachedRelatedFilter))
+    list_select_related = ('equipment', 'technician')
+    search_fields = ('equipment__name', 'equipment__serial_number', 'equipment__location')
+    date_hierarchy = 'day'
+    readonly_fields = ('created_at',)
+
+
+@admin.register(DuplicateCandidate)
+class DuplicateCandidateAdmin(admin.ModelAdmin):
+    list_display = ('duplicate', 'equipment', 'score', 'reasons', 'status', 'reviewed_by')
+    list_filter = ('status',)
+    list_select_related = ('equipment', 'duplicate', 'reviewed_by')
+    search_fields = ('equipment__serial_number', 'duplicate__serial_number')
+    readonly_fields = (
+        'equipment', 'duplicate', 'score', 'reasons', 'status', 'created_at',
+        'reviewed_at', 'reviewed_by',
+    )
+    actions = ('merge', 'dismiss')
+
+    def has_add_permission(self, request):
+        # Candidates come from find_duplicates
+        return False
+
+    @admin.action(description='Merge selected duplicates into the kept instrument')
+    def merge(self, request, queryset):
+        merged, moved, skipped = 0, 0, []
+        for candidate in queryset.select_related('equipment', 'duplicate'):
+            try:
+                moved += dedup.merge(candidate, request.user)
+            except ValueError as exc:
+                skipped.append('%s: %s' % (candidate.duplicate, exc))
+            else:
+                merged += 1
+        self.message_user(
+            request,
+            '%d duplicate(s) merged, %d record(s) moved.' % (merged, moved),
+            messages.SUCCESS,
+        )
+        for reason in skipped:
+            self.message_user(request, 'Skipped %s' % reason, messages.WARNING)
+
+    @admin.action(description='Dismiss selected candidates')
+    def dismiss(self, request, queryset):
+        count = dedup.dismiss(queryset, request.user)
+        self.message_user(request, '%d candidate(s) dismissed.' % count, messages.SUCCESS)
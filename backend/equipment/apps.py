@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class EquipmentConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "equipment"
+
+    def ready(self):
+        from . import compliance, counters, live, scheduling, sync  # noqa: F401
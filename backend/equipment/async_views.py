@@ -0,0 +1,267 @@
+# ============================================================================
+# File Path: backend/equipment/async_views.py
+# Description: Async read-only endpoints for dashboards and calendars
+# ============================================================================
+
+from datetime import datetime, time, timedelta
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from accounts.permissions import TokenHasScope, token_allows
+from calibrify.db.concurrency import run_queries
+from calibrify.events.broker import encode, get_broker
+from . import compliance, live
+from .models import Equipment, Calibration, Maintenance, ScheduledCalibration
+
+ACTIVITY_LIMIT = 20
+MAX_ACTIVITY_LIMIT = 100
+MAX_CALENDAR_DAYS = 366
+LIVE_RETRY_MS = 3000
+
+
+def _authenticate(request):
+    """Resolve the user the same way the DRF viewsets do."""
+    if request.user.is_authenticated:
+        return request.user
+    drf_request = Request(request)
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        result = authentication_class().authenticate(drf_request)
+        if result is not None:
+            if not token_allows(result[1], request.method):
+                raise exceptions.PermissionDenied(TokenHasScope.message)
+            return result[0]
+    return None
+
+
+def api_login_required(view):
+    """Async counterpart of the viewsets' ``IsAuthenticated`` permission."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            user = await sync_to_async(_authenticate)(request)
+        except exceptions.AuthenticationFailed as exc:
+            return JsonResponse({'detail': str(exc.detail)}, status=401)
+        except exceptions.PermissionDenied as exc:
+            return JsonResponse({'detail': str(exc.detail)}, status=403)
+        if user is None:
+            return JsonResponse(
+                {'detail': 'Authentication credentials were not provided.'},
+                status=403,
+            )
+        request.user = user
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+@api_login_required
+async def dashboard_summary(request):
+    """Async equivalent of ``EquipmentViewSet.dashboard_summary``."""
+    today = timezone.now().date()
+    equipment = Equipment.objects.all()
+    total, pending_calibrations, pending_maintenance, overdue = await run_queries(
+        equipment.count,
+        equipment.filter(next_calibration_date__lte=today).count,
+        Maintenance.objects.filter(returned_to_production=False).count,
+        lambda: compliance.totals()[compliance.OVERDUE],
+    )
+    return JsonResponse({
+        'total_equipment': total,
+        'pending_calibrations': pending_calibrations,
+        'pending_maintenance': pending_maintenance,
+        'overdue_items': overdue,
+    })
+
+
+def _calibration_activity(calibration):
+    status = 'pending' if not calibration.results else calibration.results.lower()
+    return {
+        'type': 'calibration',
+        'id': calibration.id,
+        'equipment': calibration.equipment_id,
+        'equipment_name': calibration.equipment.name,
+        'description': f'Calibration {status} for {calibration.equipment.name}',
+        'timestamp': calibration.updated_at,
+    }
+
+
+def _maintenance_activity(maintenance):
+    status = 'completed' if maintenance.returned_to_production else 'pending'
+    return {
+        'type': 'maintenance',
+        'id': maintenance.id,
+        'equipment': maintenance.equipment_id,
+        'equipment_name': maintenance.equipment.name,
+        'description': f'Maintenance {status} for {maintenance.equipment.name}',
+        'timestamp': maintenance.updated_at,
+    }
+
+
+@api_login_required
+async def activity_feed(request):
+    """Most recently updated calibrations and maintenance, newest first."""
+    try:
+        limit = max(1, min(int(request.GET.get('limit', ACTIVITY_LIMIT)), MAX_ACTIVITY_LIMIT))
+    except ValueError:
+        return JsonResponse({'detail': 'limit must be an integer.'}, status=400)
+    calibrations, maintenance = await run_queries(
+        lambda: list(
+            Calibration.objects.select_related('equipment')
+            .only('id', 'results', 'updated_at', 'equipment__name')
+            .order_by('-updated_at')[:limit]
+        ),
+        lambda: list(
+            Maintenance.objects.select_related('equipment')
+            .only('id', 'returned_to_production', 'updated_at', 'equipment__name')
+            .order_by('-updated_at')[:limit]
+        ),
+    )
+    activities = (
+        [_calibration_activity(item) for item in calibrations]
+        + [_maintenance_activity(item) for item in maintenance]
+    )
+    activities.sort(key=lambda item: item['timestamp'], reverse=True)
+    return JsonResponse({'results': activities[:limit]})
+
+
+def _calendar_range(request):
+    today = timezone.now().date()
+    start = parse_date(request.GET.get('start', '')) or today.replace(day=1)
+    end = parse_date(request.GET.get('end', '')) or (
+        (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    )
+    if end < start or (end - start).days > MAX_CALENDAR_DAYS:
+        raise ValueError
+    return start, end
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _event_day(value):
+    # Due dates are plain dates, history entries are timestamps
+    return timezone.localdate(value) if isinstance(value, datetime) else value
+
+
+@api_login_required
+async def calendar_events(request):
+    """
+    Calibrations, maintenance, calibration due dates and planned
+    calibrations between ``start`` (inclusive) and ``end`` (exclusive),
+    defaulting to the current month.
+    """
+    try:
+        start, end = _calendar_range(request)
+    except ValueError:
+        return JsonResponse(
+            {'detail': f'end must follow start by at most {MAX_CALENDAR_DAYS} days.'},
+            status=400,
+        )
+    # Compare timestamps against aware bounds so the date indexes apply
+    start_at, end_at = _start_of_day(start), _start_of_day(end)
+    calibrations, maintenance, due, planned = await run_queries(
+        lambda: list(
+            Calibration.objects.filter(
+                calibration_date__gte=start_at, calibration_date__lt=end_at
+            ).values_list('id', 'calibration_date', 'equipment_id', 'equipment__name')
+        ),
+        lambda: list(
+            Maintenance.objects.filter(
+                maintenance_date__gte=start_at, maintenance_date__lt=end_at
+            ).values_list(
+                'id', 'maintenance_date', 'equipment_id', 'equipment__name',
+                'returned_to_production',
+            )
+        ),
+        lambda: list(
+            Equipment.objects.filter(
+                is_active=True,
+                next_calibration_date__gte=start,
+                next_calibration_date__lt=end,
+            ).values_list('id', 'next_calibration_date', 'name')
+        ),
+        lambda: list(
+            ScheduledCalibration.objects.filter(day__gte=start, day__lt=end).values_list(
+                'id', 'day', 'equipment_id', 'equipment__name', 'technician_id',
+                'technician__username',
+            )
+        ),
+    )
+    events = [
+        {'type': 'calibration', 'id': pk, 'start': when, 'equipment': equipment_id,
+         'title': f'Calibration: {name}'}
+        for pk, when, equipment_id, name in calibrations
+    ]
+    events += [
+        {'type': 'maintenance', 'id': pk, 'start': when, 'equipment': equipment_id,
+         'title': f'Maintenance: {name}',
+         'status': 'completed' if returned else 'pending'}
+        for pk, when, equipment_id, name, returned in maintenance
+    ]
+    events += [
+        {'type': 'calibration_due', 'id': pk, 'start': when, 'equipment': pk,
+         'title': f'Calibration due: {name}'}
+        for pk, when, name in due
+    ]
+    events += [
+        {'type': 'calibration_scheduled', 'id': pk, 'start': when, 'equipment': equipment_id,
+         'title': f'Scheduled: {name} ({username})', 'technician': technician_id}
+        for pk, when, equipment_id, name, technician_id, username in planned
+    ]
+    events.sort(key=lambda event: _event_day(event['start']))
+    return JsonResponse({'start': start, 'end': end, 'results': events})
+
+
+async def _live_stream(subscription, snapshot):
+    broker = get_broker()
+    deadline = timezone.now() + timedelta(seconds=settings.LIVE_EVENTS_MAX_SECONDS)
+    try:
+        yield b'retry: %d\n\n' % LIVE_RETRY_MS
+        yield encode('summary', snapshot)
+        while timezone.now() < deadline:
+            message = await subscription.get(settings.LIVE_EVENTS_HEARTBEAT_SECONDS)
+            if message is None:
+                break
+            # An empty message is a heartbeat, keeping proxies from timing out
+            yield message or b': keepalive\n\n'
+    finally:
+        broker.unsubscribe(subscription)
+
+
+@api_login_required
+async def live_dashboard(request):
+    """
+    Server-sent events for dashboard screens, replacing polling.
+
+    Sends the full ``summary`` on connect, then ``summary`` events holding
+    only the counters that changed and an ``activity`` event per saved
+    calibration or maintenance record. Streams end after
+    ``LIVE_EVENTS_MAX_SECONDS`` and the browser reconnects by itself.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'detail': 'Live updates need the ASGI server (calibrify.asgi).'},
+            status=501,
+        )
+    # Subscribe before the snapshot so no change can fall in between
+    subscription = get_broker().subscribe()
+    try:
+        snapshot = await sync_to_async(live.summary)()
+    except BaseException:
+        get_broker().unsubscribe(subscription)
+        raise
+    response = StreamingHttpResponse(
+        _live_stream(subscription, snapshot), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx must not buffer the stream
+    return response
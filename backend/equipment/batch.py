@@ -0,0 +1,162 @@
+# ============================================================================
+# File Path: backend/equipment/batch.py
+# Description: Apply an ordered list of create and update operations at once
+# ============================================================================
+
+from django.db import IntegrityError, transaction
+
+from . import compliance, counters, live
+from .models import Equipment, Calibration, Maintenance
+from .serializers import (
+    EquipmentSerializer,
+    CalibrationSerializer,
+    MaintenanceSerializer,
+)
+
+# model name -> (model, serializer, field recording the requesting user)
+MODELS = {
+    'equipment': (Equipment, EquipmentSerializer, 'created_by'),
+    'calibration': (Calibration, CalibrationSerializer, 'calibrated_by'),
+    'maintenance': (Maintenance, MaintenanceSerializer, 'performed_by'),
+}
+
+# Creates that can share one INSERT. Calibration.save() also moves the
+# equipment's due dates, so calibrations are always saved one by one.
+BULK_CREATE = {'equipment', 'maintenance'}
+
+
+class BatchError(Exception):
+    """An operation failed; the whole batch is rolled back."""
+
+    def __init__(self, index, errors):
+        super().__init__(index, errors)
+        self.index = index
+        self.errors = errors
+
+
+class Batch:
+    """
+    Run operations in order inside one transaction.
+
+    Each operation is validated by the model's regular API serializer.
+    Consecutive creates of the same bulk-capable model are held and
+    written with a single ``bulk_create``; they are flushed before anything
+    that could depend on them, including a reference to one of their
+    client-side ``ref`` ids.
+    """
+
+    def __init__(self, operations, request):
+        self.operations = operations
+        self.request = request
+        self.user = request.user
+        self.refs = {}
+        self.results = [None] * len(operations)
+        self.pending = []
+
+    def run(self):
+        try:
+            with transaction.atomic():
+                for index, operation in enumerate(self.operations):
+                    self._apply(index, operation)
+                self._flush()
+        except IntegrityError as exc:
+            # Conflicts inside a pending bulk insert only surface here
+            raise BatchError(None, {'non_field_errors': [str(exc)]})
+        return self.results
+
+    def _apply(self, index, operation):
+        if not isinstance(operation, dict):
+            raise BatchError(index, {'non_field_errors': ['Operation must be an object.']})
+        action = operation.get('op')
+        if action not in ('create', 'update'):
+            raise BatchError(index, {'op': ['Must be "create" or "update".']})
+        if operation.get('model') not in MODELS:
+            raise BatchError(index, {'model': [f'Must be one of {", ".join(MODELS)}.']})
+        if not isinstance(operation.get('data', {}), dict):
+            raise BatchError(index, {'data': ['Must be an object.']})
+
+        model_name = operation['model']
+        if not (action == 'create' and model_name in BULK_CREATE
+                and all(name == model_name for _, name, _, _ in self.pending)):
+            self._flush()
+        data = {
+            field: self._resolve(index, value)
+            for field, value in operation.get('data', {}).items()
+        }
+        if action == 'create':
+            self._create(index, model_name, operation.get('ref'), data)
+        else:
+            self._update(index, model_name, self._resolve(index, operation.get('id')), data)
+
+    def _resolve(self, index, value):
+        """Replace ``{"$ref": "<ref>"}`` with the id created for that ref."""
+        if not (isinstance(value, dict) and list(value) == ['$ref']):
+            return value
+        ref = value['$ref']
+        if any(ref == pending_ref for _, _, _, pending_ref in self.pending):
+            self._flush()
+        if ref not in self.refs:
+            raise BatchError(index, {'non_field_errors': [f'Unknown ref {ref!r}.']})
+        return self.refs[ref]
+
+    def _serializer(self, model_name, *args, **kwargs):
+        serializer_class = MODELS[model_name][1]
+        return serializer_class(*args, context={'request': self.request}, **kwargs)
+
+    def _create(self, index, model_name, ref, data):
+        if ref is not None and (
+            ref in self.refs or any(ref == other for _, _, _, other in self.pending)
+        ):
+            raise BatchError(index, {'ref': [f'Duplicate ref {ref!r}.']})
+        model, _, user_field = MODELS[model_name]
+        serializer = self._serializer(model_name, data=data)
+        if not serializer.is_valid():
+            raise BatchError(index, serializer.errors)
+        if model_name in BULK_CREATE:
+            instance = model(**serializer.validated_data, **{user_field: self.user})
+            self.pending.append((index, model_name, instance, ref))
+            return
+        instance = serializer.save(**{user_field: self.user})
+        self._record(index, 'create', model_name, instance, ref)
+
+    def _update(self, index, model_name, pk, data):
+        model = MODELS[model_name][0]
+        try:
+            instance = model.objects.get(pk=pk)
+        except (model.DoesNotExist, TypeError, ValueError):
+            raise BatchError(index, {'id': [f'No {model_name} with id {pk!r}.']})
+        serializer = self._serializer(model_name, instance, data=data, partial=True)
+        if not serializer.is_valid():
+            raise BatchError(index, serializer.errors)
+        serializer.save()
+        self._record(index, 'update', model_name, instance)
+
+    def _flush(self):
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, []
+        model = MODELS[pending[0][1]][0]
+        instances = model.objects.bulk_create([instance for _, _, instance, _ in pending])
+        # bulk_create sends no post_save; do what its receivers would have
+        if model is Equipment:
+            compliance.rebuild({instance.location for instance in instances})
+        else:
+            counters.created(model, instances)
+        for instance in instances:
+            live.record_change(model, instance, created=True)
+        for index, model_name, instance, ref in pending:
+            self._record(index, 'create', model_name, instance, ref)
+
+    def _record(self, index, action, model_name, instance, ref=None):
+        if ref is not None:
+            self.refs[ref] = instance.pk
+        result = {
+            'index': index,
+            'op': action,
+            'model': model_name,
+            'id': instance.pk,
+            'status': 201 if action == 'create' else 200,
+        }
+        if ref is not None:
+            result['ref'] = ref
+        self.results[index] = result
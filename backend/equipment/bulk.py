@@ -0,0 +1,200 @@
+# ============================================================================
+# File Path: backend/equipment/bulk.py
+# Description: Set-based updates applied to many instruments at once
+# ============================================================================
+
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import (
+    Case, DateField, Exists, ExpressionWrapper, F, OuterRef, Q, Subquery, Value, When,
+)
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import compliance, live, scheduling
+from .models import Calibration, calibration_interval_days
+
+# Most instruments one bulk request may name
+MAX_ITEMS = 5000
+
+
+def relocate(queryset, location):
+    """Move every instrument in ``queryset`` to ``location``."""
+    return _update(queryset, location=location)
+
+
+def deactivate(queryset):
+    """Retire every instrument in ``queryset``."""
+    return _update(queryset, is_active=False)
+
+
+def change_interval(queryset, calibration_interval_type, calibration_interval_value):
+    """
+    Set a new calibration interval and move each instrument's next due
+    date to its last calibration plus the new interval.
+    """
+    days = calibration_interval_days(calibration_interval_type, calibration_interval_value)
+    return _update(
+        queryset,
+        calibration_interval_type=calibration_interval_type,
+        calibration_interval_value=calibration_interval_value,
+        next_calibration_date=ExpressionWrapper(
+            F('last_calibration_date') + timedelta(days=days),
+            output_field=DateField(),
+        ),
+    )
+
+
+def record_calibrations(queryset, user, calibration_date=None, **fields):
+    """
+    Record the same calibration for every instrument in ``queryset``.
+
+    The calibrations are written with one ``bulk_create`` and the due dates
+    with one ``UPDATE``, grouped by interval, instead of the per-row
+    ``Calibration.save()`` that also saves its equipment. Returns the new
+    calibrations.
+    """
+    calibration_date = calibration_date or timezone.now()
+    with transaction.atomic():
+        intervals = {
+            equipment_id: calibration_interval_days(interval_type, interval_value)
+            for equipment_id, interval_type, interval_value in queryset.values_list(
+                'id', 'calibration_interval_type', 'calibration_interval_value'
+            )
+        }
+        if not intervals:
+            return []
+        equipment_ids = list(intervals)
+        day = calibration_date.date()
+        calibrations = Calibration.objects.bulk_create(
+            Calibration(
+                equipment_id=equipment_id,
+                calibration_date=calibration_date,
+                calibrated_by=user,
+                valid_until=day + timedelta(days=intervals[equipment_id]),
+                **fields,
+            )
+            for equipment_id in equipment_ids
+        )
+        equipment = queryset.model.objects.filter(id__in=equipment_ids)
+        intervals = equipment.values_list(
+            'calibration_interval_type', 'calibration_interval_value'
+        ).distinct()
+        # As in Calibration.save(), a backdated campaign leaves the due
+        # dates of instruments calibrated since alone
+        moved = list(
+            equipment.exclude(last_calibration_date__gt=day).values_list('id', flat=True)
+        )
+        later = When(last_calibration_date__gt=day, then=F('next_calibration_date'))
+        _update(
+            equipment,
+            last_calibration_date=Case(
+                When(last_calibration_date__gt=day, then=F('last_calibration_date')),
+                default=Value(day),
+                output_field=DateField(),
+            ),
+            calibration_count=F('calibration_count') + 1,
+            next_calibration_date=Case(
+                later,
+                *(
+                    When(
+                        calibration_interval_type=interval_type,
+                        calibration_interval_value=interval_value,
+                        then=Value(day + timedelta(
+                            days=calibration_interval_days(interval_type, interval_value)
+                        )),
+                    )
+                    for interval_type, interval_value in intervals
+                ),
+                output_field=DateField(),
+            ),
+        )
+        scheduling.unschedule(moved)
+        for calibration in calibrations:
+            live.record_change(Calibration, calibration, created=True)
+    return calibrations
+
+
+def sync_due_dates(queryset):
+    """
+    Move each instrument's last calibration date up to its latest recorded
+    calibration, and its next date to that plus its interval, for history
+    written without ``Calibration.save()`` (imports, restores).
+    """
+    latest = Subquery(
+        Calibration.objects.filter(equipment=OuterRef('pk'))
+        .order_by('-calibration_date')
+        .annotate(day=TruncDate('calibration_date', tzinfo=dt_timezone.utc))
+        .values('day')[:1]
+    )
+    calibrated = queryset.filter(Exists(Calibration.objects.filter(equipment=OuterRef('pk'))))
+    with transaction.atomic():
+        calibrated.update(last_calibration_date=Case(
+            When(
+                Q(last_calibration_date__isnull=True) | Q(last_calibration_date__lt=latest),
+                then=latest,
+            ),
+            default=F('last_calibration_date'),
+        ))
+        intervals = calibrated.values_list(
+            'calibration_interval_type', 'calibration_interval_value'
+        ).distinct()
+        return _update(calibrated, next_calibration_date=Case(
+            *(
+                When(
+                    calibration_interval_type=interval_type,
+                    calibration_interval_value=interval_value,
+                    then=ExpressionWrapper(
+                        F('last_calibration_date') + timedelta(
+                            days=calibration_interval_days(interval_type, interval_value)
+                        ),
+                        output_field=DateField(),
+                    ),
+                )
+                for interval_type, interval_value in intervals
+            ),
+            default=F('next_calibration_date'),
+            output_field=DateField(),
+        ))
+
+
+def fill_validity(calibrations):
+    """
+    Set the ``valid_until`` of calibrations written without
+    ``Calibration.save()`` (imports, restores): their day plus their
+    instrument's current interval, one ``UPDATE`` per interval.
+    """
+    pending = calibrations.filter(valid_until__isnull=True)
+    intervals = pending.values_list(
+        'equipment__calibration_interval_type', 'equipment__calibration_interval_value'
+    ).order_by().distinct()
+    updated = 0
+    for interval_type, interval_value in list(intervals):
+        updated += pending.filter(
+            equipment__calibration_interval_type=interval_type,
+            equipment__calibration_interval_value=interval_value,
+        ).update(valid_until=ExpressionWrapper(
+            TruncDate('calibration_date', tzinfo=dt_timezone.utc) + timedelta(
+                days=calibration_interval_days(interval_type, interval_value)
+            ),
+            output_field=DateField(),
+        ))
+    return updated
+
+
+def _update(queryset, **values):
+    """
+    One ``UPDATE`` for the whole selection. ``updated_at`` is set by hand
+    (``auto_now`` only applies to ``save()``) so change feeds pick the rows
+    up, and the dashboard and the compliance counts of every location
+    touched are refreshed since no signals are sent.
+    """
+    with transaction.atomic():
+        locations = set(queryset.order_by().values_list('location', flat=True).distinct())
+        if 'location' in values:
+            locations.add(values['location'])
+        count = queryset.update(updated_at=timezone.now(), **values)
+        compliance.rebuild(locations, using=queryset.db)
+        live.record_bulk_change(using=queryset.db)
+    return count
@@ -0,0 +1,352 @@
+# ============================================================================
+# File Path: backend/equipment/compliance.py
+# Description: Overdue and due-soon calibration queues per location, with
+#              their counts kept current as due dates change
+# ============================================================================
+
+import base64
+import json
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import ComplianceSummary, Equipment
+
+OVERDUE = 'overdue'
+DUE_SOON = 'due_soon'
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+# Equipment columns that decide which queue an instrument is in
+TRACKED = ('location', 'next_calibration_date', 'is_active')
+
+
+def today():
+    return timezone.now().date()
+
+
+def due_soon_days():
+    return settings.COMPLIANCE_DUE_SOON_DAYS
+
+
+def state(location, next_calibration_date, is_active=True):
+    """Where an instrument counts: ``(location, due date)``, or ``None`` if retired."""
+    return (location, next_calibration_date) if is_active else None
+
+
+def bucket(next_calibration_date, day, days):
+    if next_calibration_date is None:
+        return None
+    if next_calibration_date < day:
+        return OVERDUE
+    if next_calibration_date <= day + timedelta(days=days):
+        return DUE_SOON
+    return None
+
+
+def _plus(field, amount):
+    return Greatest(F(field) + amount, Value(0))
+
+
+def _counts(equipment, day, days):
+    """``{location: (overdue, due soon)}`` in one pass over the due-date index."""
+    rows = (
+        equipment.filter(is_active=True, next_calibration_date__lte=day + timedelta(days=days))
+        .order_by()
+        .values('location')
+        .annotate(
+            overdue=Count('id', filter=Q(next_calibration_date__lt=day)),
+            due_soon=Count('id', filter=Q(next_calibration_date__gte=day)),
+        )
+    )
+    return {row['location']: (row['overdue'], row['due_soon']) for row in rows}
+
+
+def _lock(location, using):
+    """
+    The locked summary row of ``location``, or ``None`` when it had to be
+    created: it is then counted from the equipment table, which already
+    holds the change being applied.
+    """
+    rows = ComplianceSummary.objects.using(using).select_for_update()
+    try:
+        return rows.get(location=location)
+    except ComplianceSummary.DoesNotExist:
+        pass
+    day, days = today(), due_soon_days()
+    overdue, due_soon = _counts(
+        Equipment.objects.using(using).filter(location=location), day, days
+    ).get(location, (0, 0))
+    try:
+        with transaction.atomic(using=using):
+            ComplianceSummary.objects.using(using).create(
+                location=location, as_of=day, due_soon_days=days,
+                overdue=overdue, due_soon=due_soon,
+            )
+        return None
+    except IntegrityError:
+        # Created concurrently, without the change made in this transaction
+        return rows.get(location=location)
+
+
+def moved(before, after, using=None):
+    """
+    Move one instrument between queues, from ``before`` to ``after`` (as
+    returned by ``state``). Each location's row is locked, so the buckets
+    are computed against the ``as_of`` the row really has.
+    """
+    if before == after:
+        return
+    with transaction.atomic(using=using):
+        for location in sorted({item[0] for item in (before, after) if item}):
+            row = _lock(location, using)
+            if row is None:
+                continue
+            change = defaultdict(int)
+            for item, sign in ((before, -1), (after, 1)):
+                if item and item[0] == location:
+                    name = bucket(item[1], row.as_of, row.due_soon_days)
+                    if name:
+                        change[name] += sign
+            values = {name: _plus(name, amount) for name, amount in change.items() if amount}
+            if values:
+                ComplianceSummary.objects.using(using).filter(pk=row.pk).update(
+                    updated_at=timezone.now(), **values
+                )
+
+
+def rebuild(locations=None, day=None, using=None):
+    """
+    Recount ``locations`` (every location by default) from the equipment
+    table as of ``day``. Used after set-based updates, whose previous due
+    dates are not known row by row.
+    """
+    day, days = day or today(), due_soon_days()
+    with transaction.atomic(using=using):
+        rows = ComplianceSummary.objects.using(using).select_for_update()
+        equipment = Equipment.objects.using(using)
+        if locations is not None:
+            locations = set(locations)
+            if not locations:
+                return
+            rows = rows.filter(location__in=locations)
+            equipment = equipment.filter(location__in=locations)
+        existing = set(rows.values_list('location', flat=True))
+        counts = _counts(equipment, day, days)
+        now = timezone.now()
+        for location in existing:
+            overdue, due_soon = counts.get(location, (0, 0))
+            ComplianceSummary.objects.using(using).filter(location=location).update(
+                as_of=day, due_soon_days=days, overdue=overdue, due_soon=due_soon,
+                updated_at=now,
+            )
+        ComplianceSummary.objects.using(using).bulk_create(
+            [
+                ComplianceSummary(
+                    location=location, as_of=day, due_soon_days=days,
+                    overdue=overdue, due_soon=due_soon,
+                )
+                for location, (overdue, due_soon) in counts.items()
+                if location not in existing
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def rollover(day=None, using=None):
+    """
+    Move the rows to ``day``: instruments whose due date has passed since
+    ``as_of`` become overdue and those now inside the due-soon window join
+    it. Only those two date ranges are read, so this stays cheap however
+    large the fleet. Rows more than a window behind, or built with another
+    ``COMPLIANCE_DUE_SOON_DAYS``, are recounted. Returns the rows moved.
+    """
+    day = day or today()
+    days = due_soon_days()
+    horizon = timedelta(days=days)
+    with transaction.atomic(using=using):
+        rows = list(
+            ComplianceSummary.objects.using(using).select_for_update()
+            .filter(Q(as_of__lt=day) | ~Q(due_soon_days=days))
+            .only('location', 'as_of', 'due_soon_days')
+        )
+        stale = []
+        by_day = defaultdict(list)
+        for row in rows:
+            if row.due_soon_days != days or not timedelta(0) < day - row.as_of <= horizon:
+                stale.append(row.location)
+            else:
+                by_day[row.as_of].append(row.location)
+        now = timezone.now()
+        for as_of, locations in by_day.items():
+            moves = {
+                row['location']: row for row in
+                Equipment.objects.using(using)
+                .filter(is_active=True, location__in=locations)
+                .filter(
+                    Q(next_calibration_date__gte=as_of, next_calibration_date__lt=day)
+                    | Q(next_calibration_date__gt=as_of + horizon,
+                        next_calibration_date__lte=day + horizon)
+                )
+                .order_by()
+                .values('location')
+                .annotate(
+                    passed=Count('id', filter=Q(next_calibration_date__lt=day)),
+                    arrived=Count('id', filter=Q(next_calibration_date__gt=as_of + horizon)),
+                )
+            }
+            unchanged = [location for location in locations if location not in moves]
+            ComplianceSummary.objects.using(using).filter(location__in=unchanged).update(
+                as_of=day, updated_at=now
+            )
+            for location, row in moves.items():
+                ComplianceSummary.objects.using(using).filter(location=location).update(
+                    as_of=day,
+                    updated_at=now,
+                    overdue=_plus('overdue', row['passed']),
+                    due_soon=_plus('due_soon', row['arrived'] - row['passed']),
+                )
+        if stale:
+            rebuild(stale, day, using=using)
+    return len(rows)
+
+
+def summaries(location=None, using=None):
+    """
+    Summary rows, one per location. If the daily rollover has not run yet
+    today the rows are rolled over first, so counts are never a day behind.
+    """
+    rows = ComplianceSummary.objects.using(using)
+    if location:
+        rows = rows.filter(location=location)
+    found = list(rows)
+    day = today()
+    if any(row.as_of < day or row.due_soon_days != due_soon_days() for row in found):
+        rollover(day, using=using)
+        found = list(rows.all())
+    return found
+
+
+def totals(location=None, using=None):
+    """Overdue and due-soon counts across locations, read from the summaries."""
+    found = summaries(location, using)
+    return {
+        OVERDUE: sum(row.overdue for row in found),
+        DUE_SOON: sum(row.due_soon for row in found),
+    }
+
+
+def queue(name, location=None, days=None, day=None, using=None):
+    """
+    Active instruments of one queue, soonest due first: ``overdue``, or
+    ``due_soon`` within ``days`` (``COMPLIANCE_DUE_SOON_DAYS`` by default).
+    Ordered by the ``(location, next_calibration_date, id)`` index.
+    """
+    day = day or today()
+    equipment = Equipment.objects.using(using).filter(is_active=True)
+    if location:
+        equipment = equipment.filter(location=location)
+    if name == OVERDUE:
+        equipment = equipment.filter(next_calibration_date__lt=day)
+    else:
+        days = due_soon_days() if days is None else days
+        equipment = equipment.filter(
+            next_calibration_date__gte=day,
+            next_calibration_date__lte=day + timedelta(days=days),
+        )
+    return equipment.order_by('next_calibration_date', 'id')
+
+
+def count(name, location=None, days=None, using=None):
+    """
+    Size of a queue. The overdue queue and the default due-soon window come
+    from the summaries; other windows are counted from the index.
+    """
+    if name == OVERDUE or days is None or days == due_soon_days():
+        return totals(location, using)[name]
+    return queue(name, location, days, using=using).count()
+
+
+def encode_cursor(instrument):
+    position = [instrument.next_calibration_date.isoformat(), instrument.pk]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip('=')
+
+
+def page(queryset, cursor=None, limit=DEFAULT_LIMIT):
+    """
+    One page of a queue after ``cursor``, keyed on ``(due date, id)`` so
+    deep pages cost the same as the first. Returns the instruments and the
+    cursor of the next page, or ``None`` on the last one.
+    """
+    if cursor:
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            due, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            due, pk = parse_date(due), int(pk)
+        except (TypeError, ValueError):
+            raise ValueError('Invalid cursor.')
+        if due is None:
+            raise ValueError('Invalid cursor.')
+        queryset = queryset.filter(
+            Q(next_calibration_date__gt=due) | Q(next_calibration_date=due, id__gt=pk)
+        )
+    items = list(queryset[:limit + 1])
+    if len(items) > limit:
+        return items[:limit], encode_cursor(items[limit - 1])
+    return items, None
+
+
+def parse_limit(value):
+    if value in (None, ''):
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError('limit must be an integer.')
+    return max(1, min(limit, MAX_LIMIT))
+
+
+@receiver(pre_save, sender=Equipment)
+def remember_state(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    """Keep the queue an instrument is in before an update moves it."""
+    instance._compliance = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(TRACKED):
+        return
+    instance._compliance = (
+        sender.objects.using(using).filter(pk=instance.pk).values(*TRACKED).first()
+    )
+
+
+@receiver(post_save, sender=Equipment)
+def track_equipment(sender, instance, created=False, raw=False, using=None,
+                    update_fields=None, **kwargs):
+    if raw:
+        return
+    if created:
+        moved(None, state(*(getattr(instance, field) for field in TRACKED)), using)
+        return
+    previous = getattr(instance, '_compliance', None)
+    if previous is None:
+        return
+    written = TRACKED if update_fields is None else update_fields
+    current = [
+        getattr(instance, field) if field in written else previous[field]
+        for field in TRACKED
+    ]
+    moved(state(*(previous[field] for field in TRACKED)), state(*current), using)
+
+
+@receiver(post_delete, sender=Equipment)
+def untrack_equipment(sender, instance, using=None, **kwargs):
+    moved(state(*(getattr(instance, field) for field in TRACKED)), None, using)
@@ -0,0 +1,197 @@
+# ============================================================================
+# File Path: backend/equipment/counters.py
+# Description: Per-equipment history counters kept current with F() updates
+# ============================================================================
+
+from collections import defaultdict
+
+from django.db.models import Case, Count, F, OuterRef, Q, QuerySet, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Equipment, Calibration, Maintenance
+
+
+def _latest_maintenance():
+    return Subquery(
+        Maintenance.objects.filter(equipment=OuterRef('pk'))
+        .order_by('-maintenance_date')
+        .values('maintenance_date')[:1]
+    )
+
+
+def _change(equipment_id, using=None, **values):
+    """
+    One ``UPDATE`` of an instrument's counters, relative to what is stored
+    so concurrent changes add up. ``updated_at`` moves so change feeds send
+    the new figures.
+    """
+    Equipment.objects.using(using).filter(pk=equipment_id).update(
+        updated_at=timezone.now(), **values
+    )
+
+
+def _plus(field, amount):
+    # Never below zero, even if the stored count has drifted (see refresh)
+    return Greatest(F(field) + amount, Value(0))
+
+
+def _later(moment):
+    return Case(
+        When(
+            Q(last_maintenance_date__isnull=True) | Q(last_maintenance_date__lt=moment),
+            then=Value(moment),
+        ),
+        default=F('last_maintenance_date'),
+    )
+
+
+def created(model, instances, using=None):
+    """
+    Count history rows written without ``save()`` (``bulk_create``), with
+    one update per instrument.
+    """
+    totals = defaultdict(lambda: [0, None])
+    for instance in instances:
+        total = totals[instance.equipment_id]
+        if model is Calibration:
+            total[0] += 1
+        else:
+            total[0] += not instance.returned_to_production
+            if total[1] is None or instance.maintenance_date > total[1]:
+                total[1] = instance.maintenance_date
+    for equipment_id, (count, latest) in totals.items():
+        if model is Calibration:
+            _change(equipment_id, using, calibration_count=_plus('calibration_count', count))
+        else:
+            _change(
+                equipment_id, using,
+                open_maintenance_count=_plus('open_maintenance_count', count),
+                last_maintenance_date=_later(latest),
+            )
+
+
+@receiver(pre_save, sender=Calibration)
+@receiver(pre_save, sender=Maintenance)
+def remember_previous(sender, instance, raw=False, using=None, **kwargs):
+    """Keep the stored values an update is about to replace."""
+    instance._counted = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    fields = ['equipment_id']
+    if sender is Maintenance:
+        fields += ['returned_to_production', 'maintenance_date']
+    instance._counted = sender.objects.using(using).filter(pk=instance.pk).values(*fields).first()
+
+
+@receiver(post_save, sender=Calibration)
+def count_calibration(sender, instance, created=False, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_counted', None)
+    if created or previous is None:
+        _change(instance.equipment_id, using, calibration_count=_plus('calibration_count', 1))
+    elif previous['equipment_id'] != instance.equipment_id:
+        _change(previous['equipment_id'], using, calibration_count=_plus('calibration_count', -1))
+        _change(instance.equipment_id, using, calibration_count=_plus('calibration_count', 1))
+
+
+@receiver(post_save, sender=Maintenance)
+def count_maintenance(sender, instance, created=False, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    is_open = int(not instance.returned_to_production)
+    previous = getattr(instance, '_counted', None)
+    if created or previous is None:
+        _change(
+            instance.equipment_id, using,
+            open_maintenance_count=_plus('open_maintenance_count', is_open),
+            last_maintenance_date=_later(instance.maintenance_date),
+        )
+        return
+    was_open = int(not previous['returned_to_production'])
+    if previous['equipment_id'] != instance.equipment_id:
+        _change(
+            previous['equipment_id'], using,
+            open_maintenance_count=_plus('open_maintenance_count', -was_open),
+            last_maintenance_date=_latest_maintenance(),
+        )
+        _change(
+            instance.equipment_id, using,
+            open_maintenance_count=_plus('open_maintenance_count', is_open),
+            last_maintenance_date=_later(instance.maintenance_date),
+        )
+    elif was_open != is_open or previous['maintenance_date'] != instance.maintenance_date:
+        _change(
+            instance.equipment_id, using,
+            open_maintenance_count=_plus('open_maintenance_count', is_open - was_open),
+            last_maintenance_date=_latest_maintenance(),
+        )
+
+
+def _instrument_deleted(origin):
+    """Whether a deletion cascades from instruments, whose counters go with them."""
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(model, Equipment)
+
+
+@receiver(post_delete, sender=Calibration)
+def uncount_calibration(sender, instance, using=None, origin=None, **kwargs):
+    if _instrument_deleted(origin):
+        return
+    _change(instance.equipment_id, using, calibration_count=_plus('calibration_count', -1))
+
+
+@receiver(post_delete, sender=Maintenance)
+def uncount_maintenance(sender, instance, using=None, origin=None, **kwargs):
+    if _instrument_deleted(origin):
+        return
+    _change(
+        instance.equipment_id, using,
+        open_maintenance_count=_plus(
+            'open_maintenance_count', -int(not instance.returned_to_production)
+        ),
+        last_maintenance_date=_latest_maintenance(),
+    )
+
+
+def _calibration_total():
+    return Coalesce(Subquery(
+        Calibration.objects.filter(equipment=OuterRef('pk'))
+        .order_by().values('equipment').annotate(total=Count('id')).values('total')
+    ), 0)
+
+
+def _open_maintenance_total():
+    return Coalesce(Subquery(
+        Maintenance.objects.filter(equipment=OuterRef('pk'), returned_to_production=False)
+        .order_by().values('equipment').annotate(total=Count('id')).values('total')
+    ), 0)
+
+
+def drifted(queryset):
+    """Instruments whose stored counters differ from their history."""
+    return queryset.annotate(
+        expected_calibrations=_calibration_total(),
+        expected_open_maintenance=_open_maintenance_total(),
+        expected_last_maintenance=_latest_maintenance(),
+    ).exclude(
+        Q(calibration_count=F('expected_calibrations'))
+        & Q(open_maintenance_count=F('expected_open_maintenance'))
+        & (
+            Q(last_maintenance_date=F('expected_last_maintenance'))
+            | Q(last_maintenance_date__isnull=True, expected_last_maintenance__isnull=True)
+        )
+    )
+
+
+def refresh(queryset):
+    """Recompute the counters of every instrument in ``queryset`` in one update."""
+    return queryset.update(
+        updated_at=timezone.now(),
+        calibration_count=_calibration_total(),
+        open_maintenance_count=_open_maintenance_total(),
+        last_maintenance_date=_latest_maintenance(),
+    )
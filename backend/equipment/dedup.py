@@ -0,0 +1,240 @@
+# ============================================================================
+# File Path: backend/equipment/dedup.py
+# Description: Duplicate instrument detection by blocking keys and similarity
+#              scoring, and merging of the duplicates found
+# ============================================================================
+
+import re
+from collections import defaultdict
+from difflib import SequenceMatcher
+from itertools import combinations
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Q, TextField, Value, When
+from django.db.models.functions import Concat
+from django.utils import timezone
+
+from . import bulk, counters
+from .models import (
+    Calibration, DuplicateCandidate, Equipment, Maintenance, ScheduledCalibration,
+)
+
+# Weight of each field in the score; serial numbers decide most
+WEIGHTS = (('serial', 0.6), ('model', 0.25), ('manufacturer', 0.15))
+
+# Company-form words ignored when comparing manufacturers
+COMPANY_WORDS = {
+    'AG', 'BV', 'CO', 'COMPANY', 'CORP', 'CORPORATION', 'GMBH', 'INC',
+    'INCORPORATED', 'KG', 'LLC', 'LTD', 'LIMITED', 'PLC', 'SA', 'SAS', 'SRL',
+}
+
+# Labels some registers put in front of the serial number itself: "S/N",
+# "SN-", "Serial No." (but not the "SN" of "SNAP-1")
+SERIAL_PREFIX = re.compile(
+    r'^\s*(?:SERIAL(?:\s*(?:NO|NUMBER))?|S\s*/?\s*N(?:O)?)(?:\s*[.:#/-]\s*|\s+|(?=\d))'
+)
+
+
+def normalize(value):
+    """Upper case, letters and digits only: ``'m-100 b'`` is ``'M100B'``."""
+    return re.sub(r'[^A-Z0-9]', '', (value or '').upper())
+
+
+def normalize_serial(value):
+    """``'S/N 000123-A'`` and ``'123a'`` are both ``'123A'``."""
+    serial = normalize(SERIAL_PREFIX.sub('', (value or '').upper()))
+    return serial.lstrip('0') or serial
+
+
+def normalize_manufacturer(value):
+    """``'Fluke Corp.'`` and ``'FLUKE'`` are both ``'FLUKE'``."""
+    words = re.findall(r'[A-Z0-9]+', (value or '').upper())
+    return ''.join(word for word in words if word not in COMPANY_WORDS) or ''.join(words)
+
+
+class Record:
+    """The normalised fields of one instrument."""
+
+    __slots__ = ('id', 'serial', 'model', 'manufacturer', 'calibration_count')
+
+    def __init__(self, pk, serial_number, manufacturer, model_number, calibration_count=0):
+        self.id = pk
+        self.serial = normalize_serial(serial_number)
+        self.model = normalize(model_number)
+        self.manufacturer = normalize_manufacturer(manufacturer)
+        self.calibration_count = calibration_count
+
+    def keys(self):
+        """
+        Blocking keys: only instruments sharing one are compared. Each
+        survives a different kind of mistake: punctuation and case (the
+        normalised serial), letters around the number (its digits), and a
+        typo in one half of the serial (the other half, with the model).
+        """
+        found = {('serial', self.serial)}
+        digits = re.sub(r'\D', '', self.serial)
+        if len(digits) >= 4:
+            found.add(('digits', digits))
+        if len(self.serial) >= 6:
+            half = max(4, len(self.serial) // 2)
+            found.add(('head', self.model, self.serial[:half]))
+            found.add(('tail', self.model, self.serial[-half:]))
+        return found
+
+
+def similarity(first, second):
+    if not first or not second:
+        return 0.0
+    if first == second:
+        return 1.0
+    return SequenceMatcher(None, first, second).ratio()
+
+
+def score(first, second):
+    """Weighted similarity of two records, and the fields that matched."""
+    total, matched = 0.0, []
+    for field, weight in WEIGHTS:
+        ratio = similarity(getattr(first, field), getattr(second, field))
+        total += weight * ratio
+        if ratio == 1.0:
+            matched.append(field)
+    return total, matched
+
+
+def find(records, threshold=None, max_block=None):
+    """
+    Likely duplicates among ``records``, as ``(kept, duplicate, score,
+    reasons)`` with the record having more calibrations (then the older
+    one) kept. Records are only compared within a block, so the work grows
+    with the block sizes rather than with the square of the fleet; blocks
+    larger than ``max_block`` are too generic to say anything and skipped.
+    Returns the candidates and the number of pairs compared.
+    """
+    threshold = settings.DEDUP_THRESHOLD if threshold is None else threshold
+    max_block = settings.DEDUP_MAX_BLOCK if max_block is None else max_block
+    blocks = defaultdict(list)
+    for record in records:
+        for key in record.keys():
+            blocks[key].append(record)
+    seen = set()
+    found = []
+    for members in blocks.values():
+        if len(members) < 2 or len(members) > max_block:
+            continue
+        for first, second in combinations(members, 2):
+            pair = (first.id, second.id) if first.id < second.id else (second.id, first.id)
+            if pair in seen:
+                continue
+            seen.add(pair)
+            value, matched = score(first, second)
+            if value >= threshold:
+                kept, duplicate = sorted(
+                    (first, second), key=lambda record: (-record.calibration_count, record.id)
+                )
+                found.append((kept.id, duplicate.id, round(value, 4), ', '.join(matched)))
+    found.sort(key=lambda item: (-item[2], item[0], item[1]))
+    return found, len(seen)
+
+
+def scan(using=None):
+    """
+    Compare the active instruments and store what looks duplicated as
+    pending candidates. Pairs already merged or dismissed are not raised
+    again; pending ones that no longer match are dropped. Returns
+    ``{'compared', 'found', 'created'}``.
+    """
+    records = [
+        Record(*row) for row in Equipment.objects.using(using).filter(is_active=True)
+        .order_by().values_list(
+            'id', 'serial_number', 'manufacturer', 'model_number', 'calibration_count'
+        )
+    ]
+    found, compared = find(records)
+    candidates = DuplicateCandidate.objects.using(using)
+    with transaction.atomic(using=using):
+        existing = {
+            frozenset(pair): (pk, status, stored)
+            for pk, status, stored, *pair in candidates.values_list(
+                'id', 'status', 'score', 'equipment_id', 'duplicate_id'
+            )
+        }
+        matched, created = set(), []
+        for kept, duplicate, value, reasons in found:
+            known = existing.get(frozenset((kept, duplicate)))
+            if known is None:
+                created.append(DuplicateCandidate(
+                    equipment_id=kept, duplicate_id=duplicate, score=value, reasons=reasons,
+                ))
+                continue
+            pk, status, stored = known
+            matched.add(pk)
+            if status == DuplicateCandidate.PENDING and stored != value:
+                candidates.filter(pk=pk).update(score=value, reasons=reasons)
+        stale = [
+            pk for pk, status, _ in existing.values()
+            if status == DuplicateCandidate.PENDING and pk not in matched
+        ]
+        candidates.filter(pk__in=stale).delete()
+        candidates.bulk_create(created, ignore_conflicts=True)
+    return {'compared': compared, 'found': len(found), 'created': len(created)}
+
+
+def merge(candidate, user=None):
+    """
+    Move every calibration and maintenance record of ``candidate.duplicate``
+    to ``candidate.equipment`` with one ``UPDATE`` per table, then bring the
+    kept instrument's counters and due dates up to date and retire the
+    duplicate, noting where it went. Pending candidates of the duplicate
+    are dropped. Returns the records moved; raises ``ValueError`` if the
+    candidate was already reviewed or either instrument is retired.
+    """
+    using = candidate._state.db
+    if candidate.status != DuplicateCandidate.PENDING:
+        raise ValueError('Only pending candidates can be merged.')
+    with transaction.atomic(using=using):
+        pair = sorted((candidate.equipment_id, candidate.duplicate_id))
+        active = list(
+            Equipment.objects.using(using).select_for_update().filter(pk__in=pair)
+            .order_by('pk').values_list('is_active', flat=True)
+        )
+        if active != [True, True]:
+            raise ValueError('Both instruments must be active to merge them.')
+        kept = Equipment.objects.using(using).filter(pk=candidate.equipment_id)
+        retired = Equipment.objects.using(using).filter(pk=candidate.duplicate_id)
+        now = timezone.now()
+        moved = 0
+        for model in (Calibration, Maintenance):
+            moved += model.objects.using(using).filter(equipment_id=candidate.duplicate_id).update(
+                equipment_id=candidate.equipment_id, updated_at=now
+            )
+        ScheduledCalibration.objects.using(using).filter(
+            equipment_id=candidate.duplicate_id
+        ).delete()
+        counters.refresh(Equipment.objects.using(using).filter(pk__in=pair))
+        bulk.sync_due_dates(kept)
+        serial_number = kept.values_list('serial_number', flat=True).get()
+        note = f'Merged into {serial_number} on {now:%Y-%m-%d}.'
+        retired.update(notes=Case(
+            When(notes='', then=Value(note)),
+            default=Concat(F('notes'), Value('\n' + note), output_field=TextField()),
+            output_field=TextField(),
+        ))
+        bulk.deactivate(retired)
+        candidate.status = DuplicateCandidate.MERGED
+        candidate.reviewed_at = now
+        candidate.reviewed_by = user
+        candidate.save(update_fields=['status', 'reviewed_at', 'reviewed_by'])
+        DuplicateCandidate.objects.using(using).filter(
+            status=DuplicateCandidate.PENDING
+        ).filter(
+            Q(equipment_id=candidate.duplicate_id) | Q(duplicate_id=candidate.duplicate_id)
+        ).delete()
+    return moved
+
+
+def dismiss(queryset, user=None):
+    """Mark pending candidates as not duplicates; scans leave them alone."""
+    return queryset.filter(status=DuplicateCandidate.PENDING).update(
+        status=DuplicateCandidate.DISMISSED, reviewed_at=timezone.now(), reviewed_by=user
+    )
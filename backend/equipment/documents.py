@@ -0,0 +1,241 @@
+# ============================================================================
+# File Path: backend/equipment/documents.py
+# Description: Label sheets and certificate summaries rendered in a pool of
+#              worker processes, cached per record version and streamed
+# ============================================================================
+
+import hashlib
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import rendering
+
+LABEL_FIELDS = ('id', 'updated_at', 'name', 'serial_number', 'next_calibration_date')
+CERTIFICATE_FIELDS = (
+    'id', 'updated_at', 'equipment', 'equipment__updated_at', 'calibration_date',
+    'calibrated_by__username', 'calibrated_by__first_name', 'calibrated_by__last_name',
+    'calibration_standard', 'measurement_point', 'results', 'valid_until',
+    'equipment__name', 'equipment__serial_number', 'equipment__manufacturer',
+    'equipment__model_number', 'equipment__location',
+)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def pool():
+    """
+    The shared worker processes, started on first use. They are spawned,
+    not forked, so they inherit no database connections or threads.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.DOCUMENTS_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def shutdown():
+    """Stop the worker processes; the next run starts new ones."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+def run(function, tasks):
+    """
+    ``function`` applied to each of ``tasks`` in the worker pool, results
+    in task order. Only a few tasks per worker are in flight, so a long
+    run holds a bounded number of pages in memory. With
+    ``DOCUMENTS_WORKERS = 0`` everything runs in this process.
+    """
+    if not settings.DOCUMENTS_WORKERS:
+        yield from map(function, tasks)
+        return
+    executor = pool()
+    pending = deque()
+    try:
+        for task in tasks:
+            pending.append(executor.submit(function, task))
+            if len(pending) >= 2 * settings.DOCUMENTS_WORKERS:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start over next time
+        shutdown()
+        raise
+
+
+def cache_key(kind, *versions):
+    """Key of a rendered page; any new ``updated_at`` among ``versions`` misses."""
+    stamp = '.'.join(
+        f'{pk}@{updated_at.timestamp():.6f}' for pk, updated_at in versions
+    )
+    return f'documents:v{rendering.VERSION}:{kind}:{stamp}'
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _round():
+    """Records read per round: enough pages to keep every worker busy."""
+    return 4 * max(1, settings.DOCUMENTS_WORKERS)
+
+
+def label_sheets(equipment):
+    """
+    Label sheet ``Page``s for ``equipment``, in its order. Sheets are cached
+    by the versions of their instruments, and labels one by one, so a
+    changed instrument only has its own label drawn again.
+    """
+    rows = equipment.values(*LABEL_FIELDS).iterator(chunk_size=2000)
+    for batch in _batches(rows, _round() * rendering.LABELS_PER_SHEET):
+        keys = [cache_key('label', (row['id'], row['updated_at'])) for row in batch]
+        sheets = [
+            (_sheet_key(sheet_keys), sheet_keys, sheet_rows) for sheet_keys, sheet_rows in zip(
+                _batches(keys, rendering.LABELS_PER_SHEET),
+                _batches(batch, rendering.LABELS_PER_SHEET),
+            )
+        ]
+        cached = cache.get_many([sheet_key for sheet_key, _, _ in sheets])
+        missing = [sheet for sheet in sheets if sheet[0] not in cached]
+        labels = cache.get_many([key for _, sheet_keys, _ in missing for key in sheet_keys])
+        drawn = run(rendering.render_sheet, [
+            [
+                labels.get(key) or {
+                    'name': row['name'],
+                    'serial_number': row['serial_number'],
+                    'next_due': _day(row['next_calibration_date']),
+                }
+                for key, row in zip(sheet_keys, sheet_rows)
+            ]
+            for _, sheet_keys, sheet_rows in missing
+        ])
+        for (sheet_key, sheet_keys, _), (page, rendered) in zip(missing, drawn):
+            new = {sheet_keys[index]: label for index, label in rendered.items()}
+            new[sheet_key] = cached[sheet_key] = page
+            cache.set_many(new, settings.DOCUMENTS_CACHE_SECONDS)
+        for sheet_key, _, _ in sheets:
+            yield cached[sheet_key]
+
+
+def _sheet_key(label_keys):
+    digest = hashlib.sha1('|'.join(label_keys).encode()).hexdigest()
+    return f'documents:v{rendering.VERSION}:sheet:{digest}'
+
+
+def certificates(calibrations):
+    """
+    ``(file name, Page)`` of each calibration's certificate summary. Pages
+    are cached per version of the calibration and of its instrument.
+    """
+    rows = calibrations.values(*CERTIFICATE_FIELDS).iterator(chunk_size=500)
+    for batch in _batches(rows, _round()):
+        keys = [
+            cache_key(
+                'certificate', (row['id'], row['updated_at']),
+                (row['equipment'], row['equipment__updated_at']),
+            )
+            for row in batch
+        ]
+        cached = cache.get_many(keys)
+        missing = [(key, row) for key, row in zip(keys, batch) if key not in cached]
+        drawn = dict(zip(
+            [key for key, _ in missing],
+            run(rendering.render_certificate, [_certificate_fields(row) for _, row in missing]),
+        ))
+        cache.set_many(drawn, settings.DOCUMENTS_CACHE_SECONDS)
+        for key, row in zip(keys, batch):
+            name = 'certificate-%s-%s-%d.pdf' % (
+                row['equipment__serial_number'], _day(row['calibration_date']), row['id']
+            )
+            yield name, cached.get(key) or drawn[key]
+
+
+def _certificate_fields(row):
+    full_name = ' '.join(filter(None, (
+        row['calibrated_by__first_name'], row['calibrated_by__last_name']
+    )))
+    return {
+        'id': row['id'],
+        'name': row['equipment__name'],
+        'serial_number': row['equipment__serial_number'],
+        'manufacturer': row['equipment__manufacturer'],
+        'model_number': row['equipment__model_number'],
+        'location': row['equipment__location'],
+        'calibration_date': row['calibration_date'].strftime('%Y-%m-%d %H:%M UTC'),
+        'calibrated_by': full_name or row['calibrated_by__username'],
+        'calibration_standard': row['calibration_standard'],
+        'measurement_point': row['measurement_point'],
+        'results': row['results'],
+        'valid_until': _day(row['valid_until']),
+    }
+
+
+def _day(value):
+    return value.strftime('%Y-%m-%d') if value else None
+
+
+def labels_pdf(equipment):
+    """All label sheets of ``equipment`` as one PDF, streamed."""
+    return rendering.pdf(label_sheets(equipment))
+
+
+def labels_zip(equipment):
+    """One PDF per label sheet, in a streamed ZIP."""
+    return rendering.zip_archive(
+        ('labels-%03d.pdf' % number, b''.join(rendering.pdf([sheet])))
+        for number, sheet in enumerate(label_sheets(equipment), 1)
+    )
+
+
+def certificates_pdf(calibrations):
+    """Every certificate summary as a page of one PDF, streamed."""
+    return rendering.pdf(page for _, page in certificates(calibrations))
+
+
+def certificates_zip(calibrations):
+    """One PDF per certificate summary, in a streamed ZIP."""
+    return rendering.zip_archive(
+        (name, b''.join(rendering.pdf([page]))) for name, page in certificates(calibrations)
+    )
+
+
+# Renderer by kind and output format
+OUTPUTS = {
+    'labels': {'pdf': labels_pdf, 'zip': labels_zip},
+    'certificates': {'pdf': certificates_pdf, 'zip': certificates_zip},
+}
+
+
+def check_size(queryset):
+    """Raise ``ValueError`` when ``queryset`` is empty or over ``DOCUMENTS_MAX_ITEMS``."""
+    count = queryset.count()
+    if not count:
+        raise ValueError('Nothing to render.')
+    if count > settings.DOCUMENTS_MAX_ITEMS:
+        raise ValueError(
+            f'{count} records selected; at most {settings.DOCUMENTS_MAX_ITEMS} per request.'
+        )
+    return count
+
@@ -0,0 +1,49 @@
+# ============================================================================
+# File Path: backend/equipment/history.py
+# Description: Hot and archived ranges of the calibration and maintenance logs
+# ============================================================================
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Calibration, Maintenance
+
+# Append-only history tables and the date they are partitioned by
+PARTITIONED = {
+    Calibration: 'calibration_date',
+    Maintenance: 'maintenance_date',
+}
+
+
+def hot_cutoff():
+    """Start of the hot window, or ``None`` when every read spans all history."""
+    if not settings.HISTORY_HOT_DAYS:
+        return None
+    return timezone.now() - timedelta(days=settings.HISTORY_HOT_DAYS)
+
+
+def hot(queryset):
+    """
+    Restrict a history queryset to the hot window. On PostgreSQL the
+    planner then skips every partition that ends before it.
+    """
+    cutoff = hot_cutoff()
+    if cutoff is None:
+        return queryset
+    return queryset.filter(**{f'{PARTITIONED[queryset.model]}__gte': cutoff})
+
+
+def wants_all(params, model):
+    """
+    Whether a list request reaches past the hot window: it asked for
+    ``history=all``, for one instrument's history (a cheap index lookup in
+    every partition), or filters on the date itself.
+    """
+    field = PARTITIONED[model]
+    if params.get('history') == 'all' or params.get('equipment'):
+        return True
+    return any(
+        name == field or name.startswith(field + '__') for name in params
+    )
@@ -0,0 +1,328 @@
+# ============================================================================
+# File Path: backend/equipment/importer.py
+# Description: Stream legacy calibration and maintenance history into the tables
+# ============================================================================
+
+import csv
+import io
+import time
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from calibrify.db.compression import compress, compressed_fields
+
+from . import bulk, counters, scheduling
+from .models import Equipment, Calibration, Maintenance
+
+TRUE = {'1', 'true', 't', 'yes', 'y'}
+FALSE = {'0', 'false', 'f', 'no', 'n', ''}
+
+
+class Kind:
+    """How one CSV export maps onto a history model."""
+
+    def __init__(self, model, date_field, user_field, required, optional=(), flags=()):
+        self.model = model
+        self.date_field = date_field
+        self.user_field = user_field
+        self.required = required
+        self.optional = optional
+        self.flags = flags
+
+    @property
+    def columns(self):
+        """Table columns written, in COPY order."""
+        return (
+            ['equipment_id', self.date_field, f'{self.user_field}_id']
+            + list(self.required) + list(self.optional) + list(self.flags)
+            + ['created_at', 'updated_at']
+        )
+
+    @property
+    def key(self):
+        """Columns that identify a record: all of them but the timestamps."""
+        return self.columns[:-2]
+
+    @property
+    def compressed(self):
+        """Columns stored compressed by ``CompressedTextField``."""
+        return set(compressed_fields(self.model))
+
+
+KINDS = {
+    'calibration': Kind(
+        Calibration, 'calibration_date', 'calibrated_by',
+        required=('calibration_standard', 'measurement_point', 'results'),
+        optional=('notes',),
+    ),
+    'maintenance': Kind(
+        Maintenance, 'maintenance_date', 'performed_by',
+        required=('service_provider', 'description'),
+        optional=('notes',),
+        flags=('returned_to_production',),
+    ),
+}
+
+
+class Rejected(ValueError):
+    pass
+
+
+class ImportStats:
+    def __init__(self):
+        self.read = 0
+        self.imported = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def rate(self):
+        return self.read / self.elapsed if self.elapsed else 0.0
+
+
+def _moment(value):
+    """A CSV date or date-time as an aware datetime."""
+    value = (value or '').strip()
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise Rejected(f'invalid date {value!r}')
+        moment = datetime(day.year, day.month, day.day)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def _flag(value):
+    value = (value or '').strip().lower()
+    if value in TRUE:
+        return True
+    if value in FALSE:
+        return False
+    raise Rejected(f'invalid yes/no value {value!r}')
+
+
+def parse(reader, kind, equipment_ids, user_ids, stats, on_reject, now=None):
+    """
+    Turn CSV rows into value tuples in ``kind.columns`` order, looking up
+    instruments by ``serial_number`` and users by username in memory.
+    Rows that cannot be imported go to ``on_reject(line, row, reason)``.
+    """
+    now = now or timezone.now()
+    for row in reader:
+        stats.read += 1
+        try:
+            serial = (row.get('serial_number') or '').strip()
+            if serial not in equipment_ids:
+                raise Rejected(f'unknown serial_number {serial!r}')
+            values = [
+                equipment_ids[serial],
+                _moment(row.get(kind.date_field)),
+                user_ids.get((row.get(kind.user_field) or '').strip()),
+            ]
+            for field in kind.required:
+                value = (row.get(field) or '').strip()
+                if not value:
+                    raise Rejected(f'missing {field}')
+                values.append(value)
+            values += [(row.get(field) or '').strip() for field in kind.optional]
+            values += [_flag(row.get(field)) for field in kind.flags]
+        except Rejected as exc:
+            stats.rejected += 1
+            on_reject(reader.line_num, row, str(exc))
+            continue
+        yield tuple(values + [now, now])
+
+
+class _CopyStream(io.TextIOBase):
+    """File-like view of value tuples as COPY CSV text, produced on demand."""
+
+    def __init__(self, rows):
+        self._rows = rows
+        self._buffer = ''
+        self.count = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator='\n')
+        length = len(self._buffer)
+        while size < 0 or length < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            start = out.tell()
+            writer.writerow([_copy_value(value) for value in row])
+            length += out.tell() - start
+            self.count += 1
+        data = self._buffer + out.getvalue()
+        if size < 0:
+            self._buffer = ''
+            return data
+        self._buffer = data[size:]
+        return data[:size]
+
+
+def _stored(kind, rows):
+    """
+    ``rows`` with their compressed text columns in stored form, as
+    ``CompressedTextField`` would save them: ``COPY`` bypasses the field.
+    """
+    positions = [
+        index for index, column in enumerate(kind.columns) if column in kind.compressed
+    ]
+    for row in rows:
+        row = list(row)
+        for index in positions:
+            row[index] = compress(row[index])
+        yield tuple(row)
+
+
+def _copy_value(value):
+    if value is None:
+        return r'\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def _copy_load(connection, kind, rows, stats):
+    """
+    Stream rows into a temporary staging table with ``COPY FROM STDIN``,
+    then merge them in one ``INSERT ... SELECT`` that skips records already
+    present with the same values, so an interrupted import can simply be
+    run again. Different readings on the same day are all kept.
+    """
+    qn = connection.ops.quote_name
+    table = qn(kind.model._meta.db_table)
+    columns = ', '.join(qn(column) for column in kind.columns)
+    date = qn(kind.date_field)
+    same = ' AND '.join(
+        f't.{qn(column)} IS NOT DISTINCT FROM s.{qn(column)}'
+        for column in kind.key[2:]
+    )
+    stream = _CopyStream(_stored(kind, rows))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE import_stage ON COMMIT DROP AS '
+            f'SELECT {columns} FROM {table} WITH NO DATA'
+        )
+        cursor.cursor.copy_expert(
+            f"COPY import_stage ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", stream
+        )
+        cursor.execute(
+            f'INSERT INTO {table} ({columns}) '
+            f'SELECT DISTINCT {columns} FROM import_stage s '
+            f'WHERE NOT EXISTS (SELECT 1 FROM {table} t '
+            f'WHERE t.equipment_id = s.equipment_id AND t.{date} = s.{date} AND {same})'
+        )
+        stats.imported = cursor.rowcount
+    stats.duplicates = stream.count - stats.imported
+
+
+def _bulk_load(connection, kind, rows, stats, batch_size):
+    """``bulk_create`` in batches, with the same duplicate rule as the merge."""
+    model = kind.model
+    batch = []
+
+    def flush():
+        existing = set(
+            model.objects.using(connection.alias)
+            .filter(equipment_id__in={values[0] for values in batch},
+                    **{f'{kind.date_field}__in': {values[1] for values in batch}})
+            .values_list(*kind.key)
+        )
+        new = []
+        for values in batch:
+            key = values[:len(kind.key)]
+            if key in existing:
+                stats.duplicates += 1
+                continue
+            existing.add(key)
+            new.append(model(**dict(zip(kind.columns, values))))
+        model.objects.using(connection.alias).bulk_create(new)
+        stats.imported += len(new)
+        batch.clear()
+
+    for values in rows:
+        batch.append(values)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+
+def _restamp(kind, equipment_ids, stamp, using):
+    """
+    Set ``updated_at`` of the rows an import wrote to the current time,
+    just before it commits. Stamped when read, they would commit long
+    after, behind change-feed cursors already moved past that time.
+    """
+    now = timezone.now()
+    for start in range(0, len(equipment_ids), 1000):
+        chunk = equipment_ids[start:start + 1000]
+        kind.model.objects.using(using).filter(
+            equipment_id__in=chunk, created_at__gte=stamp
+        ).update(updated_at=now)
+        Equipment.objects.using(using).filter(pk__in=chunk).update(updated_at=now)
+
+
+def import_history(kind_name, stream, batch_size=5000, on_reject=None, using='default'):
+    """
+    Import one CSV export of ``kind_name`` history from the text ``stream``.
+
+    Loads with PostgreSQL ``COPY`` where available and batched
+    ``bulk_create`` elsewhere, all in one transaction, then recomputes the
+    counters and due dates of the instruments touched. Returns the stats.
+    """
+    kind = KINDS[kind_name]
+    connection = connections[using]
+    stats = ImportStats()
+    equipment_ids = dict(
+        Equipment.objects.using(using).values_list('serial_number', 'id').iterator()
+    )
+    user_ids = dict(User.objects.using(using).values_list('username', 'id').iterator())
+    touched = set()
+    stamp = timezone.now()
+
+    def rows():
+        for values in parse(
+            csv.DictReader(stream), kind, equipment_ids, user_ids, stats,
+            on_reject or (lambda line, row, reason: None), now=stamp,
+        ):
+            touched.add(values[0])
+            yield values
+
+    with transaction.atomic(using=using):
+        if connection.vendor == 'postgresql':
+            _copy_load(connection, kind, rows(), stats)
+        else:
+            _bulk_load(connection, kind, rows(), stats, batch_size)
+        touched = sorted(touched)
+        for start in range(0, len(touched), 1000):
+            equipment = Equipment.objects.using(using).filter(pk__in=touched[start:start + 1000])
+            counters.refresh(equipment)
+            if kind.model is Calibration:
+                bulk.fill_validity(
+                    Calibration.objects.using(using).filter(equipment__in=equipment)
+                )
+                due = dict(equipment.values_list('pk', 'next_calibration_date'))
+                bulk.sync_due_dates(equipment)
+                scheduling.unschedule([
+                    pk for pk, day in equipment.values_list('pk', 'next_calibration_date')
+                    if day != due[pk]
+                ], using)
+        _restamp(kind, touched, stamp, using)
+    stats.elapsed = time.perf_counter() - stats.started
+    return stats
@@ -0,0 +1,142 @@
+# ============================================================================
+# File Path: backend/equipment/live.py
+# Description: Dashboard figures and the live updates pushed when they change
+# ============================================================================
+
+import threading
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from calibrify.events.broker import get_broker
+from . import compliance
+from .models import Equipment, Calibration, Maintenance
+
+_lock = threading.Lock()
+_buffer = []
+_timer = None
+_last_summary = {}
+
+
+def summary():
+    """
+    Every dashboard counter, from the frontend tiles and the summary API,
+    in one query per table.
+    """
+    today = timezone.now().date()
+    # Aware bounds for the timestamp columns, equal to the dates themselves
+    midnight = timezone.make_aware(datetime.combine(today, time.min))
+    thirty_days_ahead = midnight + timedelta(days=30)
+    start_of_month = midnight.replace(day=1)
+
+    counts = Equipment.objects.aggregate(
+        total_equipment=Count('id'),
+        pending_calibrations=Count('id', filter=Q(next_calibration_date__lte=today)),
+    )
+    counts['overdue_items'] = compliance.totals()[compliance.OVERDUE]
+    counts.update(Calibration.objects.aggregate(
+        due_calibrations=Count('id', filter=(
+            Q(calibration_date__gte=midnight)
+            & Q(calibration_date__lte=thirty_days_ahead)
+            & ~Q(results='Completed')
+        )),
+        completed_calibrations=Count('id', filter=Q(
+            updated_at__gte=start_of_month, results='Completed'
+        )),
+    ))
+    counts.update(Maintenance.objects.aggregate(
+        pending_maintenance=Count('id', filter=Q(returned_to_production=False)),
+        overdue_maintenance=Count('id', filter=(
+            Q(maintenance_date__lt=midnight) & ~Q(returned_to_production=True)
+        )),
+        completed_maintenance=Count('id', filter=Q(
+            updated_at__gte=start_of_month, returned_to_production=True
+        )),
+    ))
+    counts['completed_this_month'] = (
+        counts.pop('completed_calibrations') + counts.pop('completed_maintenance')
+    )
+    return counts
+
+
+def activity(instance):
+    """An activity feed entry, shaped like ``/api/dashboard/activity/`` items."""
+    # Imported here: async_views imports this module for the stream
+    from .async_views import _calibration_activity, _maintenance_activity
+
+    if isinstance(instance, Calibration):
+        return _calibration_activity(instance)
+    return _maintenance_activity(instance)
+
+
+@receiver(post_save, sender=Equipment)
+@receiver(post_save, sender=Calibration)
+@receiver(post_save, sender=Maintenance)
+@receiver(post_delete, sender=Equipment)
+@receiver(post_delete, sender=Calibration)
+@receiver(post_delete, sender=Maintenance)
+def record_change(sender, instance, using=None, **kwargs):
+    """Queue a dashboard update for when the change commits."""
+    if not get_broker().active:
+        return
+    item = None
+    if sender is not Equipment and 'created' in kwargs:
+        item = activity(instance)
+    transaction.on_commit(lambda: schedule(item), using=using)
+
+
+def record_bulk_change(using=None):
+    """Queue a dashboard update for a set-based write, which sends no signals."""
+    if get_broker().active:
+        transaction.on_commit(schedule, using=using)
+
+
+def schedule(item=None):
+    """
+    Coalesce committed changes: the first starts a timer and the counters
+    are computed and published once for every change that lands within
+    ``LIVE_EVENTS_DEBOUNCE`` seconds, however many requests made them.
+    """
+    global _timer
+    delay = settings.LIVE_EVENTS_DEBOUNCE
+    with _lock:
+        if item is not None:
+            _buffer.append(item)
+        if delay and _timer is None:
+            _timer = threading.Timer(delay, _publish_in_thread)
+            _timer.daemon = True
+            _timer.start()
+    if not delay:
+        publish_changes()
+
+
+def _publish_in_thread():
+    try:
+        publish_changes()
+    finally:
+        connections.close_all()
+
+
+def publish_changes():
+    global _timer
+    with _lock:
+        items = _buffer[:]
+        _buffer.clear()
+        _timer = None
+    counts = summary()
+    with _lock:
+        delta = {
+            key: value for key, value in counts.items()
+            if _last_summary.get(key) != value
+        }
+        _last_summary.update(counts)
+    broker = get_broker()
+    if delta:
+        broker.publish('summary', delta)
+    for item in items:
+        broker.publish('activity', item)
@@ -0,0 +1,54 @@
+# ============================================================================
+# File Path: backend/equipment/management/commands/archive_history.py
+# Description: Create upcoming history partitions and archive cold ones
+# ============================================================================
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from calibrify.db import partitioning
+from equipment.history import PARTITIONED
+
+
+class Command(BaseCommand):
+    help = (
+        'Create next year\'s calibration and maintenance partitions and archive '
+        'the partitions that ended before the hot window (HISTORY_HOT_DAYS). '
+        'Run daily; PostgreSQL only.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.HISTORY_HOT_DAYS,
+                            help='Archive partitions that ended more than this many days ago')
+        parser.add_argument('--tablespace', default=settings.HISTORY_ARCHIVE_TABLESPACE,
+                            help='Move archived partitions to this tablespace')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if not partitioning.supported(connection):
+            self.stdout.write('History partitioning needs PostgreSQL; nothing to do.')
+            return
+        now = timezone.now()
+        cutoff = now - timedelta(days=options['days']) if options['days'] else None
+        for model, column in PARTITIONED.items():
+            table = model._meta.db_table
+            existing = partitioning.partitions(connection, table)
+            upcoming = [year for year in (now.year, now.year + 1) if year not in existing]
+            cold = [
+                year for year, archived in sorted(existing.items())
+                if not archived and cutoff and partitioning.year_bounds(year)[1] <= cutoff
+            ]
+            if not options['dry_run']:
+                partitioning.ensure_partitions(connection, table, column, upcoming)
+                for year in cold:
+                    partitioning.archive_partition(
+                        connection, table, year, options['tablespace']
+                    )
+            for year in upcoming:
+                self.stdout.write(f'Created {partitioning.partition_name(table, year)}')
+            for year in cold:
+                self.stdout.write(f'Archived {partitioning.partition_name(table, year)}')
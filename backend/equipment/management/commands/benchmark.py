@@ -0,0 +1,217 @@
+# ============================================================================
+# File Path: backend/equipment/management/commands/benchmark.py
+# Description: Run the endpoint benchmarks and compare against a baseline
+# ============================================================================
+
+import base64
+import json
+import secrets
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from rest_framework.request import Request
+
+from accounts.models import ApiToken
+from calibrify.benchmark import baseline
+from calibrify.benchmark.runner import (
+    HTTPRunner, InProcessRunner, connection_overhead, rows_per_second,
+)
+from calibrify.benchmark.scenarios import SCENARIOS
+from equipment import projection
+from equipment.views import CalibrationViewSet, EquipmentViewSet, MaintenanceViewSet
+
+DEFAULT_BASELINE = 'benchmarks/baseline.json'
+
+# List endpoints timed by --serialization
+LISTS = (
+    ('equipment', EquipmentViewSet),
+    ('calibrations', CalibrationViewSet),
+    ('maintenance', MaintenanceViewSet),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark key endpoints in-process or over HTTP, recording latency '
+        'percentiles, query counts and memory, and flag regressions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=('inprocess', 'http'), default='inprocess')
+        parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                            help='Scenario to run; repeat for several. Defaults to all.')
+        parser.add_argument('--iterations', type=int, default=50,
+                            help='Measured requests per scenario (in-process).')
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--url', default='http://localhost:8000',
+                            help='Server base URL (http mode).')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Total requests per scenario (http mode).')
+        parser.add_argument('--concurrency', type=int, default=10,
+                            help='Concurrent clients (http mode).')
+        parser.add_argument('--think-time', type=float, default=0.0,
+                            help='Seconds each client waits between requests (http mode).')
+        parser.add_argument('--username', default='benchmark',
+                            help='User to authenticate as; created if missing.')
+        parser.add_argument('--auth', choices=('session', 'basic', 'token'), default='session',
+                            help='Credential sent with each request, to compare auth overhead.')
+        parser.add_argument('--password',
+                            help='Password for --auth basic; a user without one gets a random one.')
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                            help='Baseline JSON file to compare against.')
+        parser.add_argument('--save-baseline', action='store_true',
+                            help='Store these results as the new baseline.')
+        parser.add_argument('--tolerance', type=float, default=0.20,
+                            help='Allowed latency growth before flagging, e.g. 0.2 = 20%%.')
+        parser.add_argument('--json', action='store_true', help='Print raw JSON results.')
+        parser.add_argument('--connection-overhead', action='store_true',
+                            help='Only measure connection setup cost versus reuse.')
+        parser.add_argument('--serialization', action='store_true',
+                            help='Only measure list rows per second, serializer versus projection.')
+        parser.add_argument('--rows', type=int, default=500,
+                            help='Rows per list (--serialization).')
+
+    def handle(self, *args, **options):
+        if options['connection_overhead']:
+            return self._connection_overhead(options)
+        if options['serialization']:
+            return self._serialization(options)
+
+        user, _ = User.objects.get_or_create(username=options['username'])
+        names = options['scenario'] or list(SCENARIOS)
+        mode = options['mode']
+        # Baselines are kept per credential type; session keeps the plain mode
+        if options['auth'] != 'session':
+            mode = f'{mode}-{options["auth"]}'
+        authorization, token = self._authorization(user, options)
+
+        if options['mode'] == 'http':
+            runner = HTTPRunner(
+                options['url'], user,
+                requests=options['requests'], concurrency=options['concurrency'],
+                think_time=options['think_time'], authorization=authorization,
+            )
+        else:
+            runner = InProcessRunner(
+                user, iterations=options['iterations'], warmup=options['warmup'],
+                authorization=authorization,
+            )
+
+        results = {}
+        # Query logging under DEBUG would dominate the measurements
+        try:
+            with override_settings(DEBUG=False):
+                for name in names:
+                    results[name] = runner.run(SCENARIOS[name])
+                    self._report(name, results[name])
+        finally:
+            if token is not None:
+                token.delete()
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2, sort_keys=True))
+
+        if options['save_baseline']:
+            baseline.save(options['baseline'], mode, results)
+            self.stdout.write(self.style.SUCCESS(f'Baseline saved to {options["baseline"]}'))
+            return
+
+        stored = baseline.load(options['baseline'])
+        if not stored or mode not in stored:
+            self.stdout.write('No baseline to compare against; run with --save-baseline.')
+            return
+        regressions = baseline.compare(stored[mode]['results'], results, options['tolerance'])
+        for name, metric, previous, current in regressions:
+            self.stdout.write(self.style.ERROR(
+                f'REGRESSION {name} {metric}: {previous:.2f} -> {current:.2f}'
+            ))
+        if regressions:
+            raise CommandError(f'{len(regressions)} benchmark regression(s) detected')
+        self.stdout.write(self.style.SUCCESS('No regressions against baseline.'))
+
+    def _authorization(self, user, options):
+        """The ``Authorization`` header for ``--auth`` and any token to clean up."""
+        if options['auth'] == 'token':
+            token, key = ApiToken.issue(user, 'benchmark', expires_in_days=1)
+            return f'Token {key}', token
+        if options['auth'] == 'basic':
+            password = options['password']
+            if password is None:
+                if user.password and user.has_usable_password():
+                    raise CommandError('--auth basic needs --password for an existing user')
+                password = secrets.token_urlsafe(16)
+                user.set_password(password)
+                user.save(update_fields=['password'])
+            elif not user.check_password(password):
+                raise CommandError('Incorrect --password')
+            credentials = base64.b64encode(f'{user.username}:{password}'.encode()).decode()
+            return f'Basic {credentials}', None
+        return None, None
+
+    def _report(self, name, result):
+        line = (
+            f'{name:<24} p50={result["p50_ms"]:8.2f}ms p95={result["p95_ms"]:8.2f}ms '
+            f'p99={result["p99_ms"]:8.2f}ms'
+        )
+        if 'queries' in result:
+            line += f' queries={result["queries"]:<4} peak={result["peak_alloc_kb"]:.0f}KiB'
+        if 'throughput_rps' in result:
+            line += f' rps={result["throughput_rps"]:.1f}'
+        if result['errors']:
+            line += f' errors={result["errors"]}'
+        self.stdout.write(line)
+
+    def _connection_overhead(self, options):
+        results = connection_overhead(iterations=options['iterations'])
+        for name in ('new_connection', 'django_reconnect', 'open_connection'):
+            result = results[name]
+            self.stdout.write(
+                f'{name:<24} mean={result["mean_ms"]:8.3f}ms p95={result["p95_ms"]:8.3f}ms'
+            )
+        self.stdout.write(
+            f'Per-request path is {results["per_request_path"]}; saves '
+            f'{results["saved_ms_per_request"]:.3f}ms per request over a new connection'
+        )
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2, sort_keys=True))
+
+    def _serialization(self, options):
+        """
+        Rows per second of each list endpoint's rows, queries included,
+        through its list serializer and through its projection; the two
+        outputs must be identical.
+        """
+        request = Request(RequestFactory().get('/', {'history': 'all'}))
+        results = {}
+        for name, viewset in LISTS:
+            view = viewset(request=request, action='list', format_kwarg=None, kwargs={})
+            queryset = view.get_queryset()[:options['rows']]
+            serializer_class = view.get_serializer_class()
+            layout = projection.of(serializer_class)
+            context = view.get_serializer_context()
+
+            def serialized():
+                return serializer_class(queryset.all(), many=True, context=context).data
+
+            def projected():
+                return layout.render(list(layout.values(queryset)), context)
+
+            if [dict(row) for row in serialized()] != projected():
+                raise CommandError(f'{name}: projected rows differ from the serializer\'s')
+            results[name] = {
+                'serializer_rows_per_s': rows_per_second(serialized),
+                'projected_rows_per_s': rows_per_second(projected),
+            }
+            result = results[name]
+            speedup = (
+                result['projected_rows_per_s'] / result['serializer_rows_per_s']
+                if result['serializer_rows_per_s'] else 0.0
+            )
+            self.stdout.write(
+                f'{name:<24} serializer={result["serializer_rows_per_s"]:10.0f} rows/s '
+                f'projected={result["projected_rows_per_s"]:10.0f} rows/s x{speedup:.1f}'
+            )
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2, sort_keys=True))
@@ -0,0 +1,43 @@
+# ============================================================================
+# File Path: backend/equipment/management/commands/compliance_snapshot.py
+# Description: Report which instruments were in calibration on a past date
+# ============================================================================
+
+from django.core.management.base import BaseCommand, CommandError
+
+from equipment import snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        'Print the fleet\'s calibration status at the end of a past date, per '
+        'location, and optionally write it instrument by instrument as CSV for '
+        'an audit.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('date', help='YYYY-MM-DD')
+        parser.add_argument('--location', help='Only instruments at this location.')
+        parser.add_argument('--output', help='Write the CSV report to this file.')
+
+    def handle(self, *args, **options):
+        try:
+            day = snapshots.parse_day(options['date'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        location = options['location']
+        summary = snapshots.summary(day, location)
+        for row in summary['locations']:
+            self.stdout.write(
+                f"{row['location']:<32} in calibration={row['in_calibration']:<6} "
+                f"overdue={row['overdue']:<6} not calibrated={row['not_calibrated']}"
+            )
+        self.stdout.write(
+            f"{day}: {summary['in_calibration']} of {summary['total']} instrument(s) "
+            f"in calibration, {summary['overdue']} overdue, "
+            f"{summary['not_calibrated']} never calibrated"
+        )
+        if options['output']:
+            with open(options['output'], 'w', newline='') as out:
+                out.writelines(snapshots.csv_lines(day, location))
+            self.stdout.write(f"Report written to {options['output']}")
@@ -0,0 +1,74 @@
+# ============================================================================
+# File Path: backend/equipment/management/commands/compress_history.py
+# Description: Compress the long free-text history columns of existing rows
+# ============================================================================
+
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Length
+
+from calibrify.db.compression import MARKER, compress, compressed_fields
+from equipment.models import Calibration, Maintenance
+
+MODELS = {'calibration': Calibration, 'maintenance': Maintenance}
+
+
+class Command(BaseCommand):
+    help = (
+        'Rewrite the calibration and maintenance rows saved before their free-text '
+        'fields were compressed, in batches of one transaction each. Only rows '
+        'with a long plain value (COMPRESSED_TEXT_MIN_BYTES) are read; '
+        'updated_at is left alone, so change feeds do not resend them. Safe to '
+        'interrupt and run again.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', metavar='model',
+                            help='calibration and/or maintenance (default both).')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        unknown = set(options['models']) - set(MODELS)
+        if unknown:
+            raise CommandError('Unknown model(s): %s.' % ', '.join(sorted(unknown)))
+        for name in options['models'] or sorted(MODELS):
+            rows, before, after = self.compress(MODELS[name], options['batch_size'])
+            saved = 100 * (1 - after / before) if before else 0
+            self.stdout.write(
+                f'{name}: {rows} row(s) compressed, {before} -> {after} bytes ({saved:.0f}% saved)'
+            )
+
+    def compress(self, model, batch_size):
+        """Compress ``model``'s pending rows in id order; returns rows and sizes."""
+        fields = compressed_fields(model)
+        pending = model.objects.annotate(
+            **{f'{field}_length': Length(field) for field in fields}
+        ).filter(reduce(or_, (
+            Q(**{f'{field}_length__gte': settings.COMPRESSED_TEXT_MIN_BYTES})
+            & ~Q(**{f'{field}__startswith': MARKER})
+            for field in fields
+        ))).order_by('pk')
+        rows = before = after = 0
+        last = 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    pending.filter(pk__gt=last).select_for_update().only(*fields)[:batch_size]
+                )
+                if not batch:
+                    break
+                # Writing the loaded text back stores it compressed
+                model.objects.bulk_update(batch, fields)
+            last = batch[-1].pk
+            rows += len(batch)
+            for instance in batch:
+                for field in fields:
+                    value = getattr(instance, field) or ''
+                    before += len(value.encode())
+                    after += len(compress(value).encode())
+        return rows, before, after
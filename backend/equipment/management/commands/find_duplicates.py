@@ -0,0 +1,23 @@
+# ============================================================================
+# File Path: backend/equipment/management/commands/find_duplicates.py
+# Description: Look for instruments registered more than once
+# ============================================================================
+
+from django.core.management.base import BaseCommand
+
+from equipment import dedup
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the active instruments on normalised serial number, model and '
+        'manufacturer and store likely duplicates as merge candidates, reviewed '
+        'in the admin. Run nightly, or after importing another site\'s register.'
+    )
+
+    def handle(self, *args, **options):
+        stats = dedup.scan()
+        self.stdout.write(
+            f"Compared {stats['compared']} pair(s); {stats['found']} likely duplicate(s), "
+            f"{stats['created']} new"
+        )
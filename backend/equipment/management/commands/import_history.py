@@ -0,0 +1,64 @@
+# ============================================================================
+# File Path: backend/equipment/management/commands/import_history.py
+# Description: Load calibration or maintenance history exported from a legacy CMMS
+# ============================================================================
+
+import csv
+import gzip
+
+from django.core.management.base import BaseCommand, CommandError
+
+from equipment.importer import KINDS, import_history
+
+
+class Command(BaseCommand):
+    help = (
+        'Import calibration or maintenance history from a CSV export (optionally '
+        'gzipped). Rows are matched to equipment by serial_number; records already '
+        'present (same instrument and date) are skipped, so imports can be re-run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(KINDS))
+        parser.add_argument('path', help='CSV file with a header row; .gz is decompressed')
+        parser.add_argument('--rejects', help='Write rejected rows, with the reason, to this CSV')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Rows per INSERT where COPY is unavailable.')
+
+    def handle(self, *args, **options):
+        kind = KINDS[options['kind']]
+        opener = gzip.open if options['path'].endswith('.gz') else open
+        rejects_file = open(options['rejects'], 'w', newline='') if options['rejects'] else None
+        rejects = None
+        first_reasons = []
+
+        def on_reject(line, row, reason):
+            nonlocal rejects
+            if len(first_reasons) < 10:
+                first_reasons.append(f'line {line}: {reason}')
+            if rejects_file:
+                if rejects is None:
+                    rejects = csv.DictWriter(
+                        rejects_file, ['line', 'reason', *row], extrasaction='ignore'
+                    )
+                    rejects.writeheader()
+                rejects.writerow({'line': line, 'reason': reason, **row})
+
+        try:
+            with opener(options['path'], 'rt', newline='', encoding='utf-8-sig') as stream:
+                stats = import_history(
+                    options['kind'], stream, options['batch_size'], on_reject
+                )
+        except (OSError, UnicodeDecodeError, csv.Error) as exc:
+            raise CommandError(f'Could not read {options["path"]}: {exc}')
+        finally:
+            if rejects_file:
+                rejects_file.close()
+
+        for reason in first_reasons:
+            self.stderr.write(f'Rejected {reason}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {stats.imported} {kind.model._meta.verbose_name} record(s) from '
+            f'{stats.read} row(s) in {stats.elapsed:.1f}s ({stats.rate:,.0f} rows/s); '
+            f'{stats.duplicates} already present, {stats.rejected} rejected'
+        ))
@@ -0,0 +1,39 @@
+# ============================================================================
+# File Path: backend/equipment/management/commands/plan_calibrations.py
+# Description: Assign due calibrations to technician shifts
+# ============================================================================
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from equipment import scheduling
+
+
+class Command(BaseCommand):
+    help = (
+        'Plan the calibrations due within the horizon (and any overdue) onto '
+        'technician shifts, within lab capacity, minimising overdue days and '
+        'travel between locations. Replaces the plan from the start day on. '
+        'Run nightly, after rollover_compliance.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First day to plan, YYYY-MM-DD (default today).')
+        parser.add_argument('--days', type=int,
+                            help='Days to plan (default SCHEDULE_HORIZON_DAYS).')
+        parser.add_argument('--time-limit', type=float,
+                            help='Seconds of local search (default SCHEDULE_TIME_LIMIT).')
+
+    def handle(self, *args, **options):
+        start = None
+        if options['start']:
+            start = parse_date(options['start'])
+            if start is None:
+                raise CommandError('--start must be a date, YYYY-MM-DD.')
+        stats = scheduling.plan(start, options['days'], options['time_limit'])
+        self.stdout.write(
+            f"Planned {stats['scheduled']} of {stats['jobs']} calibration(s) from "
+            f"{stats['start']} over {stats['days']} day(s): {stats['overdue_days']} overdue "
+            f"day(s), travel {stats['travel']:g}, cost {stats['greedy_cost']:g} -> "
+            f"{stats['cost']:g} in {stats['elapsed']}s"
+        )
@@ -0,0 +1,27 @@
+# ============================================================================
+# File Path: backend/equipment/management/commands/prune_tombstones.py
+# Description: Delete deletion tombstones older than the change feed keeps
+# ============================================================================
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from equipment.models import DeletionTombstone
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete change-feed tombstones older than CHANGE_FEED_TOMBSTONE_DAYS; '
+        'clients with older cursors are told to resync.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.CHANGE_FEED_TOMBSTONE_DAYS)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        deleted, _ = DeletionTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(f'Deleted {deleted} tombstone(s) older than {cutoff:%Y-%m-%d}')
@@ -0,0 +1,60 @@
+# ============================================================================
+# File Path: backend/equipment/management/commands/render_documents.py
+# Description: Render asset label sheets or certificate summaries to a file
+# ============================================================================
+
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from equipment import documents
+from equipment.models import Calibration, Equipment
+
+
+class Command(BaseCommand):
+    help = (
+        'Write label sheets of active instruments, or certificate summaries of '
+        'calibrations, to a PDF or (by extension) a ZIP of one PDF per page. '
+        'Pages are drawn by DOCUMENTS_WORKERS processes and reused from the cache '
+        'while their records are unchanged.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(documents.OUTPUTS))
+        parser.add_argument('output', help='File to write, ending in .pdf or .zip.')
+        parser.add_argument('--location', help='Only instruments at this location.')
+        parser.add_argument('--since', help='Certificates: calibrations from this date (YYYY-MM-DD).')
+
+    def handle(self, *args, **options):
+        output = os.path.splitext(options['output'])[1].lstrip('.').lower()
+        if output not in ('pdf', 'zip'):
+            raise CommandError('output must end in .pdf or .zip.')
+        if options['kind'] == 'labels':
+            queryset = Equipment.objects.filter(is_active=True)
+            if options['location']:
+                queryset = queryset.filter(location=options['location'])
+        else:
+            queryset = Calibration.objects.order_by('equipment__serial_number', 'calibration_date')
+            if options['location']:
+                queryset = queryset.filter(equipment__location=options['location'])
+            if options['since']:
+                since = parse_date(options['since'])
+                if since is None:
+                    raise CommandError('--since must be given as YYYY-MM-DD.')
+                queryset = queryset.filter(calibration_date__date__gte=since)
+        count = queryset.count()
+        if not count:
+            raise CommandError('Nothing to render.')
+        started = time.perf_counter()
+        size = 0
+        with open(options['output'], 'wb') as out:
+            for chunk in documents.OUTPUTS[options['kind']][output](queryset):
+                out.write(chunk)
+                size += len(chunk)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{options['kind']}: {count} record(s) in {elapsed:.1f}s "
+            f"({count / elapsed:.0f}/s), {size} bytes written to {options['output']}"
+        )
@@ -0,0 +1,31 @@
+# ============================================================================
+# File Path: backend/equipment/management/commands/repair_counters.py
+# Description: Recompute per-equipment history counters that have drifted
+# ============================================================================
+
+from django.core.management.base import BaseCommand
+
+from equipment import counters
+from equipment.models import Equipment
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the calibration/maintenance counters stored on each instrument '
+        'with its history and fix any that differ (e.g. after raw SQL imports).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only report drifted instruments; exit 1 if any.')
+
+    def handle(self, *args, **options):
+        drifted = list(counters.drifted(Equipment.objects.all()).values_list('pk', flat=True))
+        if options['check']:
+            self.stdout.write(f'{len(drifted)} instrument(s) with drifted counters')
+            if drifted:
+                raise SystemExit(1)
+            return
+        for start in range(0, len(drifted), 1000):
+            counters.refresh(Equipment.objects.filter(pk__in=drifted[start:start + 1000]))
+        self.stdout.write(f'Repaired counters of {len(drifted)} instrument(s)')
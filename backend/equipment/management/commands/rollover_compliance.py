@@ -0,0 +1,32 @@
+# ============================================================================
+# File Path: backend/equipment/management/commands/rollover_compliance.py
+# Description: Move the per-location overdue and due-soon counts to today
+# ============================================================================
+
+from django.core.management.base import BaseCommand
+
+from equipment import compliance
+
+
+class Command(BaseCommand):
+    help = (
+        'Roll the compliance summaries forward to today: instruments whose due '
+        'date has passed become overdue and those entering the due-soon window '
+        'are added. Run daily, shortly after midnight UTC.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Recount every location from the equipment table instead.')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            compliance.rebuild()
+            self.stdout.write('Rebuilt the compliance summaries')
+            return
+        moved = compliance.rollover()
+        totals = compliance.totals()
+        self.stdout.write(
+            f'Rolled {moved} location(s) forward; {totals[compliance.OVERDUE]} overdue, '
+            f'{totals[compliance.DUE_SOON]} due soon'
+        )
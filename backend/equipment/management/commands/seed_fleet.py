@@ -0,0 +1,181 @@
+# ============================================================================
+# File Path: backend/equipment/management/commands/seed_fleet.py
+# Description: Generate a realistic, reproducible equipment fleet with history
+# ============================================================================
+
+import random
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from equipment import compliance, counters
+from equipment.models import Calibration, Equipment, Maintenance
+
+CATEGORIES = {
+    'Pressure': ['Pressure Gauge', 'Pressure Transmitter', 'Deadweight Tester'],
+    'Temperature': ['Thermocouple', 'RTD Probe', 'Dry Block Calibrator'],
+    'Electrical': ['Digital Multimeter', 'Clamp Meter', 'Insulation Tester'],
+    'Dimensional': ['Micrometer', 'Vernier Caliper', 'Height Gauge'],
+    'Mass': ['Analytical Balance', 'Platform Scale', 'Reference Weight Set'],
+    'Flow': ['Flow Meter', 'Rotameter', 'Mass Flow Controller'],
+}
+MANUFACTURERS = [
+    'Fluke', 'Keysight', 'Mitutoyo', 'Mettler Toledo', 'WIKA', 'Beamex',
+    'Druck', 'Yokogawa', 'Endress+Hauser', 'Tektronix', 'Sartorius', 'Ametek',
+]
+LOCATIONS = [
+    'Plant A - Line 1', 'Plant A - Line 2', 'Plant A - QC Lab',
+    'Plant B - Assembly', 'Plant B - Stores', 'Plant B - Metrology Lab',
+    'Site C - Clean Room', 'Site C - Warehouse', 'Head Office - Lab',
+]
+# Weighted towards the intervals labs actually use
+INTERVALS = [
+    ('months', 6), ('months', 12), ('months', 12), ('years', 1),
+    ('years', 1), ('years', 2), ('weeks', 26), ('days', 90),
+]
+STANDARDS = ['ISO/IEC 17025', 'NIST Traceable', 'UKAS Reference', 'SANAS Ref Std']
+PROVIDERS = ['In-house', 'OEM Service', 'Calibration Services Ltd', 'MetroCal']
+RESULT_LINES = [
+    'Completed',
+    'Pass - within tolerance at all points',
+    'Pass - adjusted, as-left within tolerance',
+    'Fail - out of tolerance, sent for repair',
+]
+
+
+class Command(BaseCommand):
+    help = 'Populate the database with a synthetic equipment fleet and history.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--equipment', type=int, default=1000,
+                            help='Number of instruments to create.')
+        parser.add_argument('--history', type=int, default=10,
+                            help='History records (calibrations and maintenance) per instrument.')
+        parser.add_argument('--technicians', type=int, default=25,
+                            help='Number of technician users to create.')
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Random seed; the same seed yields the same fleet.')
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='Rows per bulk INSERT.')
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete existing equipment and history first.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        started = timezone.now()
+
+        with transaction.atomic():
+            if options['clear']:
+                Equipment.objects.all().delete()
+            technicians = self._technicians(options['technicians'])
+            equipment = self._equipment(rng, options['equipment'], technicians, batch_size)
+            calibrations, maintenance = self._history(
+                rng, equipment, technicians, options['history'], batch_size
+            )
+            # History was bulk-inserted without the counting signals
+            if equipment:
+                counters.refresh(Equipment.objects.filter(pk__gte=equipment[-1].pk))
+                compliance.rebuild({item.location for item in equipment})
+
+        elapsed = (timezone.now() - started).total_seconds()
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(equipment)} equipment, {calibrations} calibrations and '
+            f'{maintenance} maintenance records in {elapsed:.1f}s'
+        ))
+
+    def _technicians(self, count):
+        usernames = [f'tech{index:03d}' for index in range(1, count + 1)]
+        existing = set(
+            User.objects.filter(username__in=usernames).values_list('username', flat=True)
+        )
+        User.objects.bulk_create([
+            User(username=username, first_name='Tech', last_name=username[4:])
+            for username in usernames
+            if username not in existing
+        ])
+        return list(User.objects.filter(username__in=usernames))
+
+    def _equipment(self, rng, count, technicians, batch_size):
+        today = timezone.now().date()
+        offset = Equipment.objects.count()
+        rows = []
+        for index in range(offset, offset + count):
+            category = rng.choice(list(CATEGORIES))
+            interval_type, interval_value = rng.choice(INTERVALS)
+            rows.append(Equipment(
+                name=f'{rng.choice(CATEGORIES[category])} {index + 1:06d}',
+                serial_number=f'SN-{index + 1:08d}',
+                category=category,
+                purchase_date=today - timedelta(days=rng.randint(180, 365 * 15)),
+                model_number=f'{rng.choice("ABCDEFGHJK")}{rng.randint(100, 9999)}',
+                manufacturer=rng.choice(MANUFACTURERS),
+                location=rng.choice(LOCATIONS),
+                calibration_interval_type=interval_type,
+                calibration_interval_value=interval_value,
+                created_by=rng.choice(technicians) if technicians else None,
+                is_active=rng.random() > 0.05,
+            ))
+        Equipment.objects.bulk_create(rows, batch_size=batch_size)
+        return list(Equipment.objects.order_by('-pk')[:count])
+
+    def _history(self, rng, equipment, technicians, per_item, batch_size):
+        today = timezone.now().date()
+        tz = timezone.get_current_timezone()
+        calibrations, maintenance, updated = [], [], []
+        calibration_total = maintenance_total = 0
+
+        def at(day):
+            moment = time(rng.randint(7, 17), rng.randint(0, 59))
+            return timezone.make_aware(datetime.combine(day, moment), tz)
+
+        for item in equipment:
+            interval = item.get_calibration_interval_days()
+            # Walk back from a point that leaves ~15% of the fleet overdue
+            day = today - timedelta(days=rng.randint(0, int(interval * 1.15)))
+            last_calibration = None
+            for _ in range(per_item):
+                if rng.random() < 0.7:
+                    calibrations.append(Calibration(
+                        equipment=item,
+                        calibration_date=at(day),
+                        calibrated_by=rng.choice(technicians) if technicians else None,
+                        calibration_standard=rng.choice(STANDARDS),
+                        measurement_point=f'{rng.randint(1, 10) * 10}% FS',
+                        results=rng.choice(RESULT_LINES),
+                    ))
+                    last_calibration = last_calibration or day
+                    day -= timedelta(days=interval)
+                else:
+                    maintenance.append(Maintenance(
+                        equipment=item,
+                        maintenance_date=at(day - timedelta(days=rng.randint(1, 30))),
+                        performed_by=rng.choice(technicians) if technicians else None,
+                        service_provider=rng.choice(PROVIDERS),
+                        description='Routine service and functional check',
+                        returned_to_production=rng.random() > 0.1,
+                    ))
+            if last_calibration:
+                item.last_calibration_date = last_calibration
+                item.next_calibration_date = last_calibration + timedelta(days=interval)
+                updated.append(item)
+
+            if len(calibrations) >= batch_size:
+                calibration_total += len(Calibration.objects.bulk_create(calibrations))
+                calibrations = []
+            if len(maintenance) >= batch_size:
+                maintenance_total += len(Maintenance.objects.bulk_create(maintenance))
+                maintenance = []
+
+        calibration_total += len(Calibration.objects.bulk_create(calibrations))
+        maintenance_total += len(Maintenance.objects.bulk_create(maintenance))
+        # bulk_create skips Calibration.save, so set the due dates directly
+        Equipment.objects.bulk_update(
+            updated,
+            ['last_calibration_date', 'next_calibration_date'],
+            batch_size=batch_size,
+        )
+        return calibration_total, maintenance_total
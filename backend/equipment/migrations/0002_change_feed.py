@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:13
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=50)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['deleted_at', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='calibration',
+            index=models.Index(fields=['updated_at', 'id'], name='equipment_c_updated_4626b0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['updated_at', 'id'], name='equipment_e_updated_4439d2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenance',
+            index=models.Index(fields=['updated_at', 'id'], name='equipment_m_updated_c5f59f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deletiontombstone',
+            index=models.Index(fields=['model', 'deleted_at', 'id'], name='equipment_d_model_070538_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Range-partitions the calibration and maintenance history by year on
+# PostgreSQL; other databases keep plain tables.
+
+from django.db import migrations
+from django.utils import timezone
+
+from calibrify.db import partitioning
+
+TABLES = {
+    'equipment_calibration': 'calibration_date',
+    'equipment_maintenance': 'maintenance_date',
+}
+
+
+def partition(apps, schema_editor):
+    connection = schema_editor.connection
+    if not partitioning.supported(connection):
+        return
+    year = timezone.now().year
+    for table, column in TABLES.items():
+        if not partitioning.is_partitioned(connection, table):
+            partitioning.partition_by_year(connection, table, column, [year, year + 1])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0002_change_feed'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, migrations.RunPython.noop, elidable=False),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:24
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Equipment = apps.get_model('equipment', 'Equipment')
+    Calibration = apps.get_model('equipment', 'Calibration')
+    Maintenance = apps.get_model('equipment', 'Maintenance')
+    per_equipment = lambda queryset: Coalesce(Subquery(
+        queryset.filter(equipment=OuterRef('pk'))
+        .order_by().values('equipment').annotate(total=Count('id')).values('total')
+    ), 0)
+    Equipment.objects.using(schema_editor.connection.alias).update(
+        calibration_count=per_equipment(Calibration.objects.all()),
+        open_maintenance_count=per_equipment(
+            Maintenance.objects.filter(returned_to_production=False)
+        ),
+        last_maintenance_date=Subquery(
+            Maintenance.objects.filter(equipment=OuterRef('pk'))
+            .order_by('-maintenance_date').values('maintenance_date')[:1]
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0003_partition_history'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipment',
+            name='calibration_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='equipment',
+            name='last_maintenance_date',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='equipment',
+            name='open_maintenance_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['calibration_count'], name='equipment_e_calibra_17d9bb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['open_maintenance_count'], name='equipment_e_open_ma_bf283c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['last_maintenance_date'], name='equipment_e_last_ma_d7ae2c_idx'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:38
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.utils import timezone
+
+
+def fill_summaries(apps, schema_editor):
+    Equipment = apps.get_model('equipment', 'Equipment')
+    ComplianceSummary = apps.get_model('equipment', 'ComplianceSummary')
+    alias = schema_editor.connection.alias
+    day = timezone.now().date()
+    days = settings.COMPLIANCE_DUE_SOON_DAYS
+    rows = (
+        Equipment.objects.using(alias)
+        .filter(is_active=True, next_calibration_date__lte=day + timedelta(days=days))
+        .order_by().values('location')
+        .annotate(
+            overdue=Count('id', filter=Q(next_calibration_date__lt=day)),
+            due_soon=Count('id', filter=Q(next_calibration_date__gte=day)),
+        )
+    )
+    ComplianceSummary.objects.using(alias).bulk_create(
+        ComplianceSummary(as_of=day, due_soon_days=days, **row) for row in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0004_equipment_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplianceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location', models.CharField(max_length=200, unique=True)),
+                ('as_of', models.DateField()),
+                ('due_soon_days', models.PositiveIntegerField()),
+                ('overdue', models.PositiveIntegerField(default=0)),
+                ('due_soon', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Compliance summaries',
+                'ordering': ['location'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['location', 'next_calibration_date', 'id'], name='equipment_location_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['next_calibration_date', 'id'], name='equipment_due_idx'),
+        ),
+        migrations.RunPython(fill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:42
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('equipment', '0005_compliance_queues'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LabCapacity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location', models.CharField(max_length=200, unique=True)),
+                ('daily_capacity', models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1)])),
+            ],
+            options={
+                'verbose_name_plural': 'Lab capacities',
+                'ordering': ['location'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TechnicianShift',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('max_jobs', models.PositiveIntegerField(default=8, validators=[django.core.validators.MinValueValidator(1)])),
+                ('technician', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='calibration_shifts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['day', 'technician'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ScheduledCalibration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('sequence', models.PositiveIntegerField(default=0)),
+                ('due_date', models.DateField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('equipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scheduled_calibrations', to='equipment.equipment')),
+                ('technician', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scheduled_calibrations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['day', 'technician', 'sequence'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='technicianshift',
+            constraint=models.UniqueConstraint(fields=('technician', 'day'), name='unique_technician_shift'),
+        ),
+        migrations.AddIndex(
+            model_name='scheduledcalibration',
+            index=models.Index(fields=['day', 'technician', 'sequence'], name='equipment_s_day_1326a7_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:53
+
+import calibrify.db.compression
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0007_duplicate_candidates'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='calibration',
+            name='notes',
+            field=calibrify.db.compression.CompressedTextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='calibration',
+            name='results',
+            field=calibrify.db.compression.CompressedTextField(),
+        ),
+        migrations.AlterField(
+            model_name='maintenance',
+            name='description',
+            field=calibrify.db.compression.CompressedTextField(),
+        ),
+        migrations.AlterField(
+            model_name='maintenance',
+            name='notes',
+            field=calibrify.db.compression.CompressedTextField(blank=True),
+        ),
+    ]
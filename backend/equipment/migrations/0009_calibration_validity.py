@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:02
+
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db import migrations, models
+from django.db.models import DateField, ExpressionWrapper
+from django.db.models.functions import TruncDate
+
+from equipment.models import calibration_interval_days
+
+
+def fill_validity(apps, schema_editor):
+    """Existing calibrations are valid for their instrument's current interval."""
+    Calibration = apps.get_model('equipment', 'Calibration')
+    Equipment = apps.get_model('equipment', 'Equipment')
+    using = schema_editor.connection.alias
+    intervals = Equipment.objects.using(using).values_list(
+        'calibration_interval_type', 'calibration_interval_value'
+    ).order_by().distinct()
+    for interval_type, interval_value in list(intervals):
+        Calibration.objects.using(using).filter(
+            equipment__calibration_interval_type=interval_type,
+            equipment__calibration_interval_value=interval_value,
+        ).update(valid_until=ExpressionWrapper(
+            TruncDate('calibration_date', tzinfo=dt_timezone.utc) + timedelta(
+                days=calibration_interval_days(interval_type, interval_value)
+            ),
+            output_field=DateField(),
+        ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0008_compressed_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calibration',
+            name='valid_until',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_validity, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='calibration',
+            index=models.Index(fields=['equipment', '-calibration_date', 'valid_until'], name='calibration_validity_idx'),
+        ),
+    ]
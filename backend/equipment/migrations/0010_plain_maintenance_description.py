@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:23
+
+from django.db import migrations, models
+
+from calibrify.db.compression import MARKER, decompress
+
+
+def decompress_descriptions(apps, schema_editor):
+    """Store compressed descriptions as plain text again, in batches."""
+    Maintenance = apps.get_model('equipment', 'Maintenance')
+    using = schema_editor.connection.alias
+    pending = Maintenance.objects.using(using).filter(
+        description__startswith=MARKER
+    ).only('description').order_by('pk')
+    last = 0
+    while True:
+        batch = list(pending.filter(pk__gt=last)[:500])
+        if not batch:
+            break
+        for maintenance in batch:
+            maintenance.description = decompress(maintenance.description)
+        Maintenance.objects.using(using).bulk_update(batch, ['description'])
+        last = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0009_calibration_validity'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='maintenance',
+            name='description',
+            field=models.TextField(),
+        ),
+        migrations.RunPython(decompress_descriptions, migrations.RunPython.noop),
+    ]
@@ -3,11 +3,39 @@
 # Description: Models for equipment management system
 # ============================================================================
 
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 
+from calibrify.db.compression import CompressedTextField
+
+# Days per calibration interval unit; months and years are approximated
+INTERVAL_DAYS = {
+    'days': 1,
+    'weeks': 7,
+    'months': 30,
+    'years': 365,
+}
+
+
+# Columns derived from the history tables (by Calibration.save and
+# counters.py) and only ever written with targeted updates; a plain
+# Equipment.save() leaves them alone
+DERIVED_FIELDS = (
+    'last_calibration_date',
+    'next_calibration_date',
+    'calibration_count',
+    'open_maintenance_count',
+    'last_maintenance_date',
+)
+
+
+def calibration_interval_days(interval_type, interval_value):
+    """Convert a calibration interval to a number of days."""
+    return interval_value * INTERVAL_DAYS.get(interval_type, 1)
+
+
 class Equipment(models.Model):
     """Model for tracking equipment items."""
     
@@ -42,19 +70,55 @@ class Equipment(models.Model):
     last_calibration_date = models.DateField(null=True, blank=True)
     next_calibration_date = models.DateField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
+    calibration_count = models.PositiveIntegerField(default=0, editable=False)
+    open_maintenance_count = models.PositiveIntegerField(default=0, editable=False)
+    last_maintenance_date = models.DateTimeField(null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ['name']
         verbose_name_plural = 'Equipment'
+        indexes = [
+            # Keyset order of the change feed
+            models.Index(fields=['updated_at', 'id']),
+            models.Index(fields=['calibration_count']),
+            models.Index(fields=['open_maintenance_count']),
+            models.Index(fields=['last_maintenance_date']),
+            # Compliance queues: active instruments by due date, per site
+            # and across all of them
+            models.Index(
+                fields=['location', 'next_calibration_date', 'id'],
+                condition=models.Q(is_active=True),
+                name='equipment_location_due_idx',
+            ),
+            models.Index(
+                fields=['next_calibration_date', 'id'],
+                condition=models.Q(is_active=True),
+                name='equipment_due_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.serial_number})"
 
     def save(self, *args, **kwargs):
         if not self.pk:  # Only on creation
-            self.created_by = kwargs.pop('user', None)
+            self.created_by = kwargs.pop('user', None) or self.created_by
+        elif not self._state.adding and kwargs.get('update_fields') is None:
+            # Writing back a copy loaded earlier would undo history updates
+            # made since
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in DERIVED_FIELDS
+            ]
         super().save(*args, **kwargs)
 
+    def get_calibration_interval_days(self):
+        """Return the calibration interval expressed in days."""
+        return calibration_interval_days(
+            self.calibration_interval_type,
+            self.calibration_interval_value,
+        )
+
 class Calibration(models.Model):
     """Model for tracking equipment calibrations."""
     
@@ -72,43 +136,115 @@ class Calibration(models.Model):
     )
     calibration_standard = models.CharField(max_length=200)
     measurement_point = models.CharField(max_length=200)
-    results = models.TextField()
-    notes = models.TextField(blank=True)
+    # Often pasted instrument output; long values are stored compressed
+    results = CompressedTextField()
+    notes = CompressedTextField(blank=True)
     certificate_file = models.FileField(
         upload_to='calibration_certificates/',
         null=True,
         blank=True
     )
+    # Due date this calibration set, with the interval of the day it was
+    # recorded: the instrument is in calibration until then, unless a
+    # later calibration replaces it
+    valid_until = models.DateField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-calibration_date']
         verbose_name_plural = 'Calibrations'
+        indexes = [
+            # Keyset order of the change feed
+            models.Index(fields=['updated_at', 'id']),
+            # As-of snapshots: an instrument's latest calibration before a
+            # date and its validity, from the index alone
+            models.Index(
+                fields=['equipment', '-calibration_date', 'valid_until'],
+                name='calibration_validity_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"Calibration of {self.equipment.name} on {self.calibration_date}"
 
     def save(self, *args, **kwargs):
-        if not self.pk:  # Only on creation
-            self.calibrated_by = kwargs.pop('user', None)
-            # Update equipment's last and next calibration dates
-            self.equipment.last_calibration_date = self.calibration_date.date()
-            # Calculate next calibration date based on interval
-            interval_days = self.equipment.calibration_interval_value
-            if self.equipment.calibration_interval_type == 'days':
-                interval_days *= 1
-            elif self.equipment.calibration_interval_type == 'weeks':
-                interval_days *= 7
-            elif self.equipment.calibration_interval_type == 'months':
-                interval_days *= 30
-            elif self.equipment.calibration_interval_type == 'years':
-                interval_days *= 365
-            self.equipment.next_calibration_date = (
-                self.calibration_date.date() + timezone.timedelta(days=interval_days)
+        if self.pk:
+            self._revalidate(kwargs)
+            super().save(*args, **kwargs)
+            return
+        self.calibrated_by = kwargs.pop('user', None) or self.calibrated_by
+        with transaction.atomic(using=kwargs.get('using')):
+            # Lock the instrument before inserting: concurrent calibrations
+            # of it then move its due dates one after another. NO KEY UPDATE
+            # does not conflict with the lock the history row's foreign key
+            # check takes on it.
+            equipment = (
+                Equipment.objects.using(kwargs.get('using'))
+                .select_for_update(no_key=True)
+                .only('calibration_interval_type', 'calibration_interval_value',
+                      'last_calibration_date', 'next_calibration_date',
+                      'location', 'is_active')
+                .get(pk=self.equipment_id)
             )
-            self.equipment.save()
-        super().save(*args, **kwargs)
+            if self.valid_until is None:
+                self.valid_until = self.calibration_date.date() + timezone.timedelta(
+                    days=equipment.get_calibration_interval_days()
+                )
+            super().save(*args, **kwargs)
+            self._move_due_dates(equipment)
+
+    def _revalidate(self, kwargs):
+        """
+        Recompute ``valid_until`` when an edit moves the calibration to
+        another date or instrument, with that instrument's interval.
+        """
+        using = kwargs.get('using') or self._state.db
+        stored = Calibration.objects.using(using).filter(pk=self.pk).values(
+            'calibration_date', 'equipment_id'
+        ).first()
+        if stored is None or (stored['calibration_date'], stored['equipment_id']) == (
+            self.calibration_date, self.equipment_id
+        ):
+            return
+        equipment = Equipment.objects.using(using).only(
+            'calibration_interval_type', 'calibration_interval_value'
+        ).get(pk=self.equipment_id)
+        self.valid_until = self.calibration_date.date() + timezone.timedelta(
+            days=equipment.get_calibration_interval_days()
+        )
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'valid_until'}
+
+    def _move_due_dates(self, equipment):
+        """
+        Update the instrument's last and next calibration dates, unless a
+        later calibration is already recorded. Only those columns are
+        written, so concurrent edits to the rest of the row are kept.
+        """
+        day = self.calibration_date.date()
+        if equipment.last_calibration_date and equipment.last_calibration_date > day:
+            return
+        dates = {
+            'last_calibration_date': day,
+            'next_calibration_date': self.valid_until,
+        }
+        Equipment.objects.using(equipment._state.db).filter(pk=equipment.pk).update(
+            updated_at=timezone.now(), **dates
+        )
+        # Imported here: compliance and scheduling import this module
+        from .compliance import moved, state
+        from .scheduling import unschedule
+        moved(
+            state(equipment.location, equipment.next_calibration_date, equipment.is_active),
+            state(equipment.location, dates['next_calibration_date'], equipment.is_active),
+            using=equipment._state.db,
+        )
+        unschedule([equipment.pk], using=equipment._state.db)
+        # Keep an already loaded instrument in step with the row
+        if Calibration.equipment.is_cached(self):
+            for field, value in dates.items():
+                setattr(self.equipment, field, value)
 
 class Maintenance(models.Model):
     """Model for tracking equipment maintenance."""
@@ -126,9 +262,11 @@ class Maintenance(models.Model):
         related_name='performed_maintenance'
     )
     service_provider = models.CharField(max_length=200)
+    # Plain text: the API and admin search it, which compressed values
+    # would not match
     description = models.TextField()
     returned_to_production = models.BooleanField(default=False)
-    notes = models.TextField(blank=True)
+    notes = CompressedTextField(blank=True)
     certificate_file = models.FileField(
         upload_to='maintenance_certificates/',
         null=True,
@@ -140,11 +278,182 @@ class Maintenance(models.Model):
     class Meta:
         ordering = ['-maintenance_date']
         verbose_name_plural = 'Maintenance Records'
+        indexes = [
+            # Keyset order of the change feed
+            models.Index(fields=['updated_at', 'id']),
+        ]
 
     def __str__(self):
         return f"Maintenance of {self.equipment.name} on {self.maintenance_date}"
 
     def save(self, *args, **kwargs):
         if not self.pk:  # Only on creation
-            self.performed_by = kwargs.pop('user', None)
+            self.performed_by = kwargs.pop('user', None) or self.performed_by
         super().save(*args, **kwargs)
+
+
+class ComplianceSummary(models.Model):
+    """
+    Active instruments per location that are overdue for calibration, or
+    due within ``due_soon_days`` of ``as_of``. Kept current by
+    ``compliance.py`` as due dates change and rolled forward daily, so
+    overdue counts are read without scanning equipment.
+    """
+
+    location = models.CharField(max_length=200, unique=True)
+    as_of = models.DateField()
+    due_soon_days = models.PositiveIntegerField()
+    overdue = models.PositiveIntegerField(default=0)
+    due_soon = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['location']
+        verbose_name_plural = 'Compliance summaries'
+
+    def __str__(self):
+        return f"{self.location}: {self.overdue} overdue, {self.due_soon} due soon"
+
+
+class TechnicianShift(models.Model):
+    """A day a technician is available for calibrations, and how many."""
+
+    technician = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='calibration_shifts'
+    )
+    day = models.DateField()
+    max_jobs = models.PositiveIntegerField(default=8, validators=[MinValueValidator(1)])
+
+    class Meta:
+        ordering = ['day', 'technician']
+        constraints = [
+            models.UniqueConstraint(fields=['technician', 'day'], name='unique_technician_shift'),
+        ]
+
+    def __str__(self):
+        return f"{self.technician} on {self.day} ({self.max_jobs} jobs)"
+
+
+class LabCapacity(models.Model):
+    """
+    Calibrations one location can take per day (bench space, reference
+    standards). Locations without a row are not limited.
+    """
+
+    location = models.CharField(max_length=200, unique=True)
+    daily_capacity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+
+    class Meta:
+        ordering = ['location']
+        verbose_name_plural = 'Lab capacities'
+
+    def __str__(self):
+        return f"{self.location}: {self.daily_capacity} per day"
+
+
+class ScheduledCalibration(models.Model):
+    """An instrument's slot in the calibration plan made by ``scheduling.py``."""
+
+    equipment = models.ForeignKey(
+        Equipment,
+        on_delete=models.CASCADE,
+        related_name='scheduled_calibrations'
+    )
+    technician = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='scheduled_calibrations'
+    )
+    day = models.DateField()
+    # Visit order within the technician's day, grouped by site and location
+    sequence = models.PositiveIntegerField(default=0)
+    due_date = models.DateField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['day', 'technician', 'sequence']
+        indexes = [
+            models.Index(fields=['day', 'technician', 'sequence']),
+        ]
+
+    def __str__(self):
+        return f"{self.equipment} by {self.technician} on {self.day}"
+
+
+class DuplicateCandidate(models.Model):
+    """
+    Two instruments that look like the same physical one, found by
+    ``dedup.py``. Merging keeps ``equipment`` and retires ``duplicate``.
+    """
+
+    PENDING = 'pending'
+    MERGED = 'merged'
+    DISMISSED = 'dismissed'
+
+    equipment = models.ForeignKey(
+        Equipment,
+        on_delete=models.CASCADE,
+        related_name='duplicate_candidates'
+    )
+    duplicate = models.ForeignKey(
+        Equipment,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.FloatField()
+    # Fields that matched after normalisation, e.g. "serial, model"
+    reasons = models.CharField(max_length=100, blank=True)
+    status = models.CharField(
+        max_length=20,
+        choices=[
+            (PENDING, 'Pending'),
+            (MERGED, 'Merged'),
+            (DISMISSED, 'Dismissed'),
+        ],
+        default=PENDING
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+    reviewed_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+
+    class Meta:
+        ordering = ['-score', 'id']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['equipment', 'duplicate'], name='unique_duplicate_candidate'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', '-score']),
+        ]
+
+    def __str__(self):
+        return f"{self.duplicate} may duplicate {self.equipment} ({self.score:.2f})"
+
+
+class DeletionTombstone(models.Model):
+    """
+    Record of a deleted row, so offline clients syncing from the change
+    feed learn to drop their copy.
+    """
+
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['deleted_at', 'id']
+        indexes = [
+            models.Index(fields=['model', 'deleted_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted {self.deleted_at}"
@@ -0,0 +1,154 @@
+# ============================================================================
+# File Path: backend/equipment/projection.py
+# Description: List output straight from values_list() rows, laid out like
+#              a ModelSerializer's but without model instances
+# ============================================================================
+
+from collections import defaultdict
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import fields as drf_fields
+from rest_framework import relations, serializers
+
+# How a field's value is produced from a row
+VALUE, CONTEXT, METHOD, NESTED, MANY = range(5)
+
+# Fields whose representation is the database value itself
+PLAIN = (
+    drf_fields.BooleanField, drf_fields.CharField, drf_fields.IntegerField,
+    relations.PrimaryKeyRelatedField,
+)
+
+
+def file_url(storage):
+    """Converter for a ``FileField``: its URL, absolute when there is a request."""
+    def convert(name, context):
+        if not name:
+            return None
+        url = storage.url(name)
+        request = context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+    return convert
+
+
+def is_plain(field):
+    if isinstance(field, drf_fields.ChoiceField):
+        return all(isinstance(key, str) for key in field.choices)
+    return isinstance(field, PLAIN)
+
+
+class Projection:
+    """
+    The fields of ``serializer_class`` compiled once into the columns to
+    read with ``values_list()`` and one step per output field: a column
+    kept as it is or passed through the field's ``to_representation``, a
+    nested serializer read through the foreign key's columns, or a nested
+    ``many=True`` serializer read with one more query for the whole page.
+
+    ``SerializerMethodField``s are computed by the functions the
+    serializer lists in ``projected``, as ``{name: (columns, function)}``
+    with ``function(*values, context)``.
+    """
+
+    def __init__(self, serializer_class, prefix='', columns=None):
+        self.serializer_class = serializer_class
+        self.model = serializer_class.Meta.model
+        # Nested serializers add their columns to the outer row
+        self.columns = [] if columns is None else columns
+        self.steps = []
+        self.many = []
+        projected = getattr(serializer_class, 'projected', {})
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            self.steps.append((name,) + self._compile(name, field, prefix, projected))
+
+    def _column(self, path):
+        if path not in self.columns:
+            self.columns.append(path)
+        return self.columns.index(path)
+
+    def _compile(self, name, field, prefix, projected):
+        if isinstance(field, serializers.SerializerMethodField):
+            if name not in projected:
+                raise ImproperlyConfigured(
+                    f'{self.serializer_class.__name__}.projected has no entry for {name!r}.'
+                )
+            columns, function = projected[name]
+            indexes = [self._column(prefix + column) for column in columns]
+            return METHOD, indexes, function
+        if isinstance(field, serializers.ListSerializer):
+            if prefix:
+                raise ImproperlyConfigured(f'{name!r}: many=True is only projected at the top.')
+            relation = self.model._meta.get_field(field.source)
+            self.many.append((name, Projection(type(field.child)), relation.field.attname))
+            return MANY, self._column(self.model._meta.pk.name), None
+        if isinstance(field, serializers.BaseSerializer):
+            nested = Projection(
+                type(field), prefix=f'{prefix}{field.source}__', columns=self.columns
+            )
+            if nested.many:
+                raise ImproperlyConfigured(f'{name!r}: many=True is only projected at the top.')
+            return NESTED, self._column(prefix + field.source), nested.steps
+        index = self._column(prefix + field.source)
+        if isinstance(field, drf_fields.FileField):
+            storage = self.model._meta.get_field(field.source).storage
+            return CONTEXT, index, file_url(storage)
+        return VALUE, index, None if is_plain(field) else field.to_representation
+
+    def values(self, queryset, *extra):
+        """``queryset`` as the rows ``render`` takes; ``extra`` columns go last."""
+        return queryset.values_list(*self.columns, *extra)
+
+    def render(self, rows, context=None):
+        """Output dicts for ``rows``, as the serializer would give them."""
+        context = context or {}
+        related = {}
+        if self.many:
+            parents = [row[self.columns.index(self.model._meta.pk.name)] for row in rows]
+            for name, child, attname in self.many:
+                related[name] = child.related(attname, parents, context)
+        return [self._render(self.steps, row, context, related) for row in rows]
+
+    def related(self, attname, parents, context):
+        """Output for this model's rows of ``parents``, by parent id in default order."""
+        grouped = defaultdict(list)
+        if not parents:
+            return grouped
+        rows = list(self.values(
+            self.model._default_manager.filter(**{f'{attname}__in': parents}), attname
+        ))
+        for row, item in zip(rows, self.render(rows, context)):
+            grouped[row[-1]].append(item)
+        return grouped
+
+    def _render(self, steps, row, context, related):
+        item = {}
+        for name, kind, index, convert in steps:
+            if kind == VALUE:
+                value = row[index]
+                item[name] = value if convert is None or value is None else convert(value)
+            elif kind == CONTEXT:
+                item[name] = convert(row[index], context)
+            elif kind == METHOD:
+                item[name] = convert(*[row[i] for i in index], context)
+            elif kind == NESTED:
+                item[name] = (
+                    None if row[index] is None
+                    else self._render(convert, row, context, related)
+                )
+            else:
+                item[name] = related[name].get(row[index], [])
+        return item
+
+
+_projections = {}
+
+
+def of(serializer_class):
+    """The ``Projection`` of ``serializer_class``, compiled on first use."""
+    try:
+        return _projections[serializer_class]
+    except KeyError:
+        return _projections.setdefault(serializer_class, Projection(serializer_class))
+
@@ -0,0 +1,279 @@
+# ============================================================================
+# File Path: backend/equipment/rendering.py
+# Description: Asset label sheets and calibration certificate pages drawn
+#              with Pillow, and the PDF and ZIP files they are streamed in
+# ============================================================================
+
+# Runs in the document worker processes: nothing here may import Django.
+
+import time
+import zipfile
+import zlib
+from collections import namedtuple
+
+# Bump when the layout changes: cached pages of older versions are ignored
+VERSION = 1
+
+DPI = 150
+# A4 at DPI
+PAGE_SIZE = (1240, 1754)
+MARGIN = 60
+# Label sheet: 3 x 8 labels of about 70 x 36 mm
+LABEL_COLUMNS, LABEL_ROWS = 3, 8
+LABEL_SIZE = (
+    (PAGE_SIZE[0] - 2 * MARGIN) // LABEL_COLUMNS,
+    (PAGE_SIZE[1] - 2 * MARGIN) // LABEL_ROWS,
+)
+LABELS_PER_SHEET = LABEL_COLUMNS * LABEL_ROWS
+
+# One 8-bit grayscale raster, zlib-compressed, as the PDF embeds it
+Page = namedtuple('Page', 'width height data')
+
+# Code 128 bar and space widths of each symbol value, in modules; 103-105
+# start code sets A-C, 106 is the stop pattern
+CODE128 = (
+    '212222', '222122', '222221', '121223', '121322', '131222', '122213', '122312',
+    '132212', '221213', '221312', '231212', '112232', '122132', '122231', '113222',
+    '123122', '123221', '223211', '221132', '221231', '213212', '223112', '312131',
+    '311222', '321122', '321221', '312212', '322112', '322211', '212123', '212321',
+    '232121', '111323', '131123', '131321', '112313', '132113', '132311', '211313',
+    '231113', '231311', '112133', '112331', '132131', '113123', '113321', '133121',
+    '313121', '211331', '231131', '213113', '213311', '213131', '311123', '311321',
+    '331121', '312113', '312311', '332111', '314111', '221411', '431111', '111224',
+    '111422', '121124', '121421', '141122', '141221', '112214', '112412', '122114',
+    '122411', '142112', '142211', '241211', '221114', '413111', '241112', '134111',
+    '111242', '121142', '121241', '114212', '124112', '124211', '411212', '421112',
+    '421211', '212141', '214121', '412121', '111143', '111341', '131141', '114113',
+    '114311', '411113', '411311', '113141', '114131', '311141', '411131', '211412',
+    '211214', '211232', '2331112',
+)
+START_B, STOP = 104, 106
+# Clear space either side of a barcode, in modules
+QUIET_ZONE = 10
+
+
+def code128(value):
+    """
+    Bar and space widths of ``value`` as a Code 128 (code set B) barcode,
+    quiet zones excluded. Characters outside printable ASCII become ``?``.
+    """
+    symbols = [START_B] + [
+        ord(char) - 32 if 32 <= ord(char) < 127 else ord('?') - 32 for char in value
+    ]
+    checksum = (symbols[0] + sum(position * symbol for position, symbol in enumerate(
+        symbols[1:], 1
+    ))) % 103
+    symbols += [checksum, STOP]
+    return [int(width) for symbol in symbols for width in CODE128[symbol]]
+
+
+def _font(size):
+    from PIL import ImageFont
+    try:
+        return ImageFont.truetype('DejaVuSans.ttf', size)
+    except OSError:
+        return ImageFont.load_default(size)
+
+
+def _fit(draw, text, font, width):
+    """``text`` cut short with an ellipsis to fit ``width`` pixels."""
+    if draw.textlength(text, font=font) <= width:
+        return text
+    while text and draw.textlength(text + '…', font=font) > width:
+        text = text[:-1]
+    return text + '…'
+
+
+def _barcode(draw, value, box):
+    """Draw ``value`` as Code 128 centred in ``box`` with whole-pixel modules."""
+    left, top, right, bottom = box
+    widths = code128(value)
+    modules = sum(widths) + 2 * QUIET_ZONE
+    module = max(1, (right - left) // modules)
+    x = left + ((right - left) - (modules - 2 * QUIET_ZONE) * module) // 2
+    for index, width in enumerate(widths):
+        if index % 2 == 0:
+            draw.rectangle((x, top, x + width * module - 1, bottom), fill=0)
+        x += width * module
+
+
+def _page(image):
+    return Page(image.width, image.height, zlib.compress(image.tobytes(), 6))
+
+
+def _image(page):
+    from PIL import Image
+    return Image.frombytes('L', (page.width, page.height), zlib.decompress(page.data))
+
+
+def render_label(fields):
+    """One asset label: name, serial number barcode and next due date."""
+    from PIL import Image, ImageDraw
+    width, height = LABEL_SIZE
+    image = Image.new('L', LABEL_SIZE, 255)
+    draw = ImageDraw.Draw(image)
+    pad = 16
+    draw.rectangle((0, 0, width - 1, height - 1), outline=160)
+    title, small = _font(26), _font(20)
+    draw.text((pad, pad), _fit(draw, fields['name'], title, width - 2 * pad), font=title, fill=0)
+    _barcode(draw, fields['serial_number'], (pad, 56, width - pad, height - 62))
+    draw.text(
+        (pad, height - 56), _fit(draw, fields['serial_number'], small, width - 2 * pad),
+        font=small, fill=0,
+    )
+    draw.text((pad, height - 32), f"Next due: {fields['next_due'] or 'not calibrated'}",
+              font=small, fill=0)
+    return _page(image)
+
+
+def render_sheet(labels):
+    """
+    A page of labels, laid out in rows. ``labels`` holds a rendered label
+    ``Page`` or the fields of one to render; returns the sheet and the
+    labels rendered for it, by position.
+    """
+    from PIL import Image
+    sheet = Image.new('L', PAGE_SIZE, 255)
+    rendered = {}
+    for index, label in enumerate(labels):
+        if not isinstance(label, Page):
+            label = rendered[index] = render_label(label)
+        row, column = divmod(index, LABEL_COLUMNS)
+        sheet.paste(_image(label), (MARGIN + column * LABEL_SIZE[0], MARGIN + row * LABEL_SIZE[1]))
+    return _page(sheet), rendered
+
+
+def _wrap(draw, text, font, width):
+    """``text`` as lines no wider than ``width`` pixels, keeping its line breaks."""
+    lines = []
+    for paragraph in text.splitlines() or ['']:
+        line = ''
+        for word in paragraph.split(' '):
+            candidate = f'{line} {word}' if line else word
+            if line and draw.textlength(candidate, font=font) > width:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        lines.append(_fit(draw, line, font, width))
+    return lines
+
+
+def render_certificate(fields):
+    """A one-page summary of one calibration, for audit files."""
+    from PIL import Image, ImageDraw
+    image = Image.new('L', PAGE_SIZE, 255)
+    draw = ImageDraw.Draw(image)
+    width = PAGE_SIZE[0] - 2 * MARGIN
+    heading, label, body = _font(44), _font(24), _font(24)
+    y = MARGIN
+    draw.text((MARGIN, y), 'Calibration Certificate Summary', font=heading, fill=0)
+    y += 80
+    _barcode(draw, fields['serial_number'], (MARGIN, y, MARGIN + width // 2, y + 90))
+    y += 130
+    for name, value in (
+        ('Instrument', fields['name']),
+        ('Serial number', fields['serial_number']),
+        ('Manufacturer / model', f"{fields['manufacturer']} {fields['model_number']}"),
+        ('Location', fields['location']),
+        ('Calibrated on', fields['calibration_date']),
+        ('Calibrated by', fields['calibrated_by'] or '-'),
+        ('Reference standard', fields['calibration_standard']),
+        ('Measurement point', fields['measurement_point']),
+        ('Valid until', fields['valid_until'] or '-'),
+    ):
+        draw.text((MARGIN, y), name, font=label, fill=90)
+        draw.text((MARGIN + 340, y), _fit(draw, value, body, width - 340), font=body, fill=0)
+        y += 40
+    y += 30
+    draw.line((MARGIN, y, MARGIN + width, y), fill=160, width=2)
+    y += 30
+    draw.text((MARGIN, y), 'Results', font=label, fill=90)
+    y += 44
+    lines = _wrap(draw, fields['results'], body, width)
+    room = (PAGE_SIZE[1] - MARGIN - 40 - y) // 32
+    if len(lines) > room:
+        lines = lines[:room - 1] + [f'… {len(lines) - room + 1} more line(s) in the record']
+    for line in lines:
+        draw.text((MARGIN, y), line, font=body, fill=0)
+        y += 32
+    draw.text((MARGIN, PAGE_SIZE[1] - MARGIN - 24), f"Record {fields['id']}",
+              font=_font(18), fill=120)
+    return _page(image)
+
+
+def pdf(pages, dpi=DPI):
+    """
+    A PDF of ``pages``, one image each, yielded in pieces as the pages
+    arrive: nothing is held back but the object offsets for the index.
+    """
+    offsets = {}
+    written = 0
+
+    def chunk(data):
+        nonlocal written
+        written += len(data)
+        return data
+
+    def obj(number, body):
+        offsets[number] = written
+        return chunk(b'%d 0 obj\n%s\nendobj\n' % (number, body))
+
+    yield chunk(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    yield obj(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+    # The page tree is written last, once every page is known
+    kids = []
+    number = 3
+    for page in pages:
+        width, height = page.width * 72 / dpi, page.height * 72 / dpi
+        image, content, leaf = number, number + 1, number + 2
+        number += 3
+        yield obj(image, b'<< /Type /XObject /Subtype /Image /Width %d /Height %d '
+                         b'/ColorSpace /DeviceGray /BitsPerComponent 8 /Filter /FlateDecode '
+                         b'/Length %d >>\nstream\n%s\nendstream'
+                  % (page.width, page.height, len(page.data), page.data))
+        draw = b'q %.2f 0 0 %.2f 0 0 cm /Im Do Q' % (width, height)
+        yield obj(content, b'<< /Length %d >>\nstream\n%s\nendstream' % (len(draw), draw))
+        yield obj(leaf, b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] '
+                        b'/Resources << /XObject << /Im %d 0 R >> >> /Contents %d 0 R >>'
+                  % (width, height, image, content))
+        kids.append(leaf)
+    yield obj(2, b'<< /Type /Pages /Kids [%s] /Count %d >>'
+              % (b' '.join(b'%d 0 R' % kid for kid in kids), len(kids)))
+    start = written
+    yield b''.join(
+        [b'xref\n0 %d\n0000000000 65535 f \n' % number]
+        + [b'%010d 00000 n \n' % offsets[index] for index in range(1, number)]
+        + [b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (number, start)]
+    )
+
+
+class _Sink:
+    """Write-only, unseekable file for ``ZipFile`` that hands on what it got."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def zip_archive(files):
+    """A ZIP of ``(name, bytes)`` pairs, yielded as each file is added."""
+    sink = _Sink()
+    # PDF pages are already compressed
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for name, data in files:
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            archive.writestr(info, data)
+            yield sink.take()
+    yield sink.take()
@@ -0,0 +1,376 @@
+# ============================================================================
+# File Path: backend/equipment/scheduling.py
+# Description: Calibration plan assigning due instruments to technician days
+#              within lab capacity, by greedy construction and local search
+# ============================================================================
+
+import random
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Equipment, LabCapacity, ScheduledCalibration, TechnicianShift
+
+# Objective weights, in units of one instrument one day overdue. Changing
+# location within a site is cheap, crossing to another site is not; an
+# instrument left out of the plan costs as if it were done after the
+# horizon, plus a penalty so it is planned whenever there is room.
+OVERDUE_DAY_COST = 1.0
+EARLY_DAY_COST = 0.05
+LOCATION_CHANGE_COST = 0.5
+SITE_CHANGE_COST = 2.0
+UNSCHEDULED_COST = 30.0
+
+# Slots tried per instrument in each local search pass
+CANDIDATE_SLOTS = 12
+
+EPSILON = 1e-9
+
+
+def site_of(location):
+    """``'Plant A - QC Lab'`` is at site ``'Plant A'``."""
+    return location.split(' - ', 1)[0].strip()
+
+
+def time_cost(job, day):
+    late = (day - job.due).days
+    return late * OVERDUE_DAY_COST if late > 0 else -late * EARLY_DAY_COST
+
+
+class Job:
+    """One instrument to calibrate."""
+
+    __slots__ = ('equipment_id', 'location', 'site', 'due', 'slot')
+
+    def __init__(self, equipment_id, location, due):
+        self.equipment_id = equipment_id
+        self.location = location
+        self.site = site_of(location)
+        self.due = due
+        self.slot = None
+
+
+class Slot:
+    """One technician's day: the instruments given to it and where they are."""
+
+    __slots__ = ('technician_id', 'day', 'capacity', 'jobs', 'locations', 'sites')
+
+    def __init__(self, technician_id, day, capacity):
+        self.technician_id = technician_id
+        self.day = day
+        self.capacity = capacity
+        self.jobs = set()
+        self.locations = Counter()
+        self.sites = Counter()
+
+    @property
+    def free(self):
+        return self.capacity - len(self.jobs)
+
+    def travel(self):
+        """Cost of visiting every location of the day, grouped by site."""
+        if not self.locations:
+            return 0.0
+        return (
+            SITE_CHANGE_COST * (len(self.sites) - 1)
+            + LOCATION_CHANGE_COST * (len(self.locations) - len(self.sites))
+        )
+
+    def travel_with(self, job):
+        """Change in ``travel()`` if ``job`` were added."""
+        if not self.locations or job.location in self.locations:
+            return 0.0
+        return LOCATION_CHANGE_COST if job.site in self.sites else SITE_CHANGE_COST
+
+    def travel_without(self, job):
+        """Change in ``travel()`` if ``job``, which it holds, were removed."""
+        if self.locations[job.location] > 1:
+            return 0.0
+        if self.sites[job.site] > 1:
+            return -LOCATION_CHANGE_COST
+        return -SITE_CHANGE_COST if len(self.sites) > 1 else 0.0
+
+    def travel_exchange(self, out, into):
+        """Change in ``travel()`` if ``out``, which it holds, were replaced by ``into``."""
+        if out.location == into.location:
+            return 0.0
+        last_at_site = self.sites[out.site] == 1
+        locations = (
+            len(self.locations) - (self.locations[out.location] == 1)
+            + (into.location not in self.locations)
+        )
+        site_kept = into.site in self.sites and not (into.site == out.site and last_at_site)
+        sites = len(self.sites) - last_at_site + (not site_kept)
+        after = SITE_CHANGE_COST * (sites - 1) + LOCATION_CHANGE_COST * (locations - sites)
+        return after - self.travel()
+
+
+class Planner:
+    """
+    Assign ``jobs`` to technician days (``shifts`` of ``(technician_id,
+    day, max_jobs)``) so that overdue days and travel between locations are
+    minimal, without exceeding any technician's jobs per day or any
+    location's ``lab_capacity`` per day.
+
+    An earliest-due-first greedy pass gives each instrument its cheapest
+    free slot; local search then moves instruments to other slots and
+    swaps pairs while that lowers the total, until nothing improves or
+    ``time_limit`` seconds have passed.
+    """
+
+    def __init__(self, jobs, shifts, lab_capacity=None, time_limit=None, seed=0):
+        self.jobs = list(jobs)
+        self.slots = [Slot(*shift) for shift in shifts]
+        self.by_day = defaultdict(list)
+        for slot in self.slots:
+            self.by_day[slot.day].append(slot)
+        self.days = sorted(self.by_day)
+        self.lab_capacity = lab_capacity or {}
+        self.lab_load = Counter()
+        self.at_location = defaultdict(set)
+        self.time_limit = settings.SCHEDULE_TIME_LIMIT if time_limit is None else time_limit
+        self.random = random.Random(seed)
+        self.after_horizon = self.days[-1] + timedelta(days=1) if self.days else None
+        self.moves = 0
+
+    # Bookkeeping
+
+    def _add(self, job, slot):
+        job.slot = slot
+        slot.jobs.add(job)
+        slot.locations[job.location] += 1
+        slot.sites[job.site] += 1
+        self.lab_load[job.location, slot.day] += 1
+        self.at_location[job.location].add(slot)
+
+    def _remove(self, job):
+        slot = job.slot
+        job.slot = None
+        slot.jobs.discard(job)
+        for counter, key in ((slot.locations, job.location), (slot.sites, job.site)):
+            counter[key] -= 1
+            if not counter[key]:
+                del counter[key]
+        self.lab_load[job.location, slot.day] -= 1
+        if job.location not in slot.locations:
+            self.at_location[job.location].discard(slot)
+        return slot
+
+    def _lab_free(self, location, day):
+        capacity = self.lab_capacity.get(location)
+        return capacity is None or self.lab_load[location, day] < capacity
+
+    def unscheduled_cost(self, job):
+        if self.after_horizon is None:
+            return UNSCHEDULED_COST
+        return UNSCHEDULED_COST + time_cost(job, self.after_horizon)
+
+    def job_cost(self, job):
+        return self.unscheduled_cost(job) if job.slot is None else time_cost(job, job.slot.day)
+
+    def cost(self):
+        return (
+            sum(self.job_cost(job) for job in self.jobs)
+            + sum(slot.travel() for slot in self.slots)
+        )
+
+    # Construction
+
+    def greedy(self):
+        for job in sorted(self.jobs, key=lambda job: (job.due, job.site, job.location)):
+            best, best_cost = None, self.unscheduled_cost(job)
+            for day in sorted(self.days, key=lambda day: time_cost(job, day)):
+                base = time_cost(job, day)
+                if base >= best_cost:
+                    break
+                if not self._lab_free(job.location, day):
+                    continue
+                for slot in self.by_day[day]:
+                    if slot.free > 0:
+                        cost = base + slot.travel_with(job)
+                        if cost < best_cost:
+                            best, best_cost = slot, cost
+            if best is not None:
+                self._add(job, best)
+
+    # Local search
+
+    def _candidates(self, job):
+        """Slots worth trying: ones already at the location, and good days."""
+        found = list(self.at_location[job.location])
+        if len(found) > CANDIDATE_SLOTS // 2:
+            found = self.random.sample(found, CANDIDATE_SLOTS // 2)
+        for day in sorted(self.days, key=lambda day: time_cost(job, day))[:2]:
+            found.extend(self.by_day[day])
+        if len(found) > CANDIDATE_SLOTS:
+            found = self.random.sample(found, CANDIDATE_SLOTS)
+        found.extend(self.random.sample(self.slots, min(2, len(self.slots))))
+        return found
+
+    def _try_move(self, job, slot):
+        current = job.slot
+        if slot is current or slot.free <= 0:
+            return False
+        if not (current is not None and current.day == slot.day) and not self._lab_free(
+            job.location, slot.day
+        ):
+            return False
+        delta = time_cost(job, slot.day) + slot.travel_with(job)
+        if current is None:
+            delta -= self.unscheduled_cost(job)
+        else:
+            delta -= time_cost(job, current.day) - current.travel_without(job)
+        if delta >= -EPSILON:
+            return False
+        if current is not None:
+            self._remove(job)
+        self._add(job, slot)
+        return True
+
+    def _try_swap(self, job, other):
+        """Exchange the slots of ``job`` and ``other``, or put ``job`` in
+        place of ``other`` when ``job`` is unscheduled."""
+        first, second = job.slot, other.slot
+        if first is second or job.location == other.location and (
+            first is None or first.day == second.day
+        ):
+            return False
+        if first is not None and first.day != second.day:
+            if job.location != other.location and not (
+                self._lab_free(job.location, second.day)
+                and self._lab_free(other.location, first.day)
+            ):
+                return False
+        elif first is None and job.location != other.location and not self._lab_free(
+            job.location, second.day
+        ):
+            return False
+        delta = time_cost(job, second.day) - time_cost(other, second.day)
+        delta += second.travel_exchange(other, job)
+        if first is None:
+            delta += self.unscheduled_cost(other) - self.unscheduled_cost(job)
+        else:
+            delta += time_cost(other, first.day) - time_cost(job, first.day)
+            delta += first.travel_exchange(job, other)
+        if delta >= -EPSILON:
+            return False
+        if first is not None:
+            self._remove(job)
+        self._remove(other)
+        self._add(job, second)
+        if first is not None:
+            self._add(other, first)
+        return True
+
+    def _improve(self, job):
+        for slot in self._candidates(job):
+            if self._try_move(job, slot):
+                return True
+            if slot.free <= 0:
+                others = [other for other in slot.jobs if other.location != job.location]
+                for other in self.random.sample(others, min(3, len(others))):
+                    if self._try_swap(job, other):
+                        return True
+        return False
+
+    def improve(self, deadline):
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            order = list(self.jobs)
+            self.random.shuffle(order)
+            for job in order:
+                if time.perf_counter() >= deadline:
+                    break
+                if self._improve(job):
+                    self.moves += 1
+                    improved = True
+
+    def run(self):
+        started = time.perf_counter()
+        self.greedy()
+        greedy_cost = self.cost()
+        if self.slots:
+            self.improve(started + self.time_limit)
+        scheduled = [job for job in self.jobs if job.slot is not None]
+        return {
+            'jobs': len(self.jobs),
+            'scheduled': len(scheduled),
+            'unscheduled': len(self.jobs) - len(scheduled),
+            'overdue_days': sum(max(0, (job.slot.day - job.due).days) for job in scheduled),
+            'travel': sum(slot.travel() for slot in self.slots),
+            'greedy_cost': round(greedy_cost, 2),
+            'cost': round(self.cost(), 2),
+            'moves': self.moves,
+            'elapsed': round(time.perf_counter() - started, 3),
+        }
+
+
+def load(start, days, using=None):
+    """Planner inputs from the database: instruments due before the horizon
+    ends (overdue ones included), shifts and lab capacities."""
+    end = start + timedelta(days=days)
+    jobs = [
+        Job(pk, location, due)
+        for pk, location, due in Equipment.objects.using(using)
+        .filter(is_active=True, next_calibration_date__lt=end)
+        .order_by('next_calibration_date', 'id')
+        .values_list('id', 'location', 'next_calibration_date')
+    ]
+    shifts = list(
+        TechnicianShift.objects.using(using)
+        .filter(day__gte=start, day__lt=end)
+        .values_list('technician_id', 'day', 'max_jobs')
+    )
+    capacity = dict(LabCapacity.objects.using(using).values_list('location', 'daily_capacity'))
+    return jobs, shifts, capacity
+
+
+def save(planner, start, using=None):
+    """Replace the plan from ``start`` on. Each day is ordered by site and
+    location, the route the travel cost assumes."""
+    rows = [
+        ScheduledCalibration(
+            equipment_id=job.equipment_id,
+            technician_id=slot.technician_id,
+            day=slot.day,
+            sequence=sequence,
+            due_date=job.due,
+        )
+        for slot in planner.slots
+        for sequence, job in enumerate(
+            sorted(slot.jobs, key=lambda job: (job.site, job.location, job.equipment_id))
+        )
+    ]
+    with transaction.atomic(using=using):
+        ScheduledCalibration.objects.using(using).filter(day__gte=start).delete()
+        ScheduledCalibration.objects.using(using).bulk_create(rows, batch_size=1000)
+
+
+def plan(start=None, days=None, time_limit=None, using=None):
+    """Plan the calibrations of the next ``days`` and store the result."""
+    start = start or timezone.now().date()
+    days = days or settings.SCHEDULE_HORIZON_DAYS
+    jobs, shifts, capacity = load(start, days, using)
+    planner = Planner(jobs, shifts, capacity, time_limit)
+    stats = planner.run()
+    save(planner, start, using)
+    return dict(stats, start=start, days=days)
+
+
+def unschedule(equipment_ids, using=None):
+    """
+    Drop the planned visits of instruments in ``equipment_ids`` that fall
+    before their next due date, once a calibration has moved it past them.
+    ``Calibration.save()`` calls this when it moves the due dates; bulk
+    campaigns and imports, which send no signal, call it for the instruments
+    whose due dates they moved.
+    """
+    return ScheduledCalibration.objects.using(using).filter(
+        equipment_id__in=equipment_ids, day__lt=F('equipment__next_calibration_date')
+    ).delete()[0]
@@ -4,8 +4,18 @@
 # ============================================================================
 
 from django.contrib.auth.models import User
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Equipment, Calibration, Maintenance
+from .bulk import MAX_ITEMS
+from .projection import file_url
+from .models import Equipment, Calibration, Maintenance, ScheduledCalibration
+
+
+def pending_calibrations(next_calibration_date):
+    """1 when the instrument is due today or overdue, else 0."""
+    if next_calibration_date and next_calibration_date <= timezone.now().date():
+        return 1
+    return 0
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -40,6 +50,14 @@ class CalibrationSerializer(serializers.ModelSerializer):
         )
         read_only_fields = ('created_at', 'updated_at')
 
+    # Method fields for list rows read with values_list(); see projection.py
+    projected = {
+        'certificate_url': (
+            ('certificate_file',),
+            file_url(Calibration._meta.get_field('certificate_file').storage),
+        ),
+    }
+
     def get_certificate_url(self, obj):
         if obj.certificate_file:
             return self.context['request'].build_absolute_uri(
@@ -72,6 +90,13 @@ class MaintenanceSerializer(serializers.ModelSerializer):
         )
         read_only_fields = ('created_at', 'updated_at')
 
+    projected = {
+        'certificate_url': (
+            ('certificate_file',),
+            file_url(Maintenance._meta.get_field('certificate_file').storage),
+        ),
+    }
+
     def get_certificate_url(self, obj):
         if obj.certificate_file:
             return self.context['request'].build_absolute_uri(
@@ -80,6 +105,26 @@ class MaintenanceSerializer(serializers.ModelSerializer):
         return None
 
 
+class CalibrationListSerializer(CalibrationSerializer):
+    """Calibration lists, without the long free-text fields."""
+
+    class Meta(CalibrationSerializer.Meta):
+        fields = tuple(
+            field for field in CalibrationSerializer.Meta.fields
+            if field not in ('results', 'notes')
+        )
+
+
+class MaintenanceListSerializer(MaintenanceSerializer):
+    """Maintenance lists, without the long free-text fields."""
+
+    class Meta(MaintenanceSerializer.Meta):
+        fields = tuple(
+            field for field in MaintenanceSerializer.Meta.fields
+            if field not in ('description', 'notes')
+        )
+
+
 class EquipmentSerializer(serializers.ModelSerializer):
     """Serializer for Equipment model."""
     
@@ -87,7 +132,9 @@ class EquipmentSerializer(serializers.ModelSerializer):
     calibrations = CalibrationSerializer(many=True, read_only=True)
     maintenance_records = MaintenanceSerializer(many=True, read_only=True)
     pending_calibrations = serializers.SerializerMethodField()
-    pending_maintenance = serializers.SerializerMethodField()
+    pending_maintenance = serializers.IntegerField(
+        source='open_maintenance_count', read_only=True
+    )
 
     class Meta:
         model = Equipment
@@ -109,6 +156,9 @@ class EquipmentSerializer(serializers.ModelSerializer):
             'last_calibration_date',
             'next_calibration_date',
             'is_active',
+            'calibration_count',
+            'open_maintenance_count',
+            'last_maintenance_date',
             'calibrations',
             'maintenance_records',
             'pending_calibrations',
@@ -119,20 +169,149 @@ class EquipmentSerializer(serializers.ModelSerializer):
             'updated_at',
             'last_calibration_date',
             'next_calibration_date',
+            'calibration_count',
+            'open_maintenance_count',
+            'last_maintenance_date',
         )
 
+    projected = {
+        'pending_calibrations': (
+            ('next_calibration_date',),
+            lambda next_calibration_date, context: pending_calibrations(next_calibration_date),
+        ),
+    }
+
     def get_pending_calibrations(self, obj):
         """Get count of pending calibrations."""
-        if not obj.next_calibration_date:
-            return 0
-        from django.utils import timezone
-        today = timezone.now().date()
-        if obj.next_calibration_date <= today:
-            return 1
-        return 0
-
-    def get_pending_maintenance(self, obj):
-        """Get count of pending maintenance records."""
-        return obj.maintenance_records.filter(
-            returned_to_production=False
-        ).count() 
\ No newline at end of file
+        return pending_calibrations(obj.next_calibration_date)
+
+
+class EquipmentChangeSerializer(serializers.ModelSerializer):
+    """Flat Equipment rows for the change feed; history has its own feeds."""
+
+    class Meta:
+        model = Equipment
+        fields = (
+            'id',
+            'name',
+            'serial_number',
+            'category',
+            'purchase_date',
+            'model_number',
+            'manufacturer',
+            'location',
+            'calibration_interval_type',
+            'calibration_interval_value',
+            'notes',
+            'created_by',
+            'created_at',
+            'updated_at',
+            'last_calibration_date',
+            'next_calibration_date',
+            'is_active',
+            'calibration_count',
+            'open_maintenance_count',
+            'last_maintenance_date',
+        )
+
+
+class ComplianceItemSerializer(serializers.ModelSerializer):
+    """One instrument in an overdue or due-soon queue."""
+
+    class Meta:
+        model = Equipment
+        fields = (
+            'id',
+            'name',
+            'serial_number',
+            'category',
+            'location',
+            'last_calibration_date',
+            'next_calibration_date',
+        )
+
+
+class ScheduledCalibrationSerializer(serializers.ModelSerializer):
+    """One instrument's slot in the calibration plan."""
+
+    equipment = ComplianceItemSerializer(read_only=True)
+    technician = UserSerializer(read_only=True)
+
+    class Meta:
+        model = ScheduledCalibration
+        fields = ('id', 'day', 'sequence', 'technician', 'equipment', 'due_date')
+
+
+class SchedulePlanSerializer(serializers.Serializer):
+    """Parameters of a planning run."""
+
+    start = serializers.DateField(required=False)
+    days = serializers.IntegerField(required=False, min_value=1, max_value=366)
+    time_limit = serializers.FloatField(required=False, min_value=0, max_value=60)
+
+
+class CalibrationChangeSerializer(serializers.ModelSerializer):
+    """Flat Calibration rows for the change feed."""
+
+    class Meta:
+        model = Calibration
+        fields = (
+            'id',
+            'equipment',
+            'calibration_date',
+            'calibrated_by',
+            'calibration_standard',
+            'measurement_point',
+            'results',
+            'notes',
+            'certificate_file',
+            'created_at',
+            'updated_at',
+        )
+
+
+class MaintenanceChangeSerializer(serializers.ModelSerializer):
+    """Flat Maintenance rows for the change feed."""
+
+    class Meta:
+        model = Maintenance
+        fields = (
+            'id',
+            'equipment',
+            'maintenance_date',
+            'performed_by',
+            'service_provider',
+            'description',
+            'returned_to_production',
+            'notes',
+            'certificate_file',
+            'created_at',
+            'updated_at',
+        )
+
+
+class BulkSelectionSerializer(serializers.Serializer):
+    """Instruments a bulk action applies to."""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=MAX_ITEMS
+    )
+
+
+class BulkRelocateSerializer(BulkSelectionSerializer):
+    location = serializers.CharField(max_length=200)
+
+
+class BulkIntervalSerializer(BulkSelectionSerializer):
+    calibration_interval_type = serializers.ChoiceField(
+        choices=Equipment._meta.get_field('calibration_interval_type').choices
+    )
+    calibration_interval_value = serializers.IntegerField(min_value=1)
+
+
+class BulkCalibrationSerializer(BulkSelectionSerializer):
+    calibration_date = serializers.DateTimeField(required=False)
+    calibration_standard = serializers.CharField(max_length=200)
+    measurement_point = serializers.CharField(max_length=200)
+    results = serializers.CharField()
+    notes = serializers.CharField(required=False, allow_blank=True)
@@ -0,0 +1,118 @@
+# ============================================================================
+# File Path: backend/equipment/snapshots.py
+# Description: Fleet calibration status as it was on a past date, from the
+#              validity of each recorded calibration
+# ============================================================================
+
+import csv
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .compliance import OVERDUE
+from .models import Calibration, Equipment
+
+IN_CALIBRATION = 'in_calibration'
+NOT_CALIBRATED = 'not_calibrated'
+STATUSES = (IN_CALIBRATION, OVERDUE, NOT_CALIBRATED)
+
+# Columns of the exported report
+COLUMNS = (
+    'serial_number', 'name', 'category', 'location', 'status', 'last_calibration',
+    'valid_until', 'is_active',
+)
+
+
+def parse_day(value):
+    """The ``YYYY-MM-DD`` date of a snapshot; raises ``ValueError``."""
+    day = parse_date(value or '')
+    if day is None:
+        raise ValueError('date must be given as YYYY-MM-DD.')
+    if day > timezone.now().date():
+        raise ValueError('date must not be in the future.')
+    return day
+
+
+def status(valid_until, day):
+    if valid_until is None:
+        return NOT_CALIBRATED
+    return OVERDUE if valid_until < day else IN_CALIBRATION
+
+
+def snapshot(day, location=None, using=None):
+    """
+    Instruments on record on ``day`` annotated with their calibration that
+    day: ``last_calibration``, the latest recorded by the end of the day,
+    and its ``valid_until``. Each is one seek on the validity index, so
+    the cost grows with the fleet, not with its history.
+
+    Locations and retirement are the current ones: neither is kept with a
+    date, so retired instruments are listed with ``is_active`` false.
+    """
+    end = datetime.combine(day + timedelta(days=1), time.min, tzinfo=dt_timezone.utc)
+    latest = Calibration.objects.using(using).filter(
+        equipment=OuterRef('pk'), calibration_date__lt=end
+    ).order_by('-calibration_date')
+    equipment = Equipment.objects.using(using).annotate(
+        last_calibration=Subquery(latest.values('calibration_date')[:1]),
+        valid_until=Subquery(latest.values('valid_until')[:1]),
+    ).filter(
+        # Imported instruments can have history from before they were added
+        Q(created_at__lt=end) | Q(last_calibration__isnull=False)
+    )
+    if location:
+        equipment = equipment.filter(location=location)
+    return equipment
+
+
+def summary(day, location=None, using=None):
+    """``{status: count}`` overall and per location, counted by the database."""
+    counts = {
+        IN_CALIBRATION: Count('id', filter=Q(valid_until__gte=day)),
+        OVERDUE: Count('id', filter=Q(valid_until__lt=day)),
+        NOT_CALIBRATED: Count('id', filter=Q(valid_until__isnull=True)),
+    }
+    rows = list(
+        snapshot(day, location, using).order_by('location').values('location').annotate(**counts)
+    )
+    totals = {name: sum(row[name] for row in rows) for name in STATUSES}
+    return {
+        'as_of': day,
+        'total': sum(totals.values()),
+        **totals,
+        'locations': rows,
+    }
+
+
+def rows(day, location=None, using=None, chunk_size=2000):
+    """The report's rows in ``COLUMNS`` order, by location then serial number."""
+    queryset = snapshot(day, location, using).order_by('location', 'serial_number').values_list(
+        'serial_number', 'name', 'category', 'location', 'last_calibration', 'valid_until',
+        'is_active',
+    )
+    for serial_number, name, category, site, last_calibration, valid_until, is_active in (
+        queryset.iterator(chunk_size=chunk_size)
+    ):
+        yield (
+            serial_number, name, category, site, status(valid_until, day),
+            last_calibration.date().isoformat() if last_calibration else '',
+            valid_until.isoformat() if valid_until else '',
+            'yes' if is_active else 'no',
+        )
+
+
+class _Line:
+    """Write target for ``csv.writer`` that hands back what was written."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(day, location=None, using=None):
+    """The report as CSV text, one line at a time, header first."""
+    writer = csv.writer(_Line())
+    yield writer.writerow(COLUMNS)
+    for row in rows(day, location, using):
+        yield writer.writerow(row)
@@ -0,0 +1,127 @@
+# ============================================================================
+# File Path: backend/equipment/sync.py
+# Description: Change feed for offline clients, with deletion tombstones
+# ============================================================================
+
+import base64
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Equipment, Calibration, Maintenance, DeletionTombstone
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 2000
+
+
+class CursorExpired(Exception):
+    """The cursor predates the tombstones still kept; the client must resync."""
+
+
+class Cursor:
+    """
+    Position in a change feed: the last ``(updated_at, id)`` row and the
+    last ``(deleted_at, id)`` tombstone handed to the client. Opaque to
+    clients, who send back whatever the previous response returned.
+    """
+
+    __slots__ = ('row', 'tombstone')
+
+    def __init__(self, row=None, tombstone=None):
+        self.row = row
+        self.tombstone = tombstone
+
+    def encode(self):
+        data = [
+            [position[0].isoformat(), position[1]] if position else None
+            for position in (self.row, self.tombstone)
+        ]
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip('=')
+
+    @classmethod
+    def decode(cls, value):
+        try:
+            padded = value + '=' * (-len(value) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            row, tombstone = (
+                (parse_datetime(position[0]), int(position[1])) if position else None
+                for position in data
+            )
+        except (TypeError, ValueError, IndexError):
+            raise ValueError('Invalid updated_since cursor.')
+        if (row and row[0] is None) or not tombstone or tombstone[0] is None:
+            raise ValueError('Invalid updated_since cursor.')
+        return cls(row, tombstone)
+
+
+def _after(queryset, field, position):
+    if position is None:
+        return queryset
+    moment, pk = position
+    return queryset.filter(Q(**{f'{field}__gt': moment}) | Q(**{field: moment, 'id__gt': pk}))
+
+
+def parse_limit(value):
+    if value in (None, ''):
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError('limit must be an integer.')
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def read_changes(queryset, cursor=None, limit=DEFAULT_LIMIT):
+    """
+    Rows changed and ids deleted since ``cursor``, oldest first.
+
+    Returns ``(rows, deleted_ids, next_cursor, has_more)``. Rows younger
+    than ``CHANGE_FEED_SETTLE_SECONDS`` are held back: ``updated_at`` is
+    taken before commit, so a transaction still in flight could otherwise
+    commit behind a cursor that has already moved past it.
+    """
+    now = timezone.now()
+    horizon = now - timedelta(seconds=settings.CHANGE_FEED_SETTLE_SECONDS)
+    if cursor is None:
+        # A new client has nothing to delete yet
+        cursor = Cursor(tombstone=(horizon, 0))
+    elif cursor.tombstone[0] < now - timedelta(days=settings.CHANGE_FEED_TOMBSTONE_DAYS):
+        raise CursorExpired()
+
+    rows = _after(queryset.filter(updated_at__lt=horizon), 'updated_at', cursor.row)
+    rows = list(rows.order_by('updated_at', 'id')[:limit + 1])
+
+    tombstones = DeletionTombstone.objects.filter(
+        model=queryset.model._meta.label_lower, deleted_at__lt=horizon
+    )
+    tombstones = list(
+        _after(tombstones, 'deleted_at', cursor.tombstone)
+        .order_by('deleted_at', 'id')
+        .values_list('deleted_at', 'id', 'object_id')[:limit + 1]
+    )
+
+    more_rows, more_tombstones = len(rows) > limit, len(tombstones) > limit
+    rows, tombstones = rows[:limit], tombstones[:limit]
+    # Once everything before the horizon has been read, the cursor moves up
+    # to it, so idle feeds neither rescan old rows nor expire
+    next_cursor = Cursor(
+        (rows[-1].updated_at, rows[-1].pk) if more_rows else (horizon, 0),
+        tombstones[-1][:2] if more_tombstones else (horizon, 0),
+    )
+    deleted = [object_id for _, _, object_id in tombstones]
+    return rows, deleted, next_cursor, more_rows or more_tombstones
+
+
+@receiver(post_delete, sender=Equipment)
+@receiver(post_delete, sender=Calibration)
+@receiver(post_delete, sender=Maintenance)
+def record_deletion(sender, instance, using=None, **kwargs):
+    DeletionTombstone.objects.using(using).create(
+        model=sender._meta.label_lower, object_id=instance.pk
+    )
@@ -5,7 +5,7 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 app_name = 'equipment'
 
@@ -13,7 +13,13 @@ router = DefaultRouter()
 router.register(r'equipment', views.EquipmentViewSet, basename='equipment')
 router.register(r'calibrations', views.CalibrationViewSet, basename='calibration')
 router.register(r'maintenance', views.MaintenanceViewSet, basename='maintenance')
+router.register(r'schedule', views.ScheduleViewSet, basename='schedule')
 
 urlpatterns = [
+    path('dashboard/summary/', async_views.dashboard_summary, name='dashboard-summary'),
+    path('dashboard/activity/', async_views.activity_feed, name='dashboard-activity'),
+    path('dashboard/live/', async_views.live_dashboard, name='dashboard-live'),
+    path('calendar/events/', async_views.calendar_events, name='calendar-events'),
+    path('batch/', views.BatchView.as_view(), name='batch'),
     path('', include(router.urls)),
 ] 
\ No newline at end of file
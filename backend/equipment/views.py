@@ -3,17 +3,36 @@
 # Description: Views for equipment management system
 # ============================================================================
 
-from rest_framework import viewsets, permissions
+from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django_filters import rest_framework as filters
 from django.utils import timezone
-from .models import Equipment, Calibration, Maintenance
+from accounts.permissions import TokenHasScope
+from calibrify.db.compression import compressed_fields
+from .models import Equipment, Calibration, Maintenance, ScheduledCalibration
 from .serializers import (
     EquipmentSerializer,
     CalibrationSerializer,
+    CalibrationListSerializer,
     MaintenanceSerializer,
+    MaintenanceListSerializer,
+    EquipmentChangeSerializer,
+    ComplianceItemSerializer,
+    ScheduledCalibrationSerializer,
+    SchedulePlanSerializer,
+    CalibrationChangeSerializer,
+    MaintenanceChangeSerializer,
+    BulkSelectionSerializer,
+    BulkRelocateSerializer,
+    BulkIntervalSerializer,
+    BulkCalibrationSerializer,
 )
+from . import bulk, compliance, documents, history, projection, scheduling, snapshots, sync
+from .batch import Batch, BatchError
 
 
 class EquipmentFilter(filters.FilterSet):
@@ -30,6 +49,9 @@ class EquipmentFilter(filters.FilterSet):
             'is_active': ['exact'],
             'last_calibration_date': ['exact', 'gt', 'lt'],
             'next_calibration_date': ['exact', 'gt', 'lt'],
+            'calibration_count': ['exact', 'gt', 'lt'],
+            'open_maintenance_count': ['exact', 'gt', 'lt'],
+            'last_maintenance_date': ['gt', 'lt', 'isnull'],
         }
 
 
@@ -61,12 +83,145 @@ class MaintenanceFilter(filters.FilterSet):
         }
 
 
-class EquipmentViewSet(viewsets.ModelViewSet):
+class ScheduleFilter(filters.FilterSet):
+    """Filter for the calibration plan."""
+
+    location = filters.CharFilter(field_name='equipment__location')
+
+    class Meta:
+        model = ScheduledCalibration
+        fields = {
+            'day': ['exact', 'gte', 'lte'],
+            'technician': ['exact'],
+            'equipment': ['exact'],
+        }
+
+
+class ChangeFeedMixin:
+    """
+    ``GET changes/?updated_since=<cursor>`` for offline clients.
+
+    Returns the rows changed and the ids deleted since the cursor, oldest
+    first, with the cursor for the next call. Omit ``updated_since`` for a
+    first full sync; repeat while ``has_more`` is true. A 410 response
+    means the cursor is too old and the client must sync from scratch.
+    """
+
+    change_serializer_class = None
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        try:
+            limit = sync.parse_limit(request.query_params.get('limit'))
+            value = request.query_params.get('updated_since')
+            cursor = sync.Cursor.decode(value) if value else None
+            rows, deleted, cursor, has_more = sync.read_changes(
+                self.queryset, cursor, limit
+            )
+        except ValueError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except sync.CursorExpired:
+            return Response(
+                {'detail': 'Cursor expired; sync again without updated_since.'},
+                status=status.HTTP_410_GONE,
+            )
+        serializer = self.change_serializer_class(
+            rows, many=True, context=self.get_serializer_context()
+        )
+        return Response({
+            'results': serializer.data,
+            'deleted': deleted,
+            'cursor': cursor.encode(),
+            'has_more': has_more,
+        })
+
+
+class HotHistoryMixin:
+    """
+    Lists read only the last ``HISTORY_HOT_DAYS`` of history, so on
+    PostgreSQL they touch the recent partitions only. ``?history=all``, an
+    ``equipment`` filter or any filter on the date reads everything.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list' and not history.wants_all(
+            self.request.query_params, queryset.model
+        ):
+            queryset = history.hot(queryset)
+        return queryset
+
+
+class CompactListMixin:
+    """
+    Lists leave out the compressed free-text columns: they are neither
+    read nor decompressed for every row. The detail view returns them.
+    """
+
+    list_serializer_class = None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = queryset.defer(*compressed_fields(queryset.model))
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return self.list_serializer_class
+        return super().get_serializer_class()
+
+
+def render_documents(view, kind):
+    """
+    Stream ``kind`` documents of the records the view's filters select,
+    as one PDF or (``?output=zip``) a ZIP of one PDF per page.
+    """
+    output = view.request.query_params.get('output', 'pdf')
+    if output not in documents.OUTPUTS[kind]:
+        return Response(
+            {'detail': 'output must be pdf or zip.'}, status=status.HTTP_400_BAD_REQUEST
+        )
+    queryset = view.filter_queryset(view.get_queryset())
+    try:
+        documents.check_size(queryset)
+    except ValueError as exc:
+        return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    response = StreamingHttpResponse(
+        documents.OUTPUTS[kind][output](queryset),
+        content_type='application/pdf' if output == 'pdf' else 'application/zip',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{kind}.{output}"'
+    return response
+
+
+class ProjectedListMixin:
+    """
+    Lists are read with ``values_list()`` and laid out by the list
+    serializer's ``Projection``: no model instances are built and no
+    serializer fields run, for the same output. ``API_PROJECTED_LISTS =
+    False`` goes back to the serializer.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not settings.API_PROJECTED_LISTS:
+            return super().list(request, *args, **kwargs)
+        layout = projection.of(self.get_serializer_class())
+        rows = layout.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        context = self.get_serializer_context()
+        if page is not None:
+            return self.get_paginated_response(layout.render(page, context))
+        return Response(layout.render(list(rows), context))
+
+
+class EquipmentViewSet(ProjectedListMixin, ChangeFeedMixin, viewsets.ModelViewSet):
     """ViewSet for Equipment model."""
     
     queryset = Equipment.objects.all()
     serializer_class = EquipmentSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    change_serializer_class = EquipmentChangeSerializer
+    permission_classes = [permissions.IsAuthenticated, TokenHasScope]
     filterset_class = EquipmentFilter
     search_fields = [
         'name',
@@ -84,10 +239,46 @@ class EquipmentViewSet(viewsets.ModelViewSet):
         'location',
         'last_calibration_date',
         'next_calibration_date',
+        'calibration_count',
+        'open_maintenance_count',
+        'last_maintenance_date',
     ]
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        serializer.save(created_by=self.request.user)
+
+    def _bulk(self, serializer_class, apply):
+        """Validate a bulk request and apply it to the ``ids`` it names."""
+        serializer = serializer_class(data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        values = dict(serializer.validated_data)
+        queryset = self.get_queryset().filter(id__in=values.pop('ids'))
+        return Response({'updated': apply(queryset, **values)})
+
+    @action(detail=False, methods=['post'], url_path='bulk/relocate')
+    def bulk_relocate(self, request):
+        """Move instruments to a new location."""
+        return self._bulk(BulkRelocateSerializer, bulk.relocate)
+
+    @action(detail=False, methods=['post'], url_path='bulk/deactivate')
+    def bulk_deactivate(self, request):
+        """Retire instruments."""
+        return self._bulk(BulkSelectionSerializer, bulk.deactivate)
+
+    @action(detail=False, methods=['post'], url_path='bulk/interval')
+    def bulk_interval(self, request):
+        """Change the calibration interval and recompute due dates."""
+        return self._bulk(BulkIntervalSerializer, bulk.change_interval)
+
+    @action(detail=False, methods=['post'], url_path='bulk/calibrate')
+    def bulk_calibrate(self, request):
+        """Record one calibration for each instrument, e.g. a campaign."""
+        return self._bulk(
+            BulkCalibrationSerializer,
+            lambda queryset, **fields: len(
+                bulk.record_calibrations(queryset, request.user, **fields)
+            ),
+        )
 
     @action(detail=False, methods=['get'])
     def dashboard_summary(self, request):
@@ -99,9 +290,7 @@ class EquipmentViewSet(viewsets.ModelViewSet):
         pending_maintenance = Maintenance.objects.filter(
             returned_to_production=False
         ).count()
-        overdue_items = self.get_queryset().filter(
-            next_calibration_date__lt=timezone.now().date()
-        ).count()
+        overdue_items = compliance.totals()[compliance.OVERDUE]
 
         return Response({
             'total_equipment': total_equipment,
@@ -110,13 +299,96 @@ class EquipmentViewSet(viewsets.ModelViewSet):
             'overdue_items': overdue_items,
         })
 
+    @action(detail=False, methods=['get'])
+    def compliance(self, request):
+        """Overdue and due-soon counts per location, without scanning equipment."""
+        rows = compliance.summaries(request.query_params.get('location'))
+        return Response({
+            'as_of': compliance.today(),
+            'due_soon_days': compliance.due_soon_days(),
+            'overdue': sum(row.overdue for row in rows),
+            'due_soon': sum(row.due_soon for row in rows),
+            'locations': [
+                {'location': row.location, 'overdue': row.overdue, 'due_soon': row.due_soon}
+                for row in rows
+            ],
+        })
+
+    def _compliance_queue(self, name):
+        """
+        One page of a compliance queue, soonest due first. Pass the
+        returned ``next`` back as ``cursor`` for the following page.
+        """
+        params = self.request.query_params
+        location = params.get('location')
+        try:
+            days = int(params['days']) if params.get('days') else None
+            if days is not None and days < 0:
+                raise ValueError('days must not be negative.')
+            limit = compliance.parse_limit(params.get('limit'))
+            queryset = compliance.queue(name, location, days).only(
+                *ComplianceItemSerializer.Meta.fields
+            )
+            items, cursor = compliance.page(queryset, params.get('cursor'), limit)
+        except ValueError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'count': compliance.count(name, location, days),
+            'next': cursor,
+            'results': ComplianceItemSerializer(items, many=True).data,
+        })
+
+    @action(detail=False, methods=['get'], url_path='compliance/overdue')
+    def compliance_overdue(self, request):
+        """Instruments past their calibration due date."""
+        return self._compliance_queue(compliance.OVERDUE)
+
+    @action(detail=False, methods=['get'], url_path='compliance/due')
+    def compliance_due(self, request):
+        """Instruments due within ``days`` (``COMPLIANCE_DUE_SOON_DAYS``)."""
+        return self._compliance_queue(compliance.DUE_SOON)
+
+    @action(detail=False, methods=['get'])
+    def labels(self, request):
+        """Asset label sheets (name, serial barcode, next due date) of the selection."""
+        return render_documents(self, 'labels')
+
+    @action(detail=False, methods=['get'])
+    def as_of(self, request):
+        """
+        How many instruments were in calibration, overdue or never
+        calibrated at the end of ``date``, overall and per location.
+        """
+        try:
+            day = snapshots.parse_day(request.query_params.get('date'))
+        except ValueError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(snapshots.summary(day, request.query_params.get('location')))
+
+    @action(detail=False, methods=['get'], url_path='as_of/export')
+    def as_of_export(self, request):
+        """The ``as_of`` snapshot instrument by instrument, as streamed CSV."""
+        try:
+            day = snapshots.parse_day(request.query_params.get('date'))
+        except ValueError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        response = StreamingHttpResponse(
+            snapshots.csv_lines(day, request.query_params.get('location')),
+            content_type='text/csv',
+        )
+        response['Content-Disposition'] = f'attachment; filename="compliance-{day}.csv"'
+        return response
+
 
-class CalibrationViewSet(viewsets.ModelViewSet):
+class CalibrationViewSet(ProjectedListMixin, CompactListMixin, HotHistoryMixin,
+                         ChangeFeedMixin, viewsets.ModelViewSet):
     """ViewSet for Calibration model."""
     
     queryset = Calibration.objects.all()
     serializer_class = CalibrationSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    list_serializer_class = CalibrationListSerializer
+    change_serializer_class = CalibrationChangeSerializer
+    permission_classes = [permissions.IsAuthenticated, TokenHasScope]
     filterset_class = CalibrationFilter
     search_fields = [
         'equipment__name',
@@ -131,15 +403,23 @@ class CalibrationViewSet(viewsets.ModelViewSet):
     ]
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        serializer.save(calibrated_by=self.request.user)
+
+    @action(detail=False, methods=['get'])
+    def certificates(self, request):
+        """Certificate summaries of the selected calibrations, a page each."""
+        return render_documents(self, 'certificates')
 
 
-class MaintenanceViewSet(viewsets.ModelViewSet):
+class MaintenanceViewSet(ProjectedListMixin, CompactListMixin, HotHistoryMixin,
+                         ChangeFeedMixin, viewsets.ModelViewSet):
     """ViewSet for Maintenance model."""
     
     queryset = Maintenance.objects.all()
     serializer_class = MaintenanceSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    list_serializer_class = MaintenanceListSerializer
+    change_serializer_class = MaintenanceChangeSerializer
+    permission_classes = [permissions.IsAuthenticated, TokenHasScope]
     filterset_class = MaintenanceFilter
     search_fields = [
         'equipment__name',
@@ -154,4 +434,68 @@ class MaintenanceViewSet(viewsets.ModelViewSet):
     ]
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        serializer.save(performed_by=self.request.user)
+
+
+class ScheduleViewSet(viewsets.ReadOnlyModelViewSet):
+    """The calibration plan, by day and technician in visiting order."""
+
+    queryset = ScheduledCalibration.objects.select_related('technician', 'equipment')
+    serializer_class = ScheduledCalibrationSerializer
+    permission_classes = [permissions.IsAuthenticated, TokenHasScope]
+    filterset_class = ScheduleFilter
+    ordering_fields = ['day', 'technician', 'sequence', 'due_date']
+
+    @action(
+        detail=False,
+        methods=['post'],
+        permission_classes=[permissions.IsAdminUser, TokenHasScope],
+    )
+    def plan(self, request):
+        """
+        Replan from ``start`` (today) for ``days`` (``SCHEDULE_HORIZON_DAYS``)
+        and return the plan's statistics. Slots before ``start`` are kept.
+        """
+        serializer = SchedulePlanSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(scheduling.plan(**serializer.validated_data))
+
+
+class BatchView(APIView):
+    """
+    Apply many creates and updates in one request and one transaction.
+
+    Body: ``{"operations": [...]}``, each operation being
+    ``{"op": "create", "model": "equipment", "ref": "e1", "data": {...}}`` or
+    ``{"op": "update", "model": "calibration", "id": 12, "data": {...}}``.
+    Any id or foreign key may be given as ``{"$ref": "e1"}`` to point at a
+    row created earlier in the batch. If any operation fails nothing is
+    saved and the response names the failing operation.
+    """
+
+    permission_classes = [permissions.IsAuthenticated, TokenHasScope]
+
+    def post(self, request):
+        operations = request.data.get('operations') if isinstance(request.data, dict) else None
+        if not isinstance(operations, list) or not operations:
+            return Response(
+                {'detail': 'operations must be a non-empty list.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(operations) > settings.BATCH_MAX_OPERATIONS:
+            return Response(
+                {'detail': f'At most {settings.BATCH_MAX_OPERATIONS} operations per batch.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            results = Batch(operations, request).run()
+        except BatchError as exc:
+            return Response(
+                {
+                    'detail': 'Batch rolled back; no changes were saved.',
+                    'index': exc.index,
+                    'errors': exc.errors,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({'results': results})
@@ -7,8 +7,8 @@ from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
 from datetime import timedelta
-from equipment.models import Equipment, Calibration, Maintenance
-from django.db.models import Q
+from equipment import history, live, snapshots
+from equipment.models import Equipment, Calibration, Maintenance, ScheduledCalibration
 
 
 @login_required
@@ -22,33 +22,9 @@ def dashboard(request):
     thirty_days_ahead = today + timedelta(days=30)
     start_of_month = today.replace(day=1)
 
-    # Equipment statistics
-    total_equipment = Equipment.objects.count()
-    
-    # Due calibrations (calibration_date within next 30 days)
-    due_calibrations = Calibration.objects.filter(
-        Q(calibration_date__gte=today) & 
-        Q(calibration_date__lte=thirty_days_ahead) &
-        ~Q(results='Completed')  # Not completed calibrations
-    ).count()
-
-    # Overdue maintenance (based on maintenance_date)
-    overdue_maintenance = Maintenance.objects.filter(
-        Q(maintenance_date__lt=today) & 
-        ~Q(returned_to_production=True)  # Not returned to production
-    ).count()
-
-    # Completed this month
-    completed_this_month = (
-        Calibration.objects.filter(
-            updated_at__gte=start_of_month,
-            results='Completed'
-        ).count() +
-        Maintenance.objects.filter(
-            updated_at__gte=start_of_month,
-            returned_to_production=True
-        ).count()
-    )
+    # Summary tiles; the same figures are pushed to open dashboards by
+    # the live event stream
+    counts = live.summary()
 
     # Upcoming events (combine calibrations and maintenance)
     upcoming_calibrations = Calibration.objects.filter(
@@ -118,10 +94,10 @@ def dashboard(request):
     recent_activities = recent_activities[:5]  # Limit to 5 most recent
 
     context = {
-        'total_equipment': total_equipment,
-        'due_calibrations': due_calibrations,
-        'overdue_maintenance': overdue_maintenance,
-        'completed_this_month': completed_this_month,
+        'total_equipment': counts['total_equipment'],
+        'due_calibrations': counts['due_calibrations'],
+        'overdue_maintenance': counts['overdue_maintenance'],
+        'completed_this_month': counts['completed_this_month'],
         'upcoming_events': upcoming_events,
         'recent_activities': recent_activities,
     }
@@ -162,9 +138,12 @@ def equipment_create(request):
 @login_required
 def calibration_list(request):
     """
-    Display list of all calibrations with filtering and sorting options.
+    Display list of recent calibrations (the last HISTORY_HOT_DAYS) with
+    filtering and sorting options.
     """
-    calibrations = Calibration.objects.all().order_by('-calibration_date')
+    calibrations = history.hot(
+        Calibration.objects.defer('results', 'notes')
+    ).order_by('-calibration_date')
     return render(request, 'calibration/list.html', {'calibrations': calibrations})
 
 @login_required
@@ -177,9 +156,12 @@ def calibration_create(request):
 @login_required
 def maintenance_list(request):
     """
-    Display list of all maintenance records with filtering and sorting options.
+    Display list of recent maintenance records (the last HISTORY_HOT_DAYS)
+    with filtering and sorting options.
     """
-    maintenance = Maintenance.objects.all().order_by('-maintenance_date')
+    maintenance = history.hot(
+        Maintenance.objects.defer('description', 'notes')
+    ).order_by('-maintenance_date')
     return render(request, 'maintenance/list.html', {'maintenance': maintenance})
 
 @login_required
@@ -192,13 +174,31 @@ def maintenance_create(request):
 @login_required
 def reports(request):
     """
-    Display reports and analytics dashboard.
+    Display reports and analytics dashboard, with the fleet's calibration
+    status as of a past ``date`` for audits.
     """
-    return render(request, 'reports/index.html')
+    context = {'today': timezone.now().date()}
+    if request.GET.get('date'):
+        try:
+            day = snapshots.parse_day(request.GET['date'])
+        except ValueError as exc:
+            context['error'] = str(exc)
+        else:
+            context['summary'] = snapshots.summary(day, request.GET.get('location'))
+    return render(request, 'reports/index.html', context)
 
 @login_required
 def calendar(request):
     """
-    Display calendar view of all events.
+    Display calendar view of all events, with the calibration plan for
+    the next two weeks by day and technician.
     """
-    return render(request, 'calendar/index.html') 
\ No newline at end of file
+    today = timezone.now().date()
+    scheduled = ScheduledCalibration.objects.filter(
+        day__gte=today,
+        day__lt=today + timedelta(days=14),
+    ).select_related('technician', 'equipment').order_by('day', 'technician__username', 'sequence')
+    return render(request, 'calendar/index.html', {
+        'today': today,
+        'scheduled': scheduled,
+    })